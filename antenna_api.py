@@ -1,6 +1,10 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from koneksi import get_conn, Error
+import pattern_store
+import pattern_cache
+import data_version
+import array_transport
 import numpy as np
 import math
 from scipy import special
@@ -8,6 +12,10 @@ from scipy import special
 # --- Inisialisasi Blueprint ---
 antenna_blueprint = Blueprint('antenna', __name__)
 
+# Kolom blob dari pattern_store.PATTERN_COLUMNS yang tidak ikut dikirim ke klien
+PATTERN_ROW_KEYS = ('pattern_dtype', 'pattern_data', 'theta_dtype', 'theta_data')
+ANTENNA_COLUMNS = ('id', 'name', 'frekuensi', 'bw3db_deg', 'eff', 'f_d', 'directivity', 'id_satelite')
+
 # --- Fungsi Perhitungan ---
 def calculate_directivity(freq_GHz, bw3dB_deg, eff=0.4364):
     c = 3e8
@@ -48,6 +56,13 @@ def radiation_pattern(freq_GHz, bw3dB_deg, F_D, theta_range=(0, 12), n=1000):
     pattern_dB[pattern_dB < -90] = -90
     return theta_deg, pattern_dB
 
+def downsample_pattern(theta, pattern, n_points):
+    """Ambil n_points sampel berjarak rata (indeks) dari pola, titik ujung selalu ikut."""
+    if n_points is None or len(theta) <= n_points:
+        return theta, pattern
+    idx = np.unique(np.linspace(0, len(theta) - 1, n_points).round().astype(int))
+    return theta[idx], pattern[idx]
+
 
 @antenna_blueprint.route("/calculate", methods=["POST"])
 @jwt_required()
@@ -104,13 +119,13 @@ def create_and_calculate_antenna():
             final_ant_name = f"antenna-{ant_id}"
             cur.execute("UPDATE antena SET name = %s WHERE id = %s", (final_ant_name, ant_id))
 
-            # Simpan data radiasi (theta & pattern)
-            theta_rows = [(float(t), ant_id) for t in theta]
-            pattern_rows = [(float(p), ant_id) for p in pattern]
-            cur.executemany("INSERT INTO theta (deg, id_antena) VALUES (%s, %s)", theta_rows)
-            cur.executemany("INSERT INTO pattern (deg, id_antena) VALUES (%s, %s)", pattern_rows)
+            # Simpan data radiasi (theta & pattern) sebagai satu baris blob
+            pattern_store.store_pattern(cur, ant_id, theta, pattern)
+            data_version.bump(cur, id_akun_login)
 
             conn.commit()
+            # Pastikan tidak ada entri basi untuk id ini di cache pola
+            pattern_cache.invalidate(ant_id)
 
             # Siapkan respons JSON dengan data lengkap
             antenna_dict = {
@@ -122,8 +137,8 @@ def create_and_calculate_antenna():
                 "F_D": F_D,
                 "directivity_dB": direct_dB,
                 "id_satellite": id_sat, # id satelit yang ditemukan secara otomatis
-                "theta_deg": [float(t) for t in theta],
-                "pattern_dB": [float(p) for p in pattern]
+                "theta_deg": theta,
+                "pattern_dB": pattern
             }
             return jsonify({"message": "Antenna data stored successfully!", "antenna": antenna_dict}), 201
 
@@ -135,33 +150,84 @@ def create_and_calculate_antenna():
 # --- Endpoint GET All (Versi Aman dengan Logika Query Asli Anda) ---
 @antenna_blueprint.route("/get-antennas", methods=["GET"])
 @jwt_required()
+@data_version.conditional_get
 def get_antennas():
+    """
+    Query opsional:
+      include_pattern=0   -> tanpa array theta_deg/pattern_dB (hanya atribut antena)
+      pattern_points=N    -> array pola di-downsample menjadi N titik (N >= 2)
+    Accept: application/x-npz (atau x-msgpack) -> satu array per atribut, pola antena ke-i
+    = theta_deg/pattern_dB[pattern_offsets[i]:pattern_offsets[i+1]] (lihat array_transport.py).
+    Antena yang data polanya rusak (jumlah theta != pattern) tetap dikirim dengan array
+    kosong dan "pattern_error" (di "meta" untuk format biner), bukan 500 untuk semuanya.
+    """
     id_akun_login = get_jwt_identity()
 
+    include_pattern = request.args.get("include_pattern", "1").lower() not in ("0", "false", "no")
+    pattern_points = request.args.get("pattern_points")
+    if pattern_points is not None:
+        if not pattern_points.isdigit() or int(pattern_points) < 2:
+            return jsonify({"error": "'pattern_points' must be an integer >= 2."}), 400
+        pattern_points = int(pattern_points)
+
+    fmt = array_transport.negotiate()
+
     try:
         with get_conn() as conn:
             cur = conn.cursor(dictionary=True)
 
-            # --- PERUBAHAN DI SINI: Tambahkan kolom frekuensi ke dalam SELECT ---
-            sql_antennas = """
+            # Atribut antena + blob pola untuk seluruh akun dalam satu query
+            pattern_cols = f", {pattern_store.PATTERN_COLUMNS}" if include_pattern else ""
+            pattern_join = pattern_store.PATTERN_JOIN.format(alias='ant') if include_pattern else ""
+            sql_antennas = f"""
                 SELECT 
                     ant.id, ant.name, ant.frekuensi, ant.bw3db_deg, ant.eff, ant.f_d, 
-                    ant.directivity, ant.id_satelite
+                    ant.directivity, ant.id_satelite{pattern_cols}
                 FROM antena AS ant
                 JOIN satelite AS s ON ant.id_satelite = s.id
+                {pattern_join}
                 WHERE s.id_akun = %s
+                ORDER BY ant.id
             """
             cur.execute(sql_antennas, (id_akun_login,))
-            antennas = cur.fetchall()
+            rows = cur.fetchall()
+            if not include_pattern:
+                if fmt != array_transport.JSON:
+                    return array_transport.response(array_transport.columns_from_rows(rows, ANTENNA_COLUMNS), fmt)
+                return jsonify(rows)
+
+            antennas, patterns, legacy_ids, pattern_errors = [], {}, [], {}
+            for row in rows:
+                ant = {key: row[key] for key in row if key not in PATTERN_ROW_KEYS}
+                antennas.append(ant)
+                try:
+                    theta, pattern = pattern_store.decode_pattern_row(row)
+                except ValueError as e:
+                    pattern_errors[ant["id"]] = str(e)
+                    continue
+                if theta is None:
+                    legacy_ids.append(ant["id"])
+                else:
+                    patterns[ant["id"]] = (theta, pattern)
+
+            # Antena yang belum dimigrasi: dua query tambahan untuk semuanya, bukan dua per antena
+            patterns.update(pattern_store.load_legacy_patterns(cur, legacy_ids, pattern_errors))
 
             for ant in antennas:
-                ant_id = ant["id"]
-
-                cur.execute("SELECT deg FROM theta WHERE id_antena=%s ORDER BY id", (ant_id,))
-                ant["theta_deg"] = [row["deg"] for row in cur.fetchall()]
-
-                cur.execute("SELECT deg FROM pattern WHERE id_antena=%s ORDER BY id", (ant_id,))
-                ant["pattern_dB"] = [row["deg"] for row in cur.fetchall()]
+                theta, pattern = patterns.get(ant["id"], (np.empty(0), np.empty(0)))
+                theta, pattern = downsample_pattern(theta, pattern, pattern_points)
+                # ndarray di-serialize langsung oleh json_provider
+                ant["theta_deg"] = theta
+                ant["pattern_dB"] = pattern
+                if ant["id"] in pattern_errors:
+                    ant["pattern_error"] = pattern_errors[ant["id"]]
+
+            if fmt != array_transport.JSON:
+                columns = array_transport.columns_from_rows(antennas, ANTENNA_COLUMNS)
+                columns["pattern_offsets"], columns["theta_deg"] = array_transport.pack_ragged([a["theta_deg"] for a in antennas])
+                _, columns["pattern_dB"] = array_transport.pack_ragged([a["pattern_dB"] for a in antennas])
+                meta = {"pattern_errors": {str(k): v for k, v in pattern_errors.items()}} if pattern_errors else None
+                return array_transport.response(columns, fmt, meta=meta)
 
             return jsonify(antennas)
 
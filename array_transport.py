@@ -0,0 +1,111 @@
+"""
+Format transport biner untuk respons berisi array besar (pola antena, kontur beam,
+hasil batch link, raster coverage), dipilih lewat header Accept:
+
+  application/json        (default) format lama, list bersarang
+  application/x-npz       arsip NumPy .npz: satu array bertipe per kolom + "meta" (JSON);
+                          application/x-npy diterima sebagai alias
+  application/x-msgpack   jika paket `msgpack` terpasang: {"meta": {...}, "columns": {nama:
+                          {"dtype": "<f8", "shape": [...], "data": <bytes little-endian>}}},
+                          kolom string dikirim sebagai list dengan dtype "str"
+
+Data dikirim kolumnar: satu array per field untuk semua baris, dan data bertingkat
+(pola per antena, titik per level kontur) sebagai satu array nilai yang disambung
+ditambah array offset int64 sepanjang n+1: elemen ke-i = values[offsets[i]:offsets[i+1]].
+Klien Python cukup np.load, klien WebGL bisa langsung membungkus buffernya sebagai
+Float64Array/Int32Array tanpa parsing JSON.
+"""
+import io
+import json
+
+import numpy as np
+from flask import Response, request
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = "application/json"
+NPZ = "application/x-npz"
+NPY = "application/x-npy"
+MSGPACK = "application/x-msgpack"
+
+BINARY_FORMATS = (NPZ, MSGPACK) if msgpack is not None else (NPZ,)
+
+
+def negotiate(offers=None):
+    """
+    Format respons untuk request ini: offers[0] bila Accept tidak memilih (mis. */*).
+    application/x-npy dipetakan ke application/x-npz.
+    """
+    offers = list(offers or (JSON,) + BINARY_FORMATS)
+    candidates = offers + ([NPY] if NPZ in offers else [])
+    best = request.accept_mimetypes.best_match(candidates, default=offers[0])
+    return NPZ if best == NPY else best
+
+
+def column(values, dtype=None):
+    """List nilai dari baris DB -> array bertipe (None -> NaN untuk angka, '' untuk string)."""
+    if dtype is not None:
+        return np.asarray(values, dtype=dtype)
+    if any(isinstance(v, str) for v in values):
+        return np.array(["" if v is None else v for v in values], dtype=str)
+    if any(v is None for v in values):
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    return np.asarray(values)
+
+
+def columns_from_rows(rows, keys, dtypes=None):
+    """List dict -> dict nama kolom -> array."""
+    dtypes = dtypes or {}
+    return {key: column([row[key] for row in rows], dtypes.get(key)) for key in keys}
+
+
+def pack_ragged(arrays, dtype=np.float64, inner_shape=()):
+    """
+    Sekumpulan array dengan panjang berbeda -> (offsets int64 panjang n+1, values).
+    inner_shape untuk elemen berdimensi, mis. (2,) untuk titik [lat, lon].
+    """
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    if arrays:
+        offsets[1:] = np.cumsum([len(a) for a in arrays])
+    if offsets[-1]:
+        values = np.concatenate([np.asarray(a, dtype=dtype).reshape((-1,) + inner_shape) for a in arrays])
+    else:
+        values = np.empty((0,) + inner_shape, dtype=dtype)
+    return offsets, values
+
+
+def encode_npz(columns, meta=None, compress=False):
+    buf = io.BytesIO()
+    save = np.savez_compressed if compress else np.savez
+    save(buf, meta=np.array(json.dumps(meta or {})), **columns)
+    return buf.getvalue()
+
+
+def _msgpack_column(array):
+    array = np.asarray(array)
+    if array.dtype.kind in "US":
+        return {"dtype": "str", "shape": list(array.shape), "data": array.tolist()}
+    array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))
+    return {"dtype": array.dtype.str, "shape": list(array.shape), "data": array.tobytes()}
+
+
+def encode_msgpack(columns, meta=None):
+    return msgpack.packb(
+        {"meta": meta or {}, "columns": {name: _msgpack_column(a) for name, a in columns.items()}},
+        use_bin_type=True
+    )
+
+
+def response(columns, fmt, meta=None, compress=False, headers=None):
+    """Respons biner untuk format hasil negotiate() (NPZ atau MSGPACK)."""
+    if fmt == MSGPACK:
+        body = encode_msgpack(columns, meta)
+    else:
+        body = encode_npz(columns, meta, compress)
+        fmt = NPZ
+    resp = Response(body, mimetype=fmt, headers=headers)
+    resp.vary.add('Accept')
+    return resp
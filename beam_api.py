@@ -1,14 +1,25 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from koneksi import get_conn, Error
+from koneksi import get_conn, use_conn, Error
+import pattern_cache
+import beam_index
+import data_version
+import array_transport
+import contour_store
+import bulk_writer
+import jobs
+from jobs_api import job_accepted
 import numpy as np
 import math
-from scipy.interpolate import interp1d
 
 # --- Inisialisasi Blueprint ---
 beam_blueprint = Blueprint('beam', __name__)
 
 
+# Level kontur (dB relatif terhadap puncak) yang disimpan untuk setiap beam
+CONTOUR_LEVELS = (-1, -2, -3)
+
+
 # --- Fungsi Perhitungan Geometri (VERSI BARU) ---
 def generate_spot_beam_properties(clat, clon, beam_radius_deg, sat_lon, sat_lat):
     """
@@ -27,8 +38,8 @@ def generate_spot_beam_properties(clat, clon, beam_radius_deg, sat_lon, sat_lat)
     # Minor axis (sumbu minor) sekarang didasarkan pada radius beam input
     minor_axis = beam_radius_deg
 
-    # Faktor distorsi karena kelengkungan bumi
-    distortion = 1.0 / np.cos(ang) if np.cos(ang) > 1e-9 else 1.0 / 1e-9
+    # Faktor distorsi karena kelengkungan bumi (np.maximum agar bisa dipakai untuk array)
+    distortion = 1.0 / np.maximum(np.cos(ang), 1e-9)
     major_axis = minor_axis * distortion
 
     # Menghitung sudut rotasi (azimuth) dari satelit ke pusat beam
@@ -45,49 +56,62 @@ def generate_spot_beam_properties(clat, clon, beam_radius_deg, sat_lon, sat_lat)
     return major_axis, minor_axis, rot
 
 def ellipse_points(clat, clon, major, minor, rot, num=100):
-    t  = np.linspace(0, 2*np.pi, num)
-    rot = np.deg2rad(rot)
-    x  = (major/2) * np.cos(t)
-    y  = (minor/2) * np.sin(t)
-    xr = x*np.cos(rot) - y*np.sin(rot)
-    yr = x*np.sin(rot) + y*np.cos(rot)
-    return [[clat + yr[i], clon + xr[i]] for i in range(num)]
+    return contour_store.ellipse_points_array(clat, clon, major, minor, rot, num).tolist()
+
+def beam_ellipse_params(antenna, clat, clon, sat_lon, sat_lat, levels=CONTOUR_LEVELS):
+    """
+    Parameter elips semua beam x semua level dalam satu operasi broadcast.
+    clat/clon berbentuk (N,), hasil (major, minor, rot) masing-masing berbentuk (N, len(levels)).
+    Geometri beam (distorsi & rotasi) hanya bergantung pada pusat beam, radius pada level.
+    """
+    # Radius angular (half-beamwidth) per level; hasil ekstrapolasi yang aneh (<= 0) diberi nilai kecil
+    radius = np.asarray(antenna.theta_at(np.asarray(levels, dtype=float)))
+    radius = np.where(radius <= 0, 0.01, radius)
+    clat = np.asarray(clat, dtype=float)[..., None]
+    clon = np.asarray(clon, dtype=float)[..., None]
+    major, minor, rot = generate_spot_beam_properties(clat, clon, radius, sat_lon, sat_lat)
+    return np.broadcast_arrays(major, minor, rot)
+
+def ellipse_rows(beam_ids, major, minor, rot, levels=CONTOUR_LEVELS):
+    """Baris (id_beam, level, major, minor, rot) untuk contour_store.store_ellipses."""
+    ids, lv = np.broadcast_arrays(np.asarray(beam_ids)[:, None], np.asarray(levels)[None, :])
+    return zip(ids.ravel().tolist(), lv.ravel().tolist(), major.ravel().tolist(), minor.ravel().tolist(), rot.ravel().tolist())
+
+def parse_beam_centers(points_array):
+    """[[lat, lon], ...] -> (clat, clon) sebagai array. ValueError menyebut titik pertama yang tidak valid."""
+    try:
+        centers = np.asarray(points_array, dtype=float)
+        if centers.ndim == 2 and centers.shape[1] == 2:
+            return centers[:, 0], centers[:, 1]
+    except (ValueError, TypeError):
+        pass
+    for point_coords in points_array:
+        try:
+            if not isinstance(point_coords, (list, tuple)) or len(point_coords) != 2:
+                raise ValueError("Each point must be an array of two numbers.")
+            float(point_coords[0]), float(point_coords[1])
+        except (ValueError, TypeError) as e:
+            raise ValueError(point_coords, str(e))
+    raise ValueError(points_array, "Each point must be an array of two numbers.")
 
 def create_inverse_interpolator(gain_dB, theta_deg):
     # REVISI PENTING: Helper baru untuk memusatkan logika persiapan data interpolasi
-    if not gain_dB or not theta_deg:
+    if len(gain_dB) == 0 or len(theta_deg) == 0:
         raise ValueError("Input gain_dB and theta_deg cannot be empty.")
     
-    # 1. Gabungkan data & urutkan berdasarkan gain (sumbu X) secara menaik
-    pattern_data = sorted(zip(gain_dB, theta_deg))
-
-    # 2. Filter untuk memastikan gain unik (ambil yang pertama kali muncul)
-    unique_pattern_data = []
-    last_gain = float('-inf')
-    for gain, theta in pattern_data:
-        if gain > last_gain:
-            unique_pattern_data.append([gain, theta])
-            last_gain = gain
-    
-    if len(unique_pattern_data) < 2:
-        raise ValueError("Not enough unique data points to create interpolation function.")
-    
-    # 3. Pisahkan kembali menjadi array yang bersih & siap pakai
-    final_gains, final_thetas = zip(*unique_pattern_data)
-    
-    # 4. Buat dan kembalikan fungsi interpolasi
-    return interp1d(final_gains, final_thetas, kind='linear', fill_value="extrapolate", bounds_error=False)
+    # Urutkan menurut gain, ambil theta terkecil untuk gain yang sama, lalu buat interp1d
+    return pattern_cache.build_inverse_interpolator(gain_dB, theta_deg)
 
 # --- Fungsi Helper Query (Diperbarui) ---
 
-def validate_antenna_and_get_satellite(id_antena, id_akun):
+def validate_antenna_and_get_satellite(id_antena, id_akun, conn=None):
     """
     Fungsi ini melakukan dua hal:
     1. Memvalidasi bahwa id_antena yang diberikan adalah milik id_akun yang login.
     2. Jika valid, mengembalikan data satelit yang terhubung ke antena tersebut.
     """
     try:
-        with get_conn() as conn:
+        with use_conn(conn) as conn:
             cur = conn.cursor(dictionary=True)
             sql = """
                 SELECT s.lat, s.lon, s.alt
@@ -103,25 +127,14 @@ def validate_antenna_and_get_satellite(id_antena, id_akun):
         print(f"Database error in validate_antenna_and_get_satellite: {e}")
         return None
 
-def fetch_gain_theta(ant_id):
+def fetch_gain_theta(ant_id, conn=None):
     # REVISI PENTING: Menambahkan validasi untuk mencegah error 'index out of bounds'
     try:
-        with get_conn() as conn:
-            cur = conn.cursor(dictionary=True)
-            cur.execute("SELECT deg FROM theta WHERE id_antena = %s ORDER BY id", (ant_id,))
-            theta_deg = [row["deg"] for row in cur.fetchall()]
-            cur.execute("SELECT deg FROM pattern WHERE id_antena = %s ORDER BY id", (ant_id,))
-            pattern_dB = [row["deg"] for row in cur.fetchall()]
-
-            if len(theta_deg) != len(pattern_dB):
-                raise ValueError(
-                    f"Data mismatch for antenna ID {ant_id}. "
-                    f"Found {len(theta_deg)} theta points but {len(pattern_dB)} pattern points. "
-                    "Please check database integrity."
-                )
-            if not theta_deg:
+        with use_conn(conn) as conn:
+            antenna = pattern_cache.get(ant_id, conn)
+            if antenna is None:
                 raise ValueError(f"No gain/theta data found for antenna id {ant_id}")
-            return pattern_dB, theta_deg
+            return antenna.gain_dB.tolist(), antenna.theta_deg.tolist()
     except Error as e:
         raise Exception(f"Database error while fetching gain/theta: {e}")
 
@@ -129,8 +142,20 @@ def fetch_gain_theta(ant_id):
 # --- Endpoint GET All Beams (Versi dengan tambahan data Directivity) ---
 @beam_blueprint.route("/get-beams-with-contours", methods=["GET"])
 @jwt_required()
+@data_version.conditional_get
 def get_beams_with_contours():
+    """
+    Query opsional: contour_points=N -> jumlah titik per level kontur (default 100).
+    Accept: application/x-npz (atau x-msgpack) -> kolom beam, lalu level kontur beam ke-i =
+    contour_level[level_offsets[i]:level_offsets[i+1]] dan titik level ke-j =
+    points[point_offsets[j]:point_offsets[j+1]] berbentuk (n, 2) [lat, lon].
+    """
     id_akun_login = get_jwt_identity()
+    contour_points = request.args.get("contour_points", str(contour_store.DEFAULT_CONTOUR_POINTS))
+    if not contour_points.isdigit() or not 3 <= int(contour_points) <= contour_store.MAX_CONTOUR_POINTS:
+        return jsonify({"error": f"'contour_points' must be an integer between 3 and {contour_store.MAX_CONTOUR_POINTS}."}), 400
+    contour_points = int(contour_points)
+    fmt = array_transport.negotiate()
     try:
         with get_conn() as conn:
             cur = conn.cursor(dictionary=True)
@@ -155,43 +180,37 @@ def get_beams_with_contours():
             cur.execute(sql_beams, (id_akun_login,))
             beams = cur.fetchall()
 
-            if not beams:
+            if not beams and fmt == array_transport.JSON:
                 return jsonify([])
 
-            # Proses selanjutnya tidak perlu diubah, karena data directivity sudah ada di dalam 'beams'
-            beam_map = {beam['id']: beam for beam in beams}
-            for beam in beam_map.values():
-                beam['contours'] = []
+            # Titik kontur dibangkitkan dari parameter elips (atau dibaca dari tabel lama)
+            contours = contour_store.load_contours(cur, beams, contour_points)
+            if fmt != array_transport.JSON:
+                return array_transport.response(beam_columns(beams, contours), fmt)
 
-            beam_ids = tuple(beam_map.keys())
-            if not beam_ids:
-                return jsonify([])
+            for beam in beams:
+                beam['contours'] = contours.get(beam['id'], [])
 
-            placeholders = ", ".join(["%s"] * len(beam_ids))
-            sql_query_contours = f"SELECT id_beam, level, lat, lon FROM countour WHERE id_beam IN ({placeholders}) ORDER BY id_beam, level, id"
-            cur.execute(sql_query_contours, beam_ids)
-            contours = cur.fetchall()
-            
-            # Proses stitching data (tidak ada perubahan)
-            grouped_contours = {}
-            for point in contours:
-                beam_id = point['id_beam']
-                level = point['level']
-                if beam_id not in grouped_contours: grouped_contours[beam_id] = {}
-                if level not in grouped_contours[beam_id]: grouped_contours[beam_id][level] = []
-                grouped_contours[beam_id][level].append([point['lat'], point['lon']])
-
-            for beam_id, levels in grouped_contours.items():
-                formatted_levels = []
-                for level, points in sorted(levels.items()):
-                    formatted_levels.append({"level": level, "points": points})
-                if beam_id in beam_map:
-                    beam_map[beam_id]['contours'] = formatted_levels
-
-            return jsonify(list(beam_map.values()))
+            return jsonify(beams)
     except Error as err:
         return jsonify({"error": f"Database error: {err}"}), 500
 
+BEAM_COLUMNS = ('id', 'center_lat', 'center_lon', 'id_antena', 'antenna_directivity_dBi')
+
+
+def beam_columns(beams, contours):
+    """Beam + kontur dalam bentuk kolumnar untuk array_transport (lihat get-beams-with-contours)."""
+    columns = array_transport.columns_from_rows(beams, BEAM_COLUMNS, {'id': np.int64, 'id_antena': np.int64})
+    levels_per_beam = [contours.get(beam['id'], []) for beam in beams]
+    columns["level_offsets"], columns["contour_level"] = array_transport.pack_ragged(
+        [[level["level"] for level in levels] for levels in levels_per_beam], np.int32
+    )
+    all_levels = [level for levels in levels_per_beam for level in levels]
+    columns["point_offsets"], columns["points"] = array_transport.pack_ragged(
+        [level["points"] for level in all_levels], np.float64, (2,)
+    )
+    return columns
+
 # --- Endpoint POST (Membuat & Menyimpan Beam, Versi Aman) ---
 @beam_blueprint.route("/store-beam", methods=["POST"])
 @jwt_required()
@@ -209,51 +228,22 @@ def store_beam():
         return jsonify({"error": f"Invalid or missing field: {e}"}), 400
     
     try:
-        # 1. Validasi Kepemilikan Antena dan ambil data satelit terkait (TETAP SAMA)
-        sat = validate_antenna_and_get_satellite(ant_id, id_akun_login)
-        if not sat:
-            return jsonify({"error": "Forbidden. You do not own the antenna for this beam."}), 403
-
-        # 2. Ambil data pola radiasi (TETAP SAMA)
-        gain_dB, theta_deg = fetch_gain_theta(ant_id)
-        
-        # --- PERUBAHAN LOGIKA UTAMA DIMULAI DI SINI ---
-
-        # Buat fungsi interpolasi terbalik untuk mencari sudut dari gain
-        # Pastikan data diurutkan dengan benar untuk interp1d
-        sorted_indices = np.argsort(gain_dB)
-        gain_dB_sorted = np.array(gain_dB)[sorted_indices]
-        theta_deg_sorted = np.array(theta_deg)[sorted_indices]
+        with get_conn() as conn:
+            # 1. Validasi Kepemilikan Antena dan ambil data satelit terkait (TETAP SAMA)
+            sat = validate_antenna_and_get_satellite(ant_id, id_akun_login, conn)
+            if not sat:
+                return jsonify({"error": "Forbidden. You do not own the antenna for this beam."}), 403
+
+            # 2. Ambil pola radiasi beserta interpolator terbalik (gain -> theta) dari cache
+            antenna = pattern_cache.get(ant_id, conn)
+            if antenna is None:
+                raise ValueError(f"No gain/theta data found for antenna id {ant_id}")
         
-        # Hapus duplikat pada gain untuk menghindari error di interp1d
-        unique_gains, unique_indices = np.unique(gain_dB_sorted, return_index=True)
-        unique_thetas = theta_deg_sorted[unique_indices]
-
-        inv_interp = interp1d(unique_gains, unique_thetas, kind='linear', fill_value="extrapolate", bounds_error=False)
-
-        levels = []
-        # Loop untuk setiap level kontur yang ingin kita buat
-        for level_val in (-1, -2, -3):
-            # Dapatkan radius angular (half-beamwidth) untuk level gain saat ini
-            angular_radius_deg = float(inv_interp(level_val))
-            
-            # Jika hasil interpolasi aneh (misal negatif karena ekstrapolasi), beri nilai default kecil
-            if angular_radius_deg <= 0:
-                angular_radius_deg = 0.01 
-
-            # Hitung properti elips (major, minor, rot) SPESIFIK untuk level ini
-            maj, minr, rot = generate_spot_beam_properties(
-                clat, clon, angular_radius_deg, sat["lon"], sat["lat"]
-            )
+            # Properti elips (major, minor, rot) untuk semua level sekaligus;
+            # cukup parameternya yang disimpan, titik dibangkitkan saat dibaca
+            major, minor, rot = beam_ellipse_params(antenna, [clat], [clon], sat["lon"], sat["lat"])
 
-            # Buat titik-titik elips berdasarkan properti yang baru dihitung
-            points = ellipse_points(clat, clon, maj, minr, rot)
-            levels.append({"level": level_val, "points": points})
-            
-        # --- AKHIR DARI PERUBAHAN LOGIKA UTAMA ---
-            
-        # 3. Simpan ke Database (TETAP SAMA)
-        with get_conn() as conn:
+            # 3. Simpan ke Database dengan koneksi yang sama
             cur = conn.cursor()
             cur.execute(
                 "INSERT INTO beam (clat, clon, id_antena) VALUES (%s, %s, %s)",
@@ -264,18 +254,13 @@ def store_beam():
                 conn.rollback()
                 return jsonify({"error": "Failed to get beam ID after insertion."}), 500
 
-            for level in levels:
-                level_data = [
-                    (level["level"], float(point[0]), float(point[1]), beam_id)
-                    for point in level["points"]
-                ]
-                if level_data:
-                    cur.executemany(
-                        "INSERT INTO countour (level, lat, lon, id_beam) VALUES (%s, %s, %s, %s)",
-                        level_data
-                    )
+            contour_store.store_ellipses(cur, ellipse_rows([beam_id], major, minor, rot))
+            data_version.bump(cur, id_akun_login)
             conn.commit()
 
+        # Indeks spasial akun ini harus dibangun ulang
+        beam_index.invalidate(id_akun_login)
+
         return jsonify({"message": "Beam and levels stored successfully!", "beam_id": beam_id}), 201
 
     except Error as err:
@@ -283,11 +268,71 @@ def store_beam():
     except Exception as e:
         return jsonify({"error": f"An unexpected error occurred: {e}"}), 500
     
+# --- Inti batch beam (dipakai endpoint sinkron maupun job latar belakang) ---
+SQL_INSERT_BEAM = "INSERT INTO beam (clat, clon, id_antena) VALUES (%s, %s, %s)"
+
+def store_beams_for_account(id_akun, ant_id, clat, clon, conn, progress=None):
+    """
+    Hitung parameter kontur dan simpan semua beam dalam satu transaksi.
+    Mengembalikan list id beam baru; JobFailed jika antena bukan milik akun.
+    `progress(fraction, message)` dipanggil setiap potongan bila diberikan.
+    """
+    sat = validate_antenna_and_get_satellite(ant_id, id_akun, conn)
+    if not sat:
+        raise jobs.JobFailed("Forbidden. You do not own the antenna for these beams.", 403)
+
+    # Pola radiasi & interpolator terbalik diambil dari cache per antena
+    antenna = pattern_cache.get(ant_id, conn)
+    if antenna is None:
+        raise ValueError(f"No gain/theta data found for antenna id {ant_id}")
+
+    # Semua beam x level dihitung dalam satu pass NumPy
+    major, minor, rot = beam_ellipse_params(antenna, clat, clon, sat["lon"], sat["lat"])
+
+    # Beam & parameter kontur ditulis per potongan dengan INSERT multi-row; id beam
+    # diturunkan dari rentang AUTO_INCREMENT. Commit sekali di akhir.
+    cur = conn.cursor()
+    beam_rows = [(lat, lon, ant_id) for lat, lon in zip(clat.tolist(), clon.tolist())]
+    beam_ids = []
+    chunk = bulk_writer.BULK_CHUNK_ROWS
+    for start in range(0, len(beam_rows), chunk):
+        stop = min(start + chunk, len(beam_rows))
+        ids = bulk_writer.insert_rows(cur, SQL_INSERT_BEAM, beam_rows[start:stop])
+        contour_store.store_ellipses(cur, ellipse_rows(ids, major[start:stop], minor[start:stop], rot[start:stop]))
+        beam_ids.extend(ids)
+        if progress:
+            progress(stop / len(beam_rows), f"Stored {stop} of {len(beam_rows)} beams")
+    data_version.bump(cur, id_akun)
+    conn.commit()
+    cur.close()
+
+    beam_index.invalidate(id_akun)
+    return beam_ids
+
+def invalid_points_message(err):
+    point_coords, details = err.args
+    return f"Invalid format in points array: '{point_coords}'. Each point must be an array of [latitude, longitude].", details
+
+def store_beams_job(id_akun, params, conn, progress):
+    """Job 'store_beams' (lihat jobs.JOB_KINDS). params: {"id_antena": .., "points": [[lat, lon], ...]}."""
+    try:
+        clat, clon = parse_beam_centers(params["points"])
+    except ValueError as e:
+        message, details = invalid_points_message(e)
+        raise jobs.JobFailed(f"{message} ({details})")
+    beam_ids = store_beams_for_account(id_akun, int(params["id_antena"]), clat, clon, conn, progress)
+    return {"message": f"Successfully stored {len(beam_ids)} beams.", "beam_ids": beam_ids}
+
 # --- ENDPOINT-ENDPOINT ---
 
 @beam_blueprint.route("/store-beams", methods=["POST"])
 @jwt_required()
 def store_beams_batch():
+    """
+    Body: {"id_antena": .., "points": [[lat, lon], ...], "async": null}
+    Batch lebih besar dari jobs.JOB_ASYNC_THRESHOLD (atau "async": true) dikerjakan
+    sebagai job latar belakang dan dijawab 202 dengan id job.
+    """
     id_akun_login = get_jwt_identity()
     data = request.get_json()
     
@@ -301,58 +346,27 @@ def store_beams_batch():
             return jsonify({"error": "'points' must be a non-empty array."}), 400
     except (ValueError, TypeError) as e:
         return jsonify({"error": f"Invalid format for 'id_antena' or 'points': {e}"}), 400
+
+    try:
+        clat, clon = parse_beam_centers(points_array)
+    except ValueError as e:
+        message, details = invalid_points_message(e)
+        return jsonify({"error": message, "details": details}), 400
     
     try:
-        # Persiapan yang dilakukan sekali saja
-        sat = validate_antenna_and_get_satellite(ant_id, id_akun_login)
-        if not sat:
-            return jsonify({"error": "Forbidden. You do not own the antenna for these beams."}), 403
+        if jobs.wants_async(data, len(clat)):
+            if not validate_antenna_and_get_satellite(ant_id, id_akun_login):
+                return jsonify({"error": "Forbidden. You do not own the antenna for these beams."}), 403
+            job_id = jobs.submit(id_akun_login, "store_beams", {"id_antena": ant_id, "points": np.column_stack([clat, clon]).tolist()})
+            return job_accepted(job_id)
 
-        gain_dB, theta_deg = fetch_gain_theta(ant_id)
-        
-        # Panggil helper baru untuk dapatkan fungsi interpolasi yang sudah aman
-        inv_interp = create_inverse_interpolator(gain_dB, theta_deg)
-
-        newly_created_beam_ids = []
         with get_conn() as conn:
-            cur = conn.cursor()
-            
-            for point_coords in points_array:
-                try:
-                    if not isinstance(point_coords, (list, tuple)) or len(point_coords) != 2:
-                        raise ValueError("Each point must be an array of two numbers.")
-                    clat, clon = float(point_coords[0]), float(point_coords[1])
-                except (ValueError, TypeError, IndexError) as e:
-                    return jsonify({"error": f"Invalid format in points array: '{point_coords}'. Each point must be an array of [latitude, longitude].", "details": str(e)}), 400
-
-                levels = []
-                for level_val in (-1, -2, -3):
-                    angular_radius_deg = float(inv_interp(level_val))
-                    if angular_radius_deg <= 0:
-                        angular_radius_deg = 0.01
-
-                    maj, minr, rot = generate_spot_beam_properties(clat, clon, angular_radius_deg, sat["lon"], sat["lat"])
-                    points = ellipse_points(clat, clon, maj, minr, rot)
-                    levels.append({"level": level_val, "points": points})
-
-                cur.execute("INSERT INTO beam (clat, clon, id_antena) VALUES (%s, %s, %s)", (clat, clon, ant_id))
-                beam_id = cur.lastrowid
-                if not beam_id:
-                    conn.rollback()
-                    return jsonify({"error": "Failed to get beam ID after insertion."}), 500
-                newly_created_beam_ids.append(beam_id)
-
-                all_contour_data = [
-                    (level["level"], float(p[0]), float(p[1]), beam_id)
-                    for level in levels for p in level["points"]
-                ]
-                if all_contour_data:
-                    cur.executemany("INSERT INTO countour (level, lat, lon, id_beam) VALUES (%s, %s, %s, %s)", all_contour_data)
-            
-            conn.commit()
+            newly_created_beam_ids = store_beams_for_account(id_akun_login, ant_id, clat, clon, conn)
 
         return jsonify({"message": f"Successfully stored {len(newly_created_beam_ids)} beams.", "beam_ids": newly_created_beam_ids}), 201
 
+    except jobs.JobFailed as err:
+        return jsonify({"error": str(err)}), err.status
     except (Error, ValueError) as err: # Menangkap ValueError juga dari helper
         return jsonify({"error": f"Operation failed: {err}"}), 500
     except Exception as e:
@@ -391,20 +405,28 @@ def delete_beam(beam_id):
                 return jsonify({"error": "Beam not found or you do not have permission to delete it."}), 404
 
             # 3. Lakukan Penghapusan dalam satu transaksi
-            # PENTING: Hapus data di tabel 'countour' terlebih dahulu karena memiliki foreign key ke 'beam'
-            
-            # Hapus semua baris contour yang terkait dengan beam_id
+            # PENTING: Hapus data kontur ('beam_ellipse' & 'countour' lama) terlebih dahulu karena memiliki foreign key ke 'beam'
+            cur.execute("DELETE FROM beam_ellipse WHERE id_beam = %s", (beam_id,))
+            num_contours_deleted = cur.rowcount
+
+            # Hapus semua baris contour lama yang terkait dengan beam_id
             cur.execute("DELETE FROM countour WHERE id_beam = %s", (beam_id,))
-            num_contours_deleted = cur.rowcount # Opsional: untuk logging atau respons
+            num_contours_deleted += cur.rowcount # Opsional: untuk logging atau respons
 
             # Setelah data contour terkait bersih, hapus data beam utama
             cur.execute("DELETE FROM beam WHERE id = %s", (beam_id,))
+            if cur.rowcount == 0:
+                # Sudah dihapus request lain di antara pengecekan dan DELETE
+                conn.rollback()
+                return jsonify({"error": "Beam not found or you do not have permission to delete it."}), 404
             
             # Commit transaksi untuk menyimpan semua perubahan
+            data_version.bump(cur, id_akun_login)
             conn.commit()
+            beam_index.invalidate(id_akun_login)
 
             return jsonify({
-                "message": f"Beam ID {beam_id} and its {num_contours_deleted} contour points have been deleted successfully."
+                "message": f"Beam ID {beam_id} and its {num_contours_deleted} contour rows have been deleted successfully."
             }), 200
 
     except Error as err:
@@ -0,0 +1,163 @@
+"""
+Indeks spasial pusat beam per akun untuk pemilihan beam terdekat.
+
+Pusat beam dipetakan ke koordinat ECEF pada bola satuan lalu dimasukkan ke KD-tree
+(scipy.spatial.cKDTree). Jarak chord di bola satuan dikonversi kembali ke jarak
+permukaan (great-circle) sehingga hasilnya sama dengan haversine, tetapi query
+nearest / k-nearest cukup O(log N) per observer.
+
+Indeks disimpan per akun di dalam proses. Sebelum dipakai, versi data akun
+(data_version.current, satu baris lewat primary key) dicocokkan dengan versi saat
+indeks dibangun, sehingga perubahan dari worker lain tetap terdeteksi. Hanya bila
+versinya berubah, sidik jari beam akun (jumlah, max id, jumlah id) dihitung dengan
+satu query agregat: versi juga naik karena penulisan link/antena, dan indeks dibangun
+ulang hanya jika beam-nya memang berubah. Panggil `invalidate(id_akun)` setelah
+menyimpan atau menghapus beam.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from koneksi import get_conn
+import data_version
+
+EARTH_R_KM = 6371.0
+BEAM_INDEX_CACHE_SIZE = int(os.getenv('BEAM_INDEX_CACHE_SIZE', 64))
+
+SQL_BEAMS = """
+    SELECT b.id, b.clat, b.clon, b.id_antena
+    FROM beam AS b
+    JOIN antena AS a ON b.id_antena = a.id
+    JOIN satelite AS s ON a.id_satelite = s.id
+    WHERE s.id_akun = %s
+    ORDER BY b.id
+"""
+SQL_FINGERPRINT = """
+    SELECT COUNT(b.id) AS n, COALESCE(MAX(b.id), 0) AS max_id, COALESCE(SUM(b.id), 0) AS sum_id
+    FROM beam AS b
+    JOIN antena AS a ON b.id_antena = a.id
+    JOIN satelite AS s ON a.id_satelite = s.id
+    WHERE s.id_akun = %s
+"""
+
+
+def unit_vectors(lat, lon):
+    """Koordinat ECEF pada bola satuan, bentuk (..., 3)."""
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lon = np.radians(np.asarray(lon, dtype=float))
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def chord_to_km(chord):
+    """Jarak chord (bola satuan) -> jarak permukaan dalam km."""
+    return 2 * EARTH_R_KM * np.arcsin(np.clip(chord / 2, 0.0, 1.0))
+
+
+class BeamIndex:
+    """KD-tree pusat beam milik satu akun."""
+
+    def __init__(self, beams, fingerprint=None, version=None):
+        self.fingerprint = fingerprint
+        self.version = version
+        self.ids = np.array([b['id'] for b in beams], dtype=np.int64)
+        self.clat = np.array([b['clat'] for b in beams], dtype=float)
+        self.clon = np.array([b['clon'] for b in beams], dtype=float)
+        self.id_antena = np.array([b['id_antena'] for b in beams], dtype=np.int64)
+        self._positions = {int(beam_id): i for i, beam_id in enumerate(self.ids)}
+        self._tree = cKDTree(unit_vectors(self.clat, self.clon)) if len(beams) else None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def beam(self, i):
+        """Baris beam ke-i dalam format yang sama dengan query tabel beam."""
+        return {
+            "id": int(self.ids[i]),
+            "clat": float(self.clat[i]),
+            "clon": float(self.clon[i]),
+            "id_antena": int(self.id_antena[i]),
+        }
+
+    def position_of(self, beam_id):
+        """Posisi beam dengan id tertentu di dalam indeks, atau None."""
+        return self._positions.get(int(beam_id))
+
+    def k_nearest(self, lat, lon, k):
+        """
+        k beam terdekat untuk setiap observer. Mengembalikan (index, distance_km) berbentuk
+        (..., k), terurut dari yang terdekat. k otomatis dibatasi jumlah beam.
+        """
+        if self._tree is None:
+            raise ValueError("Beam index is empty.")
+        k = max(1, min(int(k), len(self.ids)))
+        chord, idx = self._tree.query(unit_vectors(lat, lon), k=k)
+        chord, idx = np.asarray(chord), np.asarray(idx)
+        if k == 1:
+            chord, idx = chord[..., None], idx[..., None]
+        return idx, chord_to_km(chord)
+
+    def nearest(self, lat, lon):
+        """Beam terdekat untuk setiap observer: (index, distance_km). Skalar untuk input skalar."""
+        idx, dist = self.k_nearest(lat, lon, 1)
+        idx, dist = idx[..., 0], dist[..., 0]
+        if np.ndim(idx) == 0:
+            return int(idx), float(dist)
+        return idx, dist
+
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+def _fingerprint(cur, id_akun):
+    cur.execute(SQL_FINGERPRINT, (id_akun,))
+    row = cur.fetchone()
+    return int(row['n']), int(row['max_id']), int(row['sum_id'])
+
+
+def get_beam_index(id_akun, conn=None):
+    """Indeks beam untuk akun ini; dibangun ulang bila beam akun berubah."""
+    if conn is None:
+        with get_conn() as own_conn:
+            return get_beam_index(id_akun, own_conn)
+
+    key = str(id_akun)
+    # Versi dibaca sebelum beam, jadi indeks tidak pernah lebih lama dari versinya
+    version = data_version.current(id_akun, conn)
+    with _lock:
+        index = _indexes.get(key)
+        if index is not None and index.version == version:
+            _indexes.move_to_end(key)
+            return index
+
+    cur = conn.cursor(dictionary=True)
+    fingerprint = _fingerprint(cur, id_akun)
+    if index is not None and index.fingerprint == fingerprint:
+        # Versi naik karena penulisan lain (link, antena); beam akun tidak berubah
+        cur.close()
+        index.version = version
+        return index
+
+    cur.execute(SQL_BEAMS, (id_akun,))
+    beams = cur.fetchall()
+    cur.close()
+    index = BeamIndex(beams, fingerprint, version)
+
+    with _lock:
+        _indexes[key] = index
+        _indexes.move_to_end(key)
+        while len(_indexes) > BEAM_INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
+
+
+def invalidate(id_akun=None):
+    """Buang indeks satu akun (atau semua akun jika id_akun None)."""
+    with _lock:
+        if id_akun is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(str(id_akun), None)
@@ -0,0 +1,306 @@
+"""
+Microbenchmark untuk kernel numerik (pola antena, geometri beam, link budget).
+
+Setiap benchmark diparameterisasi dengan ukuran n (jumlah titik/beam/observer/panggilan).
+Varian "[loop]" memanggil fungsi skalar n kali (dibatasi SCALAR_MAX_N), varian "[array]"
+memanggil versi vektornya sekali untuk n elemen.
+
+Pemakaian (dari root repo):
+    python benchmarks/bench_kernels.py                          # semua, ukuran default
+    python benchmarks/bench_kernels.py -k haversine --sizes 1,1000
+    python benchmarks/bench_kernels.py --compare benchmarks/results/<commit>.json
+
+Hasil disimpan sebagai JSON di benchmarks/results/<commit>.json (atau --output) berisi
+metadata lingkungan dan statistik waktu per (benchmark, n) dalam detik per pemanggilan.
+Dengan --compare, rasio terhadap baseline dicetak dan yang lebih lambat dari --threshold
+ditandai REGRESSION (exit code 1).
+
+Modul API meng-import koneksi; tanpa DB_BACKEND di environment, benchmark memakai
+backend SQLite sehingga tidak butuh server database.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+DEFAULT_SIZES = (1, 100, 10_000, 100_000)
+SCALAR_MAX_N = 10_000     # fungsi skalar dalam loop Python: 100k panggilan terlalu lama untuk dijalankan rutin
+MIN_TIME = 0.2            # durasi minimum satu sampel (detik); fungsi cepat diulang dalam satu sampel
+REPEAT = 5
+
+BENCHMARKS = {}
+
+
+def benchmark(name, max_n=None):
+    """Dekorator: fungsi setup(n) -> callable tanpa argumen yang diukur."""
+    def register(setup):
+        BENCHMARKS[name] = (setup, max_n)
+        return setup
+    return register
+
+
+# --- Data masukan yang realistis ---
+SAT = (0.0, 110.0, 35786.0)   # lat, lon, alt (km) satelit GEO
+
+
+def _rng():
+    return np.random.default_rng(42)
+
+
+def _pattern(n=1000):
+    from antenna_api import radiation_pattern
+    return radiation_pattern(12.0, 1.0, 0.5, n=n)
+
+
+def _link_params(n=None):
+    rng = _rng()
+    return {
+        'directivity_satelit_tx_dBi': rng.uniform(35, 45, n),
+        'dir_ground': 40.0,
+        'frekuensi_GHz': 12.0,
+        'jarak_km': rng.uniform(35786, 41000, n),
+        'efisiensi_antena': 0.65,
+        'tx_sat': 10.0,
+        'suhu': 290.0,
+        'bw': 36e6,
+        'loss': 2.0,
+        'ci_down': 15.0,
+    }
+
+
+def _points(n, lat=(-11.0, 6.0), lon=(95.0, 141.0)):
+    rng = _rng()
+    return rng.uniform(*lat, n), rng.uniform(*lon, n)
+
+
+# --- antenna_api ---
+@benchmark("radiation_pattern")
+def bench_radiation_pattern(n):
+    from antenna_api import radiation_pattern
+    return lambda: radiation_pattern(12.0, 1.0, 0.5, n=n)
+
+
+@benchmark("calculate_directivity[loop]", SCALAR_MAX_N)
+def bench_calculate_directivity(n):
+    from antenna_api import calculate_directivity
+    freqs = _rng().uniform(10, 14, n).tolist()
+    return lambda: [calculate_directivity(f, 1.0, 0.6) for f in freqs]
+
+
+# --- beam_api ---
+@benchmark("generate_spot_beam_properties[loop]", SCALAR_MAX_N)
+def bench_spot_beam_loop(n):
+    from beam_api import generate_spot_beam_properties
+    clat, clon = (a.tolist() for a in _points(n))
+    return lambda: [generate_spot_beam_properties(la, lo, 0.5, SAT[1], SAT[0]) for la, lo in zip(clat, clon)]
+
+
+@benchmark("generate_spot_beam_properties[array]")
+def bench_spot_beam_array(n):
+    from beam_api import generate_spot_beam_properties
+    clat, clon = _points(n)
+    radius = np.array([0.3, 0.45, 0.55])
+    return lambda: generate_spot_beam_properties(clat[:, None], clon[:, None], radius, SAT[1], SAT[0])
+
+
+@benchmark("ellipse_points[num]")
+def bench_ellipse_points(n):
+    from beam_api import ellipse_points
+    return lambda: ellipse_points(-6.2, 106.8, 1.2, 0.8, 35.0, num=n)
+
+
+@benchmark("ellipse_points_array[beams]", SCALAR_MAX_N)
+def bench_ellipse_points_array(n):
+    import contour_store
+    clat, clon = _points(n)
+    return lambda: contour_store.ellipse_points_array(clat[:, None], clon[:, None], [0.8, 1.0, 1.2], 0.6, 35.0, 100)
+
+
+@benchmark("create_inverse_interpolator")
+def bench_inverse_interpolator(n):
+    from beam_api import create_inverse_interpolator
+    theta, gain = _pattern(max(n, 2))
+    return lambda: create_inverse_interpolator(gain, theta)
+
+
+# --- link_budget_api ---
+@benchmark("off_axis[loop]", SCALAR_MAX_N)
+def bench_off_axis_loop(n):
+    from link_budget_api import off_axis
+    obs_lat, obs_lon = (a.tolist() for a in _points(n))
+    return lambda: [off_axis(*SAT, -6.2, 106.8, la, lo) for la, lo in zip(obs_lat, obs_lon)]
+
+
+@benchmark("off_axis[array]")
+def bench_off_axis_array(n):
+    from link_budget_api import off_axis
+    obs_lat, obs_lon = _points(n)
+    tgt_lat, tgt_lon = _points(n, (-8.0, 4.0), (100.0, 135.0))
+    return lambda: off_axis(*SAT, tgt_lat, tgt_lon, obs_lat, obs_lon)
+
+
+@benchmark("gain_from_pattern[loop]", SCALAR_MAX_N)
+def bench_gain_from_pattern(n):
+    from link_budget_api import gain_from_pattern
+    theta, gain = _pattern()
+    # gain_from_pattern membangun interpolator di setiap panggilan (pola 1000 titik)
+    angles = _rng().uniform(0, 3, n).tolist()
+    return lambda: [gain_from_pattern(a, theta, gain) for a in angles]
+
+
+@benchmark("haversine[loop]", SCALAR_MAX_N)
+def bench_haversine_loop(n):
+    from link_budget_api import haversine
+    lat1, lon1 = (a.tolist() for a in _points(n))
+    return lambda: [haversine(a, b, -6.2, 106.8) for a, b in zip(lat1, lon1)]
+
+
+def haversine_array(lat1, lon1, lat2, lon2):
+    """Versi NumPy dari link_budget_api.haversine (API sendiri memakai KD-tree beam_index)."""
+    from link_budget_api import EARTH_R_KM
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    dlon, dlat = lon2-lon1, lat2-lat1
+    a = np.sin(dlat/2)**2 + np.cos(lat1)*np.cos(lat2)*np.sin(dlon/2)**2
+    return 2 * EARTH_R_KM * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+
+
+@benchmark("haversine[array]")
+def bench_haversine_array(n):
+    lat1, lon1 = _points(n)
+    return lambda: haversine_array(lat1, lon1, -6.2, 106.8)
+
+
+@benchmark("calculate_link_budget[loop]", SCALAR_MAX_N)
+def bench_link_budget_loop(n):
+    from link_budget_api import calculate_link_budget
+    arrays = _link_params(n)
+    params = [
+        {key: (float(value[i]) if np.ndim(value) else value) for key, value in arrays.items()}
+        for i in range(n)
+    ]
+    return lambda: [calculate_link_budget(p) for p in params]
+
+
+@benchmark("calculate_link_budget[array]")
+def bench_link_budget_array(n):
+    from link_budget_api import calculate_link_budget_array
+    params = _link_params(n)
+    return lambda: calculate_link_budget_array(params)
+
+
+# --- Runner ---
+def measure(func, repeat=REPEAT, min_time=MIN_TIME):
+    """Waktu per pemanggilan (detik) untuk `repeat` sampel; tiap sampel berjalan >= min_time."""
+    func()  # pemanasan (import, cache interpolator, alokasi pertama)
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - started) / loops)
+    return {
+        "loops": loops,
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(sizes, pattern=None, repeat=REPEAT, min_time=MIN_TIME):
+    results = []
+    for name, (setup, max_n) in BENCHMARKS.items():
+        if pattern and pattern not in name:
+            continue
+        for n in sizes:
+            if max_n is not None and n > max_n:
+                continue
+            stats = measure(setup(n), repeat, min_time)
+            results.append({"name": name, "n": n, **stats})
+            print(f"{name:<40} n={n:<8} median {stats['median'] * 1e3:12.4f} ms   "
+                  f"({stats['median'] / n * 1e9:10.1f} ns/elem)")
+    return results
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = {(r["name"], r["n"]): r for r in json.load(f)["results"]}
+    regressions = 0
+    print(f"\nComparison with {baseline_path} (median, new/old):")
+    for r in results:
+        old = baseline.get((r["name"], r["n"]))
+        if not old:
+            continue
+        ratio = r["median"] / old["median"]
+        flag = "REGRESSION" if ratio > threshold else ("faster" if ratio < 1 / threshold else "")
+        regressions += flag == "REGRESSION"
+        print(f"{r['name']:<40} n={r['n']:<8} {ratio:6.2f}x  {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-k', dest='pattern', help="hanya benchmark yang namanya mengandung teks ini")
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)), help="ukuran n, dipisah koma")
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--min-time', type=float, default=MIN_TIME)
+    parser.add_argument('--output', help="file JSON hasil (default benchmarks/results/<commit>.json)")
+    parser.add_argument('--compare', help="file JSON baseline untuk dibandingkan")
+    parser.add_argument('--threshold', type=float, default=1.2, help="rasio median yang dianggap regresi")
+    args = parser.parse_args()
+
+    # Modul API di-import saat setup benchmark; tanpa konfigurasi, pakai SQLite di memori
+    os.environ.setdefault('DB_BACKEND', 'sqlite')
+    os.environ.setdefault('SQLITE_PATH', 'file:bench?mode=memory&cache=shared')
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    commit = git_commit()
+    results = run(sizes, args.pattern, args.repeat, args.min_time)
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"{commit}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "commit": commit,
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "results": results,
+        }, f, indent=2)
+    print(f"\nSaved {len(results)} results to {output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,372 @@
+"""
+Uji beban end-to-end: bangun akun sintetis berukuran besar lalu jalankan campuran
+request ke aplikasi Flask dengan beberapa tingkat konkurensi.
+
+Endpoint yang diuji (bobot diatur dengan --mix):
+    antenna_calculate    POST /antenna/calculate
+    store_beams          POST /beam/store-beams          (--beam-batch titik per request)
+    beams_with_contours  GET  /beam/get-beams-with-contours
+    link_calculate       POST /link_budget/calculate
+    links                GET  /link_budget/links
+
+Seeding juga lewat API (register, satelit, antena, store-beams, calculate-batch), jadi
+bekerja sama untuk server sungguhan maupun aplikasi in-process:
+    python benchmarks/load_test.py                                   # in-process, SQLite sementara
+    python benchmarks/load_test.py --url http://localhost:8000       # server yang sudah jalan (mis. gunicorn)
+    python benchmarks/load_test.py --antennas 20 --beams 2000 --links 20000 --concurrency 1,4 --duration 10
+
+Untuk setiap tingkat konkurensi dicetak throughput dan latensi p50/p95/p99 per endpoint.
+Tingkat pertama yang melewati --max-error-rate atau --max-p99 ditandai sebagai titik jenuh
+dan tingkat berikutnya tidak dijalankan. Hasil disimpan sebagai JSON di
+benchmarks/results/load-<commit>.json (atau --output).
+
+Mode in-process memakai satu proses Python (GIL) dan tanpa DB_BACKEND di environment memakai
+file SQLite sementara; untuk angka yang mewakili produksi pakai --url ke gunicorn dengan MySQL.
+"""
+import argparse
+import datetime
+import http.client
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+from bench_kernels import git_commit  # noqa: E402
+
+DEFAULT_MIX = "antenna_calculate=1,store_beams=2,beams_with_contours=2,link_calculate=10,links=1"
+SEED_BEAM_BATCH = 1000      # di bawah jobs.JOB_ASYNC_THRESHOLD supaya store-beams dijawab sinkron
+SEED_LINK_BATCH = 10_000
+
+# Wilayah layanan sintetis (Indonesia) dan satelit GEO di atasnya
+LAT_RANGE = (-11.0, 6.0)
+LON_RANGE = (95.0, 141.0)
+SATELLITE = {"lat": 0.0, "lon": 118.0, "alt": 35786.0}
+
+
+# --- Transport ---
+class InProcessClient:
+    """Request ke aplikasi Flask di proses ini (test client, satu per thread)."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, token=None):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        response = client.open(path, method=method, json=body, headers=headers)
+        data = response.get_data()
+        return response.status_code, data
+
+
+class HttpClient:
+    """Request HTTP/1.1 ke server yang sudah berjalan; satu koneksi keep-alive per thread."""
+
+    def __init__(self, base_url, timeout):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.https = parsed.scheme == "https"
+        self.prefix = parsed.path.rstrip("/")
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            conn = self._local.conn = cls(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def request(self, method, path, body=None, token=None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        conn = self._connection()
+        try:
+            conn.request(method, self.prefix + path, body=payload, headers=headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self._local.conn = None
+            raise
+
+
+def expect(status, data, what, ok=(200, 201)):
+    if status not in ok:
+        raise RuntimeError(f"{what} failed with HTTP {status}: {data[:300]!r}")
+    return json.loads(data) if data else None
+
+
+# --- Seeding akun sintetis ---
+def random_points(rng, n):
+    return np.column_stack([rng.uniform(*LAT_RANGE, n), rng.uniform(*LON_RANGE, n)]).round(4).tolist()
+
+
+def seed_account(client, index, args, rng):
+    """Buat (atau pakai ulang) satu akun sintetis. Mengembalikan {"username", "token", "antenna_ids"}."""
+    username = f"{args.prefix}-{index}"
+    credentials = {"username": username, "password": args.password}
+    status, data = client.request("POST", "/user/register", credentials)
+    created = status == 201
+    if not created:
+        status, data = client.request("POST", "/user/login", credentials)
+    token = expect(status, data, f"login {username}")["access_token"]
+
+    if created:
+        started = time.perf_counter()
+        expect(*client.request("POST", "/satellite/store-satellite", SATELLITE, token), "store-satellite")
+        for _ in range(args.antennas):
+            body = {
+                "frequency": round(float(rng.uniform(10.7, 14.5)), 3),
+                "bw3dB": round(float(rng.uniform(0.4, 1.5)), 3),
+                "F_D": round(float(rng.uniform(0.4, 0.8)), 3),
+            }
+            expect(*client.request("POST", "/antenna/calculate", body, token), "antenna/calculate")
+        antenna_ids = list_antennas(client, token)
+
+        for done in range(0, args.beams, SEED_BEAM_BATCH):
+            n = min(SEED_BEAM_BATCH, args.beams - done)
+            body = {"id_antena": random.choice(antenna_ids), "points": random_points(rng, n), "async": False}
+            expect(*client.request("POST", "/beam/store-beams", body, token), "beam/store-beams")
+
+        for done in range(0, args.links, SEED_LINK_BATCH):
+            n = min(SEED_LINK_BATCH, args.links - done)
+            body = {"points": random_points(rng, n), "store": True, "async": False}
+            expect(*client.request("POST", "/link_budget/calculate-batch", body, token), "calculate-batch")
+            print(f"  {username}: {done + n}/{args.links} links", end="\r", flush=True)
+        print(f"  {username}: seeded {args.antennas} antennas, {args.beams} beams, {args.links} links "
+              f"in {time.perf_counter() - started:.1f} s")
+    else:
+        antenna_ids = list_antennas(client, token)
+        print(f"  {username}: existing account reused ({len(antenna_ids)} antennas)")
+
+    return {"username": username, "token": token, "antenna_ids": antenna_ids}
+
+
+def list_antennas(client, token):
+    status, data = client.request("GET", "/antenna/get-antennas?include_pattern=0", token=token)
+    return [row["id"] for row in expect(status, data, "get-antennas")]
+
+
+# --- Skenario ---
+def make_request(name, account, rng, args):
+    """(method, path, body) untuk satu request endpoint `name`."""
+    if name == "antenna_calculate":
+        return "POST", "/antenna/calculate", {
+            "frequency": round(rng.uniform(10.7, 14.5), 3), "bw3dB": round(rng.uniform(0.4, 1.5), 3), "F_D": 0.6
+        }
+    if name == "store_beams":
+        points = [[round(rng.uniform(*LAT_RANGE), 4), round(rng.uniform(*LON_RANGE), 4)] for _ in range(args.beam_batch)]
+        return "POST", "/beam/store-beams", {"id_antena": rng.choice(account["antenna_ids"]), "points": points, "async": False}
+    if name == "beams_with_contours":
+        return "GET", "/beam/get-beams-with-contours", None
+    if name == "link_calculate":
+        return "POST", "/link_budget/calculate", {
+            "obs_lat": round(rng.uniform(*LAT_RANGE), 4), "obs_lon": round(rng.uniform(*LON_RANGE), 4)
+        }
+    if name == "links":
+        return "GET", "/link_budget/links", None
+    raise ValueError(f"Unknown endpoint '{name}'")
+
+
+ENDPOINTS = ("antenna_calculate", "store_beams", "beams_with_contours", "link_calculate", "links")
+
+
+def parse_mix(text):
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint in --mix: '{name}' (choose from {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def run_stage(client, accounts, mix, concurrency, args):
+    """Jalankan `concurrency` worker selama args.duration detik. Mengembalikan sampel per endpoint."""
+    names, weights = list(mix), list(mix.values())
+    samples = defaultdict(list)     # endpoint -> [(latency_s, ok, nbytes)]
+    errors = {}                     # endpoint -> contoh error pertama
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    def worker(seed):
+        rng = random.Random(seed)
+        local = defaultdict(list)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            account = rng.choice(accounts)
+            method, path, body = make_request(name, account, rng, args)
+            started = time.perf_counter()
+            try:
+                status, data = client.request(method, path, body, account["token"])
+                ok, nbytes = status < 400, len(data)
+                error = None if ok else f"HTTP {status}: {data[:200].decode('utf-8', 'replace')}"
+            except Exception as e:
+                ok, nbytes, error = False, 0, f"{type(e).__name__}: {e}"
+            local[name].append((time.perf_counter() - started, ok, nbytes))
+            if error and name not in errors:
+                errors.setdefault(name, error)
+        with lock:
+            for name, rows in local.items():
+                samples[name].extend(rows)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    return samples, errors, time.perf_counter() - started
+
+
+def summarize(samples, errors, elapsed):
+    """Statistik per endpoint + baris "total"."""
+    summary = {}
+    everything = []
+    for name in sorted(samples):
+        rows = samples[name]
+        everything.extend(rows)
+        summary[name] = _stats(rows, elapsed)
+        if name in errors:
+            summary[name]["first_error"] = errors[name]
+    summary["total"] = _stats(everything, elapsed)
+    return summary
+
+
+def _stats(rows, elapsed):
+    if not rows:
+        return {"requests": 0}
+    latency = np.array([row[0] for row in rows])
+    errors = sum(1 for row in rows if not row[1])
+    p50, p95, p99 = np.percentile(latency, [50, 95, 99])
+    return {
+        "requests": len(rows),
+        "errors": errors,
+        "error_rate": errors / len(rows),
+        "throughput_rps": len(rows) / elapsed,
+        "p50_ms": p50 * 1e3,
+        "p95_ms": p95 * 1e3,
+        "p99_ms": p99 * 1e3,
+        "max_ms": latency.max() * 1e3,
+        "mean_bytes": float(np.mean([row[2] for row in rows])),
+    }
+
+
+def print_stage(concurrency, summary):
+    print(f"\nconcurrency {concurrency}")
+    print(f"  {'endpoint':<22}{'req':>7}{'err':>6}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'KiB':>9}")
+    for name, s in summary.items():
+        if not s["requests"]:
+            continue
+        print(f"  {name:<22}{s['requests']:>7}{s['errors']:>6}{s['throughput_rps']:>9.1f}"
+              f"{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}{s['max_ms']:>10.1f}"
+              f"{s['mean_bytes'] / 1024:>9.1f}")
+    for name, s in summary.items():
+        if s.get("first_error"):
+            print(f"  first {name} error: {s['first_error']}")
+
+
+def saturated(summary, args):
+    """Alasan tingkat ini dianggap jenuh, atau None."""
+    total = summary["total"]
+    if not total["requests"]:
+        return "no request completed"
+    if total["error_rate"] > args.max_error_rate:
+        return f"error rate {total['error_rate']:.1%} > {args.max_error_rate:.1%}"
+    worst = max((s["p99_ms"], name) for name, s in summary.items() if name != "total" and s["requests"])
+    if args.max_p99 and worst[0] > args.max_p99:
+        return f"p99 of {worst[1]} {worst[0]:.0f} ms > {args.max_p99:.0f} ms"
+    return None
+
+
+def make_client(args):
+    if args.url:
+        return HttpClient(args.url, args.timeout)
+    if 'DB_BACKEND' not in os.environ:
+        os.environ['DB_BACKEND'] = 'sqlite'
+        os.environ['SQLITE_PATH'] = os.path.join(tempfile.mkdtemp(prefix="tabe-load-"), "load.sqlite3")
+    from main import app
+    return InProcessClient(app)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help="base URL server yang diuji (default: aplikasi in-process)")
+    parser.add_argument('--timeout', type=float, default=120.0, help="timeout per request HTTP (detik)")
+    parser.add_argument('--accounts', type=int, default=1)
+    parser.add_argument('--antennas', type=int, default=200, help="antena per akun")
+    parser.add_argument('--beams', type=int, default=20_000, help="beam per akun")
+    parser.add_argument('--links', type=int, default=1_000_000, help="link per akun")
+    parser.add_argument('--prefix', default="loadtest", help="awalan username akun sintetis")
+    parser.add_argument('--password', default="loadtest-password")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--seed-only', action='store_true', help="hanya bangun akun, tanpa uji beban")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="bobot endpoint, mis. link_calculate=10,links=1")
+    parser.add_argument('--beam-batch', type=int, default=100, help="titik per request store_beams")
+    parser.add_argument('--concurrency', default="1,4,16,64", help="tingkat konkurensi, dipisah koma")
+    parser.add_argument('--duration', type=float, default=30.0, help="durasi per tingkat (detik)")
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--max-p99', type=float, default=5000.0, help="batas p99 per endpoint (ms); 0 = tanpa batas")
+    parser.add_argument('--output', help="file JSON hasil (default benchmarks/results/load-<commit>.json)")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    client = make_client(args)
+    rng = np.random.default_rng(args.seed)
+    random.seed(args.seed)
+
+    print(f"Seeding {args.accounts} account(s) via {args.url or 'in-process app'}")
+    accounts = [seed_account(client, i, args, rng) for i in range(args.accounts)]
+    if args.seed_only:
+        return
+
+    stages = []
+    for concurrency in [int(c) for c in args.concurrency.split(",") if c.strip()]:
+        samples, errors, elapsed = run_stage(client, accounts, mix, concurrency, args)
+        summary = summarize(samples, errors, elapsed)
+        print_stage(concurrency, summary)
+        reason = saturated(summary, args)
+        stages.append({"concurrency": concurrency, "elapsed_s": elapsed, "endpoints": summary, "saturated": reason})
+        if reason:
+            print(f"  SATURATED: {reason}")
+            break
+
+    commit = git_commit()
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"load-{commit}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "commit": commit,
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "target": args.url or "in-process",
+            "db_backend": os.getenv('DB_BACKEND', 'mysql') if not args.url else None,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dataset": {"accounts": args.accounts, "antennas": args.antennas, "beams": args.beams, "links": args.links},
+            "mix": mix,
+            "beam_batch": args.beam_batch,
+            "duration_s": args.duration,
+            "stages": stages,
+        }, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Penulisan massal dengan INSERT multi-row.
+
+mysql-connector me-rewrite `executemany` untuk `INSERT ... VALUES (...)` menjadi satu
+statement multi-row, jadi satu potongan (chunk) = satu round-trip. Potongan menjaga
+ukuran statement tetap di bawah max_allowed_packet.
+
+Untuk INSERT multi-row, `lastrowid` adalah id AUTO_INCREMENT baris pertama; karena
+jumlah barisnya diketahui di depan ("simple insert"), InnoDB mengalokasikan id yang
+berurutan dengan langkah @@auto_increment_increment, sehingga id semua baris bisa
+diturunkan tanpa query tambahan per baris. Semua fungsi di sini memakai cursor
+pemanggil dan tidak melakukan commit: satu batch tetap dalam satu transaksi.
+"""
+import os
+
+BULK_CHUNK_ROWS = int(os.getenv('BULK_CHUNK_ROWS', 1000))
+
+
+def _scalar(row):
+    return row[next(iter(row))] if isinstance(row, dict) else row[0]
+
+
+def autoinc_step(cur):
+    """Langkah AUTO_INCREMENT sesi ini (1 kecuali server diset lain, mis. replikasi multi-primary)."""
+    cur.execute("SELECT @@SESSION.auto_increment_increment")
+    return int(_scalar(cur.fetchone()))
+
+
+def write_rows(cur, sql, rows, chunk_size=BULK_CHUNK_ROWS):
+    """Tulis rows per potongan. Mengembalikan jumlah baris yang ditulis."""
+    rows = rows if isinstance(rows, list) else list(rows)
+    for start in range(0, len(rows), chunk_size):
+        cur.executemany(sql, rows[start:start + chunk_size])
+    return len(rows)
+
+
+def insert_rows(cur, sql, rows, chunk_size=BULK_CHUNK_ROWS):
+    """Seperti write_rows, tetapi mengembalikan list id AUTO_INCREMENT untuk setiap baris (urut)."""
+    rows = rows if isinstance(rows, list) else list(rows)
+    if not rows:
+        return []
+    step = autoinc_step(cur) if len(rows) > 1 else 1
+    ids = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        cur.executemany(sql, chunk)
+        first_id = cur.lastrowid
+        if not first_id:
+            raise ValueError("Bulk insert did not return an AUTO_INCREMENT id.")
+        ids.extend(range(first_id, first_id + step * len(chunk), step))
+    return ids
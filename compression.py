@@ -0,0 +1,86 @@
+"""
+Kompresi respons yang dinegosiasikan lewat Accept-Encoding: br (jika paket `brotli`
+terpasang) atau gzip, hanya untuk body teks/JSON minimal COMPRESS_MIN_BYTES.
+
+Dua jalur:
+  - `init_app(app)`: hook after_request yang mengompres respons biasa per request.
+  - data_version.conditional_get memanggil `negotiate`/`compress` sendiri supaya hasil
+    kompresi ikut disimpan di response_cache (kompresi sekali per versi data), lalu
+    hook ini melewati respons yang sudah punya Content-Encoding.
+
+ETag kuat dibedakan per encoding dengan akhiran ("v3-abcd-gzip"), karena byte-nya
+berbeda; `etag_candidates` dipakai untuk mencocokkan If-None-Match dengan varian mana pun.
+"""
+import gzip
+import os
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', 1024))
+# JSON kontur 18 MB: level 6 -> 1.5 s, level 4 -> 0.6 s dengan hasil hanya 2% lebih besar
+COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', 4))
+COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 4))
+
+# Urutan preferensi server bila klien menerima beberapa encoding dengan q yang sama
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/geo+json', 'text/')
+
+
+def negotiate():
+    """Encoding terbaik untuk request ini, atau None."""
+    return request.accept_encodings.best_match(ENCODINGS)
+
+
+def compressible(mimetype, size):
+    return size >= COMPRESS_MIN_BYTES and any(mimetype.startswith(m) for m in COMPRESSIBLE_MIMETYPES)
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+def etag_with_encoding(tag, encoding):
+    return f"{tag}-{encoding}" if encoding else tag
+
+
+def etag_candidates(tag):
+    """ETag representasi tanpa kompresi beserta semua varian terkompresinya."""
+    return [tag] + [etag_with_encoding(tag, encoding) for encoding in ENCODINGS]
+
+
+def mark_encoded(response, encoding):
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+
+
+def _after_request(response):
+    if (
+        response.status_code < 200 or response.status_code in (204, 304)
+        or response.direct_passthrough or response.is_streamed
+        or 'Content-Encoding' in response.headers
+    ):
+        return response
+    body = response.get_data()
+    if not compressible(response.mimetype, len(body)):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate()
+    if encoding is None:
+        return response
+    response.set_data(compress(body, encoding))
+    mark_encoded(response, encoding)
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(etag_with_encoding(etag, encoding), weak)
+    return response
+
+
+def init_app(app):
+    app.after_request(_after_request)
@@ -0,0 +1,102 @@
+"""
+Penyimpanan kontur beam dalam bentuk parameter elips.
+
+Setiap level kontur satu beam disimpan sebagai satu baris di tabel `beam_ellipse`
+(major, minor, rot; pusatnya adalah clat/clon milik beam). Titik-titik kontur
+dibangkitkan ulang saat dibaca dengan resolusi yang diminta klien, untuk banyak
+beam & level sekaligus dalam satu operasi NumPy.
+
+Beam lama yang masih memakai tabel `countour` (satu baris per titik) tetap terbaca
+lewat jalur legacy sampai dimigrasi dengan `migrate_contours.py`.
+"""
+import numpy as np
+
+import bulk_writer
+
+DEFAULT_CONTOUR_POINTS = 100
+MAX_CONTOUR_POINTS = 2000
+
+SQL_INSERT_ELLIPSE = "INSERT INTO beam_ellipse (id_beam, level, major, minor, rot) VALUES (%s, %s, %s, %s, %s)"
+
+
+def ellipse_points_array(clat, clon, major, minor, rot, num=DEFAULT_CONTOUR_POINTS):
+    """
+    Versi array dari beam_api.ellipse_points. Semua argumen di-broadcast, hasilnya
+    berbentuk (..., num, 2) dengan kolom [lat, lon].
+    """
+    t = np.linspace(0, 2 * np.pi, num)
+    clat, clon, major, minor, rot = (np.asarray(v, dtype=float)[..., None] for v in (clat, clon, major, minor, rot))
+    rot = np.deg2rad(rot)
+    x = (major / 2) * np.cos(t)
+    y = (minor / 2) * np.sin(t)
+    xr = x * np.cos(rot) - y * np.sin(rot)
+    yr = x * np.sin(rot) + y * np.cos(rot)
+    return np.stack(np.broadcast_arrays(clat + yr, clon + xr), axis=-1)
+
+
+def store_ellipses(cur, rows):
+    """Simpan parameter kontur (INSERT multi-row per potongan). rows: iterable (id_beam, level, major, minor, rot)."""
+    rows = [(int(b), int(lv), float(maj), float(mn), float(rot)) for b, lv, maj, mn, rot in rows]
+    bulk_writer.write_rows(cur, SQL_INSERT_ELLIPSE, rows)
+
+
+def _in_clause(ids):
+    return ", ".join(["%s"] * len(ids))
+
+
+def load_ellipses(cur, beam_ids):
+    """Parameter kontur untuk banyak beam: list baris (id_beam, level, major, minor, rot)."""
+    if not beam_ids:
+        return []
+    cur.execute(
+        f"SELECT id_beam, level, major, minor, rot FROM beam_ellipse "
+        f"WHERE id_beam IN ({_in_clause(beam_ids)}) ORDER BY id_beam, level",
+        tuple(beam_ids)
+    )
+    return cur.fetchall()
+
+
+def load_legacy_contours(cur, beam_ids):
+    """Baca titik kontur dari tabel lama `countour`: dict id_beam -> {level: [[lat, lon], ...]}."""
+    if not beam_ids:
+        return {}
+    cur.execute(
+        f"SELECT id_beam, level, lat, lon FROM countour WHERE id_beam IN ({_in_clause(beam_ids)}) ORDER BY id_beam, level, id",
+        tuple(beam_ids)
+    )
+    grouped = {}
+    for point in cur.fetchall():
+        grouped.setdefault(point['id_beam'], {}).setdefault(point['level'], []).append([point['lat'], point['lon']])
+    return grouped
+
+
+def load_contours(cur, beams, num_points=DEFAULT_CONTOUR_POINTS):
+    """
+    Kontur untuk daftar beam (dict dengan id, center_lat, center_lon). Cursor harus
+    dictionary cursor. Mengembalikan dict id_beam -> [{"level": .., "points": [[lat, lon], ...]}, ...]
+    dengan level terurut menaik, sama seperti format lama get-beams-with-contours.
+    """
+    centers = {beam['id']: (beam['center_lat'], beam['center_lon']) for beam in beams}
+    ellipses = load_ellipses(cur, list(centers))
+
+    contours = {}
+    if ellipses:
+        beam_ids = [row['id_beam'] for row in ellipses]
+        clat = [centers[b][0] for b in beam_ids]
+        clon = [centers[b][1] for b in beam_ids]
+        points = ellipse_points_array(
+            clat, clon,
+            [row['major'] for row in ellipses],
+            [row['minor'] for row in ellipses],
+            [row['rot'] for row in ellipses],
+            num_points
+        )
+        # Tiap level tetap ndarray (num_points, 2); json_provider men-serialize-nya langsung
+        for row, level_points in zip(ellipses, points):
+            contours.setdefault(row['id_beam'], []).append({"level": row['level'], "points": level_points})
+
+    # Beam yang belum dimigrasi: titik dikirim apa adanya seperti yang tersimpan
+    legacy_ids = [beam_id for beam_id in centers if beam_id not in contours]
+    for beam_id, levels in load_legacy_contours(cur, legacy_ids).items():
+        contours[beam_id] = [{"level": level, "points": pts} for level, pts in sorted(levels.items())]
+    return contours
@@ -0,0 +1,145 @@
+from flask import Blueprint, request, jsonify, Response
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from koneksi import get_conn, Error
+from link_budget_api import fetch_link_budget_defaults, fetch_satellite_by_account, evaluate_observers
+import beam_index
+import array_transport
+import numpy as np
+import os
+
+# --- Inisialisasi Blueprint ---
+coverage_blueprint = Blueprint('coverage', __name__)
+
+# Batas ukuran raster & jumlah sel yang dihitung per potongan (menjaga memori tetap terbatas)
+COVERAGE_MAX_CELLS = int(os.getenv('COVERAGE_MAX_CELLS', 4_000_000))
+COVERAGE_CHUNK_CELLS = int(os.getenv('COVERAGE_CHUNK_CELLS', 250_000))
+
+# Layer raster yang dihasilkan beserta dtype penyimpanannya
+RASTER_LAYERS = {
+    "best_beam_index": np.int32,
+    "best_beam_id": np.int64,
+    "off_axis_deg": np.float32,
+    "gain_dB": np.float32,
+    "directivity_dBi": np.float32,
+    "cinr_dB": np.float32,
+}
+
+
+# --- Fungsi Perhitungan ---
+def build_grid(lat_min, lon_min, lat_max, lon_max, resolution_deg):
+    """Sumbu lat/lon untuk grid reguler (pusat sel) yang menutupi bounding box."""
+    if resolution_deg <= 0:
+        raise ValueError("'resolution_deg' must be positive.")
+    if lat_min >= lat_max or lon_min >= lon_max:
+        raise ValueError("Bounding box must satisfy lat_min < lat_max and lon_min < lon_max.")
+    lats = np.arange(lat_min, lat_max + resolution_deg / 2, resolution_deg)
+    lons = np.arange(lon_min, lon_max + resolution_deg / 2, resolution_deg)
+    return lats, lons
+
+
+def compute_coverage(sat, beams, lats, lons, params, conn=None, chunk_cells=COVERAGE_CHUNK_CELLS):
+    """
+    Hitung beam terbaik, gain off-axis, directivity dan CINR untuk setiap sel grid.
+    Grid diproses per blok baris sehingga memori sebanding dengan chunk_cells, bukan
+    dengan ukuran raster. `beams` adalah beam_index.BeamIndex milik akun.
+    Mengembalikan dict layer -> array (len(lats), len(lons)).
+    """
+    ny, nx = len(lats), len(lons)
+    raster = {name: np.empty((ny, nx), dtype=dtype) for name, dtype in RASTER_LAYERS.items()}
+    rows_per_chunk = max(1, chunk_cells // nx)
+
+    for row_start in range(0, ny, rows_per_chunk):
+        row_stop = min(row_start + rows_per_chunk, ny)
+        grid_lat, grid_lon = np.meshgrid(lats[row_start:row_stop], lons, indexing='ij')
+        r = evaluate_observers(sat, beams, grid_lat.ravel(), grid_lon.ravel(), params, conn)
+        shape = grid_lat.shape
+        raster["best_beam_index"][row_start:row_stop] = r["beam_index"].reshape(shape)
+        raster["best_beam_id"][row_start:row_stop] = r["beam_id"].reshape(shape)
+        raster["off_axis_deg"][row_start:row_stop] = r["theta_off_deg"].reshape(shape)
+        raster["gain_dB"][row_start:row_stop] = r["gain_dB"].reshape(shape)
+        raster["directivity_dBi"][row_start:row_stop] = r["directivity_dBi"].reshape(shape)
+        raster["cinr_dB"][row_start:row_stop] = r["cinr_dB"].reshape(shape)
+
+    return raster
+
+
+def encode_raster_npz(raster, lats, lons, meta, compress=True):
+    """Kemas raster ke format .npz (satu array per layer + sumbu + metadata JSON)."""
+    return array_transport.encode_npz(dict(lat=lats, lon=lons, **raster), meta, compress)
+
+
+# --- Endpoint POST: raster coverage ---
+@coverage_blueprint.route("/raster", methods=["POST"])
+@jwt_required()
+def coverage_raster():
+    """
+    Body: {"bbox": [lat_min, lon_min, lat_max, lon_max], "resolution_deg": 0.1,
+           "link_params": {...}, "compress": true}
+    Respons: file .npz berisi layer best_beam_index, best_beam_id, off_axis_deg, gain_dB,
+    directivity_dBi dan cinr_dB berukuran (len(lat), len(lon)), baris = lat menaik.
+    Dengan Accept: application/x-msgpack (jika tersedia) isi yang sama dikirim sebagai msgpack.
+    """
+    id_akun_login = get_jwt_identity()
+    data = request.get_json()
+    if not data or "bbox" not in data:
+        return jsonify({"error": "Request body must contain 'bbox' as [lat_min, lon_min, lat_max, lon_max]."}), 400
+
+    try:
+        lat_min, lon_min, lat_max, lon_max = (float(v) for v in data["bbox"])
+        resolution_deg = float(data.get("resolution_deg", 0.1))
+        link_params_custom = data.get("link_params", {}) or {}
+        compress = bool(data.get("compress", True))
+        lats, lons = build_grid(lat_min, lon_min, lat_max, lon_max, resolution_deg)
+    except (KeyError, ValueError, TypeError) as e:
+        return jsonify({"error": f"Invalid or missing field: {e}"}), 400
+
+    n_cells = len(lats) * len(lons)
+    if n_cells > COVERAGE_MAX_CELLS:
+        return jsonify({
+            "error": f"Requested raster has {n_cells} cells, the limit is {COVERAGE_MAX_CELLS}.",
+            "message": "Use a coarser 'resolution_deg' or a smaller 'bbox'."
+        }), 400
+
+    try:
+        with get_conn() as conn:
+            params_from_db = fetch_link_budget_defaults(1, conn)
+            if not params_from_db:
+                return jsonify({"error": "Base default profile (ID=1) not found in database."}), 500
+            params = {**params_from_db, **link_params_custom}
+
+            sat = fetch_satellite_by_account(id_akun_login, conn)
+            if not sat: return jsonify({"error": f"Satellite for account id {id_akun_login} not found"}), 404
+
+            beams = beam_index.get_beam_index(id_akun_login, conn)
+            if not len(beams): return jsonify({"error": "No beam data available for your account"}), 404
+
+            raster = compute_coverage(sat, beams, lats, lons, params, conn)
+
+        meta = {
+            "bbox": [lat_min, lon_min, lat_max, lon_max],
+            "resolution_deg": resolution_deg,
+            "shape": [len(lats), len(lons)],
+            # Mirip GeoTransform GDAL: pojok kiri-bawah pusat sel, lat bertambah per baris
+            "transform": [float(lons[0]), resolution_deg, 0.0, float(lats[0]), 0.0, resolution_deg],
+            "beam_ids": beams.ids.tolist(),
+            "layers": list(RASTER_LAYERS),
+        }
+        headers = {"X-Raster-Shape": f"{len(lats)},{len(lons)}"}
+        fmt = array_transport.negotiate(array_transport.BINARY_FORMATS)
+        if fmt != array_transport.NPZ:
+            return array_transport.response(dict(lat=lats, lon=lons, **raster), fmt, meta, headers=headers)
+
+        body = encode_raster_npz(raster, lats, lons, meta, compress)
+        return Response(
+            body,
+            mimetype="application/x-npz",
+            headers={
+                "Content-Disposition": "attachment; filename=coverage.npz",
+                **headers,
+            },
+        )
+
+    except (Error, ValueError) as e:
+        return jsonify({"error": f"Operation failed: {e}"}), 500
+    except Exception as e:
+        return jsonify({"error": f"An unexpected server error occurred: {e}"}), 500
@@ -0,0 +1,161 @@
+"""
+Versi data per akun dan conditional GET (ETag / If-None-Match) untuk endpoint list.
+
+Setiap endpoint yang menulis satelit, antena, beam atau link memanggil `bump(cur, id_akun)`
+di dalam transaksinya sendiri, sebelum commit (tabel data_version, lihat
+migrations/004_data_version.sql). Endpoint GET yang dibungkus `conditional_get` membaca
+versi itu (satu baris lewat primary key) sebelum query data: jika ETag di If-None-Match
+masih sama, dijawab 304 tanpa menyentuh tabel beam/kontur/link.
+
+Versi dibaca sebelum data, jadi paling buruk respons berisi data yang lebih baru dari
+ETag-nya (request berikutnya hanya menerima ulang data penuh), tidak pernah sebaliknya.
+ETag kuat: sama untuk byte yang sama, karena ikut memuat path, query string dan
+REPRESENTATION_VERSION (naikkan bila format respons berubah) dan format hasil negosiasi
+Accept (JSON atau biner, lihat array_transport.py), lalu diberi akhiran
+encoding bila body dikompresi (compression.py). Byte respons 200 (sudah dikompresi
+sesuai Accept-Encoding) juga disimpan di response_cache dengan key yang sama, jadi
+request tanpa If-None-Match (atau dengan ETag lama) dilayani langsung dari byte selama
+versinya belum berubah.
+"""
+import functools
+import hashlib
+
+from flask import Response, make_response, request
+from flask_jwt_extended import get_jwt_identity
+
+from koneksi import use_conn, Error
+import array_transport
+import compression
+import response_cache
+
+# 2: encoder orjson (json_provider.py)
+REPRESENTATION_VERSION = 2
+
+SQL_SELECT = "SELECT version FROM data_version WHERE id_akun = %s"
+SQL_BUMP = "UPDATE data_version SET version = version + 1 WHERE id_akun = %s"
+SQL_INSERT = "INSERT INTO data_version (id_akun, version) VALUES (%s, 1)"
+# Akun yang link-nya memakai profil default_link tertentu (profil bisa dipakai bersama)
+SQL_PROFILE_ACCOUNTS = """
+    SELECT DISTINCT s.id_akun
+    FROM link AS l
+    JOIN beam AS b ON l.id_beam = b.id
+    JOIN antena AS a ON b.id_antena = a.id
+    JOIN satelite AS s ON a.id_satelite = s.id
+    WHERE l.id_default = %s
+"""
+
+
+def bump(cur, id_akun):
+    """Naikkan versi data akun; dipanggil di transaksi penulisan, sebelum commit."""
+    cur.execute(SQL_BUMP, (int(id_akun),))
+    if cur.rowcount == 0:
+        # Akun yang dibuat sebelum tabel data_version ada
+        cur.execute(SQL_INSERT, (int(id_akun),))
+    # Entri versi lama tidak akan terpakai lagi
+    response_cache.invalidate(id_akun)
+
+
+def bump_profile_accounts(cur, profile_id):
+    """Naikkan versi semua akun yang link-nya memakai profil default_link ini."""
+    cur.execute(SQL_PROFILE_ACCOUNTS, (profile_id,))
+    for row in cur.fetchall():
+        bump(cur, row['id_akun'] if isinstance(row, dict) else row[0])
+
+
+def current(id_akun, conn=None):
+    with use_conn(conn) as conn:
+        cur = conn.cursor()
+        cur.execute(SQL_SELECT, (int(id_akun),))
+        row = cur.fetchone()
+        cur.close()
+    return int(row[0]) if row else 0
+
+
+def representation_digest(id_akun):
+    """Digest representasi request saat ini (akun, path, query string, format dari Accept)."""
+    args = "&".join(f"{key}={value}" for key, value in sorted(request.args.items(multi=True)))
+    fmt = array_transport.negotiate()
+    return hashlib.sha1(
+        f"{REPRESENTATION_VERSION}|{id_akun}|{request.path}|{args}|{fmt}".encode('utf-8')
+    ).hexdigest()[:16]
+
+
+def etag_for(version, digest):
+    return f"v{version}-{digest}"
+
+
+def _matching_tag(tag):
+    """ETag dari If-None-Match yang cocok dengan versi ini (varian encoding mana pun), atau None."""
+    if_none_match = request.if_none_match
+    if if_none_match.star_tag:
+        return tag
+    for candidate in compression.etag_candidates(tag):
+        if if_none_match.contains_weak(candidate):
+            return candidate
+    return None
+
+
+def _cache_key(digest, encoding):
+    return f"{digest}.{encoding}" if encoding else digest
+
+
+def _render(view, args, kwargs, id_akun, digest, version, encoding):
+    """
+    Bangun body representasi ini lalu simpan di response_cache: CachedResponse, atau
+    respons view apa adanya bila bukan 200. Varian terkompresi dibuat dari body tanpa
+    kompresi yang sudah ada di cache bila tersedia, tanpa menjalankan view lagi.
+    """
+    plain = response_cache.get(id_akun, digest, version) if encoding else None
+    if plain is None:
+        response = make_response(view(*args, **kwargs))
+        if response.status_code != 200 or response.is_streamed:
+            return response
+        plain = response_cache.CachedResponse(version, response.mimetype, None, response.get_data())
+    if encoding and compression.compressible(plain.mimetype, len(plain.body)):
+        entry = response_cache.CachedResponse(
+            version, plain.mimetype, encoding, compression.compress(plain.body, encoding)
+        )
+    else:
+        entry = plain
+    response_cache.put(id_akun, _cache_key(digest, encoding), version, entry.mimetype, entry.body, entry.encoding)
+    return entry
+
+
+def conditional_get(view):
+    """
+    Dekorator endpoint GET milik akun (dipasang di bawah @jwt_required): 304 bila
+    If-None-Match cocok, lalu byte dari response_cache, baru menjalankan view. Respons
+    200 diberi ETag dan Cache-Control no-cache.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        id_akun = get_jwt_identity()
+        try:
+            version = current(id_akun)
+        except Error as err:
+            # Tanpa versi, layani seperti biasa (tanpa ETag maupun cache)
+            print(f"Database error in conditional_get: {err}")
+            return view(*args, **kwargs)
+        digest = representation_digest(id_akun)
+        tag = etag_for(version, digest)
+
+        matched = _matching_tag(tag)
+        if matched is not None:
+            response = Response(status=304)
+            response.set_etag(matched)
+        else:
+            encoding = compression.negotiate()
+            entry = response_cache.get(id_akun, _cache_key(digest, encoding), version)
+            if entry is None:
+                entry = _render(view, args, kwargs, id_akun, digest, version, encoding)
+                if not isinstance(entry, response_cache.CachedResponse):
+                    return entry
+            response = Response(entry.body, mimetype=entry.mimetype)
+            if entry.encoding:
+                compression.mark_encoded(response, entry.encoding)
+            response.set_etag(compression.etag_with_encoding(tag, entry.encoding))
+        response.vary.add('Accept')
+        response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return wrapper
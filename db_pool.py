@@ -0,0 +1,198 @@
+"""
+Pool koneksi database yang memblokir (antre) saat penuh, beserta statistiknya.
+
+Berbeda dengan pooling.MySQLConnectionPool yang langsung melempar PoolError ketika
+semua koneksi sedang dipakai, pool ini membuat peminjam menunggu sampai ada koneksi
+yang dikembalikan atau batas waktu `timeout` habis.
+
+Koneksi dibuat lewat `factory()` (tanpa argumen) sehingga pool tidak terikat ke satu
+driver. Sebelum diserahkan, koneksi yang terlalu lama menganggur dicek dengan
+`ping(conn)`; koneksi yang gagal dicek atau umurnya melewati `recycle` detik ditutup
+dan diganti koneksi baru.
+"""
+import threading
+import time
+from collections import deque
+
+from mysql.connector.errors import PoolError
+
+
+class PoolTimeout(PoolError):
+    """Tidak ada koneksi yang bebas dalam batas waktu tunggu."""
+
+
+def mysql_ping(conn):
+    conn.ping(reconnect=False)
+
+
+class _Slot:
+    """Koneksi beserta waktu dibuat dan waktu terakhir dikembalikan ke pool."""
+    __slots__ = ('conn', 'created_at', 'released_at', 'checked_out_at')
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.released_at = now
+        self.checked_out_at = None
+
+
+class BlockingPool:
+    def __init__(self, factory, size=5, timeout=10.0, ping=mysql_ping, ping_after=30.0, recycle=3600.0):
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.ping = ping
+        self.ping_after = ping_after
+        self.recycle = recycle
+
+        self._cond = threading.Condition()
+        self._idle = deque()    # _Slot yang siap dipinjam (LIFO: koneksi paling segar dipakai dulu)
+        self._busy = {}         # id(conn) -> _Slot yang sedang dipinjam
+        self._pending = 0       # slot yang sudah dipesan tapi masih dicek/dibuat di luar lock
+
+        self.checkouts = 0
+        self.exhausted = 0      # berapa kali peminjam harus antre karena pool penuh
+        self.timeouts = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.hold_seconds = 0.0
+        self.max_hold_seconds = 0.0
+        self.created = 0
+        self.recycled = 0
+        self.broken = 0
+
+    # --- pinjam & kembalikan ---
+    def get(self, timeout=None):
+        """Pinjam satu koneksi; menunggu bila semua koneksi sedang dipakai."""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    slot = self._idle.pop()
+                    break
+                if len(self._busy) + self._pending < self.size:
+                    slot = None
+                    break
+                if not waited:
+                    waited = True
+                    self.exhausted += 1
+                    self.waiting += 1
+                    self.max_waiting = max(self.max_waiting, self.waiting)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.waiting -= 1
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f"No database connection available within {timeout:g}s "
+                        f"(pool size {self.size}, {len(self._busy)} in use)."
+                    )
+                self._cond.wait(remaining)
+            if waited:
+                self.waiting -= 1
+            self._pending += 1
+
+        try:
+            slot = self._prepare(slot)
+        except Exception:
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify()
+            raise
+
+        now = time.monotonic()
+        slot.checked_out_at = now
+        wait = now - started
+        with self._cond:
+            self._pending -= 1
+            self._busy[id(slot.conn)] = slot
+            self.checkouts += 1
+            self.wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        return slot.conn
+
+    def _prepare(self, slot):
+        """Pastikan slot berisi koneksi yang hidup; buat baru bila perlu (di luar lock)."""
+        if slot is not None:
+            now = time.monotonic()
+            if self.recycle and now - slot.created_at > self.recycle:
+                self._discard(slot.conn)
+                with self._cond:
+                    self.recycled += 1
+                slot = None
+            elif self.ping and now - slot.released_at > self.ping_after:
+                try:
+                    self.ping(slot.conn)
+                except Exception:
+                    self._discard(slot.conn)
+                    with self._cond:
+                        self.broken += 1
+                    slot = None
+            if slot is not None:
+                return slot
+
+        conn = self.factory()
+        with self._cond:
+            self.created += 1
+        return _Slot(conn)
+
+    def release(self, conn, discard=False):
+        """Kembalikan koneksi ke pool. Transaksi yang belum di-commit di-rollback."""
+        with self._cond:
+            slot = self._busy.pop(id(conn), None)
+        if slot is None:
+            return
+
+        if not discard:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        now = time.monotonic()
+        hold = now - slot.checked_out_at
+        with self._cond:
+            self.hold_seconds += hold
+            self.max_hold_seconds = max(self.max_hold_seconds, hold)
+            if discard:
+                self.broken += 1
+            else:
+                slot.released_at = now
+                self._idle.append(slot)
+            self._cond.notify()
+        if discard:
+            self._discard(conn)
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    # --- statistik ---
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "in_use": len(self._busy),
+                "idle": len(self._idle),
+                "waiting": self.waiting,
+                "max_waiting": self.max_waiting,
+                "checkouts": self.checkouts,
+                "exhausted": self.exhausted,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds, 6),
+                "wait_seconds_max": round(self.max_wait_seconds, 6),
+                "hold_seconds_total": round(self.hold_seconds, 6),
+                "hold_seconds_max": round(self.max_hold_seconds, 6),
+                "created": self.created,
+                "recycled": self.recycled,
+                "broken": self.broken,
+            }
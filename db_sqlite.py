@@ -0,0 +1,344 @@
+"""
+Backend SQLite untuk koneksi.py (DB_BACKEND=sqlite): pengganti MySQL tanpa server,
+untuk uji beban, benchmark dan CI.
+
+Koneksi di sini meniru bagian API mysql-connector yang dipakai aplikasi:
+  - cursor(dictionary=..., buffered=...), execute/executemany dengan placeholder %s,
+    fetchone/fetchall/fetchmany, rowcount, lastrowid, close
+  - INSERT lewat executemany: lastrowid = id baris pertama (seperti INSERT multi-row
+    MySQL, lihat bulk_writer.py)
+  - NOW(), SELECT @@SESSION.auto_increment_increment dan locking read (FOR UPDATE,
+    LOCK IN SHARE MODE, dibuang)
+  - kolom VARCHAR/CHAR dikembalikan sebagai str dan DATETIME sebagai datetime
+  - semua sqlite3.Error dilempar ulang sebagai mysql.connector.Error, sehingga
+    `except Error` di blueprint tetap berlaku
+
+Skema dibuat dari migrations/*.sql (dialek MySQL, diterjemahkan seperlunya) saat
+koneksi pertama dibuka. Pakai file database (bukan :memory:) bila job latar belakang
+dipakai, karena worker job adalah proses terpisah, dan untuk uji beban: database memori
+bersama (mode=memory&cache=shared) memakai lock per tabel yang tidak menunggu
+SQLITE_BUSY_TIMEOUT, sehingga penulisan paralel langsung gagal.
+"""
+import datetime
+import glob
+import os
+import re
+import sqlite3
+import threading
+
+from mysql.connector import errors
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', 30))   # detik menunggu lock tulis
+
+# Profil link budget dasar (id=1) yang dibutuhkan /link_budget/calculate.
+# Nilai contoh; di MySQL produksi baris ini sudah ada.
+SEED_DEFAULT_LINK = dict(dir_ground=40.0, tx_sat=10.0, suhu=290.0, bw=36e6, loss=2.0, ci_down=15.0)
+
+sqlite3.register_converter("VARCHAR", lambda value: value.decode('utf-8'))
+sqlite3.register_converter("CHAR", lambda value: value.decode('utf-8'))
+sqlite3.register_converter("DATETIME", lambda value: datetime.datetime.fromisoformat(value.decode()))
+
+
+def _wrap_error(err):
+    """sqlite3.Error -> kelas error mysql.connector yang setara."""
+    if isinstance(err, sqlite3.IntegrityError):
+        cls = errors.IntegrityError
+    elif isinstance(err, sqlite3.OperationalError):
+        cls = errors.OperationalError
+    elif isinstance(err, sqlite3.ProgrammingError):
+        cls = errors.ProgrammingError
+    else:
+        cls = errors.DatabaseError
+    return cls(msg=f"sqlite: {err}")
+
+
+# --- Terjemahan SQL ---
+_QUERY_REWRITES = (
+    (re.compile(r"\bNOW\(\)", re.I), "datetime('now', 'localtime')"),
+    (re.compile(r"@@(SESSION\.)?auto_increment_increment", re.I), "1"),
+    # Locking read tidak ada di SQLite (penulis tunggal, transaksi IMMEDIATE)
+    (re.compile(r"\s+(LOCK\s+IN\s+SHARE\s+MODE|FOR\s+(UPDATE|SHARE))\b", re.I), ""),
+    (re.compile(r"%\((\w+)\)s"), r":\1"),
+    (re.compile(r"%s"), "?"),
+    (re.compile(r"%%"), "%"),
+)
+_INSERT = re.compile(r"^\s*INSERT\b", re.I)
+_translated = {}
+
+
+def translate(sql):
+    """Query dialek MySQL (paramstyle format) -> SQLite (qmark). Hasil di-cache per teks."""
+    result = _translated.get(sql)
+    if result is None:
+        result = sql
+        for pattern, replacement in _QUERY_REWRITES:
+            result = pattern.sub(replacement, result)
+        _translated[sql] = result
+    return result
+
+
+_CREATE_TABLE = re.compile(r"^\s*CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?(\w+)\s*\((.*)\)\s*$", re.I | re.S)
+_INDEX_ITEM = re.compile(r"^(UNIQUE\s+)?KEY\s+(\w+)\s*\(([^)]*)\)$", re.I)
+_FOREIGN_KEY = re.compile(r"FOREIGN\s+KEY\s*\((\w+)\)", re.I)
+_CREATE_INDEX = re.compile(
+    r"^\s*CREATE\s+(UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s+ON\s+(\w+)\s*\(([^)]*)\)\s*$", re.I
+)
+
+
+def _split_items(body):
+    """Pisahkan isi CREATE TABLE (...) pada koma di tingkat teratas."""
+    items, depth, start = [], 0, 0
+    for i, ch in enumerate(body):
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            items.append(body[start:i].strip())
+            start = i + 1
+    items.append(body[start:].strip())
+    return [item for item in items if item]
+
+
+def is_ddl(statement):
+    return any(pattern.match(statement) for pattern in (_CREATE_TABLE, _CREATE_INDEX))
+
+
+def translate_ddl(statement):
+    """
+    DDL dialek MySQL -> daftar statement SQLite yang idempoten:
+      - CREATE TABLE: AUTO_INCREMENT menjadi INTEGER PRIMARY KEY AUTOINCREMENT, KEY/UNIQUE
+        KEY dan kolom FOREIGN KEY menjadi CREATE INDEX terpisah (MySQL mengindeks kolom FK
+        otomatis, SQLite tidak)
+      - CREATE [UNIQUE] INDEX .. ON tabel: diberi IF NOT EXISTS (MySQL tidak
+        mendukungnya untuk indeks)
+    """
+    index = _CREATE_INDEX.match(statement)
+    if index:
+        unique = "UNIQUE " if index.group(1) else ""
+        return [f"CREATE {unique}INDEX IF NOT EXISTS {index.group(2)} ON {index.group(3)} ({index.group(4)})"]
+    match = _CREATE_TABLE.match(statement)
+    if not match:
+        return [statement]
+    table = match.group(2)
+    columns, indexes = [], []
+    for item in _split_items(match.group(3)):
+        index = _INDEX_ITEM.match(item)
+        if index:
+            unique = "UNIQUE " if index.group(1) else ""
+            indexes.append(f"CREATE {unique}INDEX IF NOT EXISTS {index.group(2)} ON {table} ({index.group(3)})")
+            continue
+        item = re.sub(r"\bINT\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b", "INTEGER PRIMARY KEY AUTOINCREMENT", item, flags=re.I)
+        fk = _FOREIGN_KEY.search(item)
+        if fk:
+            indexes.append(f"CREATE INDEX IF NOT EXISTS ix_{table}_{fk.group(1)} ON {table} ({fk.group(1)})")
+        columns.append(item)
+    create = f"CREATE TABLE IF NOT EXISTS {table} (\n    " + ",\n    ".join(columns) + "\n)"
+    return [create] + indexes
+
+
+def split_script(script):
+    """Statement-statement dalam file .sql (komentar baris '--' dibuang)."""
+    lines = [line for line in script.splitlines() if not line.strip().startswith('--')]
+    return [statement for statement in "\n".join(lines).split(';') if statement.strip()]
+
+
+# --- Koneksi & cursor ---
+class Cursor:
+    def __init__(self, conn, dictionary=False, buffered=True):
+        self._conn = conn
+        self._cur = conn._raw.cursor()
+        self._dictionary = dictionary
+        self._buffered = buffered
+        self._rows = None
+        self._pos = 0
+        self.rowcount = -1
+        self.lastrowid = None
+        self.description = None
+
+    def _make_row(self, row):
+        if self._dictionary:
+            return dict(zip(self.column_names, row))
+        return row
+
+    @property
+    def column_names(self):
+        return tuple(col[0] for col in self.description or ())
+
+    def _after(self):
+        self.description = self._cur.description
+        self._rows = None
+        self._pos = 0
+        if self.description is not None:
+            # SELECT: buffered -> semua baris diambil sekarang dan rowcount = jumlah baris
+            if self._buffered:
+                self._rows = self._cur.fetchall()
+                self.rowcount = len(self._rows)
+            else:
+                self.rowcount = -1
+        else:
+            self.rowcount = self._cur.rowcount
+
+    def execute(self, operation, params=()):
+        if isinstance(operation, (bytes, bytearray)):
+            operation = operation.decode('utf-8')
+        try:
+            with self._conn._lock:
+                if is_ddl(operation):
+                    # DDL dari migrations/*.sql (mis. migrate_patterns.apply_schema)
+                    for statement in translate_ddl(operation):
+                        self._cur.execute(statement)
+                else:
+                    self._cur.execute(translate(operation), params or ())
+                if _INSERT.match(operation):
+                    self.lastrowid = self._cur.lastrowid
+                self._after()
+        except sqlite3.Error as err:
+            raise _wrap_error(err) from err
+        return None
+
+    def executemany(self, operation, seq_params):
+        if isinstance(operation, (bytes, bytearray)):
+            operation = operation.decode('utf-8')
+        seq_params = list(seq_params)
+        if not seq_params:
+            return None
+        try:
+            with self._conn._lock:
+                self._cur.executemany(translate(operation), seq_params)
+                self._after()
+                if _INSERT.match(operation) and self.rowcount > 0:
+                    # Seperti INSERT multi-row MySQL: id baris pertama. Baris-baris ini ditulis
+                    # dalam satu transaksi yang memegang lock tulis, jadi id-nya berurutan.
+                    last = self._conn._raw.execute("SELECT last_insert_rowid()").fetchone()[0]
+                    self.lastrowid = last - self.rowcount + 1
+        except sqlite3.Error as err:
+            raise _wrap_error(err) from err
+        return None
+
+    def _take(self, size=None):
+        """Baris berikutnya dari buffer (buffered) atau langsung dari sqlite3."""
+        if self._rows is None:
+            return self._cur.fetchall() if size is None else self._cur.fetchmany(size)
+        stop = len(self._rows) if size is None else self._pos + size
+        rows = self._rows[self._pos:stop]
+        self._pos += len(rows)
+        return rows
+
+    def fetchone(self):
+        rows = self._take(1)
+        return self._make_row(rows[0]) if rows else None
+
+    def fetchmany(self, size=1):
+        return [self._make_row(row) for row in self._take(size)]
+
+    def fetchall(self):
+        rows = self._take()
+        if self._dictionary:
+            names = self.column_names
+            return [dict(zip(names, row)) for row in rows]
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._cur.close()
+        self._rows = None
+
+
+class Connection:
+    """Satu koneksi sqlite3 dengan antarmuka mirip MySQLConnection."""
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._lock = threading.RLock()
+        self.autocommit = False
+
+    def cursor(self, dictionary=False, buffered=True, **kwargs):
+        return Cursor(self, dictionary=dictionary, buffered=buffered)
+
+    def commit(self):
+        try:
+            with self._lock:
+                self._raw.commit()
+        except sqlite3.Error as err:
+            raise _wrap_error(err) from err
+
+    def rollback(self):
+        try:
+            with self._lock:
+                self._raw.rollback()
+        except sqlite3.Error as err:
+            raise _wrap_error(err) from err
+
+    def ping(self, reconnect=False):
+        try:
+            self._raw.execute("SELECT 1").fetchone()
+        except sqlite3.Error as err:
+            raise _wrap_error(err) from err
+
+    def is_connected(self):
+        try:
+            self.ping()
+            return True
+        except errors.Error:
+            return False
+
+    def close(self):
+        self._raw.close()
+
+
+def ping(conn):
+    conn.ping()
+
+
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+
+def _raw_connect(path):
+    raw = sqlite3.connect(
+        path,
+        timeout=BUSY_TIMEOUT,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        # Transaksi implisit dimulai sebelum DML pertama dengan lock tulis langsung, supaya
+        # dua penulis tidak saling menunggu upgrade lock (deadlock SQLITE_BUSY)
+        isolation_level="IMMEDIATE",
+        check_same_thread=False,
+        uri=path.startswith("file:"),
+    )
+    raw.execute("PRAGMA foreign_keys = ON")
+    if path != ":memory:" and "mode=memory" not in path:
+        raw.execute("PRAGMA journal_mode = WAL")
+        raw.execute("PRAGMA synchronous = NORMAL")
+    return raw
+
+
+def ensure_schema(raw):
+    """Buat semua tabel dari migrations/*.sql (idempoten) dan profil default_link id=1."""
+    for path in sorted(glob.glob(os.path.join(MIGRATIONS_DIR, '*.sql'))):
+        with open(path) as f:
+            for statement in split_script(f.read()):
+                for translated in translate_ddl(statement):
+                    raw.execute(translated)
+    columns = ", ".join(SEED_DEFAULT_LINK)
+    raw.execute(
+        f"INSERT OR IGNORE INTO default_link (id, {columns}) VALUES (1, {', '.join('?' * len(SEED_DEFAULT_LINK))})",
+        tuple(SEED_DEFAULT_LINK.values())
+    )
+    raw.commit()
+
+
+def connect(path):
+    """Buka koneksi ke database SQLite di `path`; skema dibuat saat pertama kali."""
+    try:
+        raw = _raw_connect(path)
+        with _schema_lock:
+            if path not in _schema_ready:
+                ensure_schema(raw)
+                _schema_ready.add(path)
+    except sqlite3.Error as err:
+        raise _wrap_error(err) from err
+    return Connection(raw)
@@ -0,0 +1,46 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+import os
+import query_log
+import koneksi
+import response_cache
+
+# --- Inisialisasi Blueprint ---
+debug_blueprint = Blueprint('debug', __name__)
+
+# Endpoint debug hanya aktif jika DEBUG_ENDPOINTS=1 (fingerprint SQL tidak untuk publik)
+DEBUG_ENDPOINTS = os.getenv('DEBUG_ENDPOINTS', '0').lower() in ('1', 'true', 'yes')
+
+
+@debug_blueprint.before_request
+def _require_enabled():
+    if not DEBUG_ENDPOINTS:
+        return jsonify({"error": "Not found."}), 404
+
+
+# --- Endpoint GET: fingerprint SQL teratas ---
+@debug_blueprint.route("/queries", methods=["GET"])
+@jwt_required()
+def top_queries():
+    """
+    Query: top=N (default 20), sort=total_s|max_s|mean_s|count|rows|slow, reset=1.
+    Statistik milik worker yang menjawab request ini (lihat 'pid').
+    """
+    sort = request.args.get("sort", "total_s")
+    if sort not in query_log.SORT_KEYS:
+        return jsonify({"error": f"'sort' must be one of: {', '.join(query_log.SORT_KEYS)}."}), 400
+    top_n = request.args.get("top", "20")
+    if not top_n.isdigit() or int(top_n) < 1:
+        return jsonify({"error": "'top' must be a positive integer."}), 400
+
+    result = {
+        "pid": os.getpid(),
+        "slow_query_ms": query_log.SLOW_QUERY_MS,
+        "sort": sort,
+        "queries": query_log.top(int(top_n), sort),
+        "pool": koneksi.pool_stats(),
+        "response_cache": response_cache.stats(),
+    }
+    if request.args.get("reset") == "1":
+        query_log.reset()
+    return jsonify(result)
@@ -0,0 +1,267 @@
+"""
+Job latar belakang untuk pekerjaan berat (batch beam, batch link) tanpa broker eksternal.
+
+Setiap job dicatat di tabel `job` (lihat migrations/003_job.sql) lalu dijalankan oleh
+process pool lokal milik worker web yang menerimanya. Proses anak memakai pool koneksi
+sendiri, mengklaim job dengan UPDATE atomik (queued -> running), melaporkan progres ke
+tabel yang sama, lalu menyimpan hasil (JSON) atau pesan error.
+
+Jenis job terdaftar di JOB_KINDS sebagai "modul:fungsi"; fungsi job dipanggil
+sebagai fn(id_akun, params, conn, progress) dan mengembalikan dict yang bisa di-JSON-kan.
+`progress(fraction, message=None)` ditulis lewat koneksi terpisah (auto-commit) sehingga
+terlihat dari luar walaupun transaksi utama job belum di-commit. Backend yang hanya
+mengizinkan satu penulis (SQLite) tidak bisa melakukannya, jadi di sana progres antara
+dilewati dan hanya status awal/akhir yang tercatat.
+
+Job yang prosesnya mati (worker di-restart, proses anak di-kill) tertinggal sebagai
+queued/running; saat pool dibuat, job yang tidak ada kabarnya lebih dari JOB_STALE_AFTER
+detik ditandai failed (`fail_stale_jobs`).
+"""
+import datetime
+import functools
+import importlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from koneksi import get_conn, Error, CONCURRENT_WRITES
+
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+# Batch dengan jumlah titik di atas ini otomatis dijalankan sebagai job (HTTP 202)
+JOB_ASYNC_THRESHOLD = int(os.getenv('JOB_ASYNC_THRESHOLD', 2000))
+# Jeda minimum antar penulisan progres ke database (detik)
+JOB_PROGRESS_INTERVAL = float(os.getenv('JOB_PROGRESS_INTERVAL', 0.5))
+# Job queued/running tanpa update selama ini (detik) dianggap yatim
+JOB_STALE_AFTER = float(os.getenv('JOB_STALE_AFTER', 3600))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+# Jenis job -> "modul:fungsi". Statis (bukan registrasi saat import) karena proses anak
+# di-spawn dari nol dan hanya meng-import modul yang dibutuhkan job-nya.
+JOB_KINDS = {
+    "store_beams": "beam_api:store_beams_job",
+    "calculate_links": "link_budget_api:calculate_links_job",
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class JobFailed(Exception):
+    """Kegagalan yang sudah diketahui (validasi, data tidak ada); `status` = kode HTTP padanannya."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_bool(value, name):
+    """Boolean dari JSON: true/false atau string "true"/"false". ValueError untuk nilai lain."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    raise ValueError(f"'{name}' must be true or false.")
+
+
+def wants_async(data, n_items):
+    """
+    True jika request meminta mode async atau ukurannya melewati JOB_ASYNC_THRESHOLD.
+    JobFailed (400) jika "async" bukan boolean.
+    """
+    flag = data.get("async")
+    if flag is not None:
+        try:
+            return parse_bool(flag, "async")
+        except ValueError as e:
+            raise JobFailed(str(e))
+    return n_items > JOB_ASYNC_THRESHOLD
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            try:
+                fail_stale_jobs()
+            except Error as err:
+                print(f"Database error in fail_stale_jobs: {err}")
+            # spawn: proses anak tidak mewarisi koneksi/lock milik worker web
+            _executor = ProcessPoolExecutor(max_workers=JOB_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return _executor
+
+
+def _discard_executor(broken):
+    """Buang pool yang rusak (proses anak mati) supaya _get_executor membuat yang baru."""
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False)
+
+
+def _dispatch(job_id):
+    """Serahkan job ke pool; pool yang rusak diganti sekali. JobFailed (503) jika tetap gagal."""
+    for _ in range(2):
+        executor = _get_executor()
+        try:
+            future = executor.submit(run_job, job_id)
+        except BrokenProcessPool:
+            _discard_executor(executor)
+            continue
+        future.add_done_callback(functools.partial(_on_done, job_id))
+        return
+    _fail(job_id, "Job worker pool is unavailable.")
+    raise JobFailed("Background workers are unavailable, try again later.", 503)
+
+
+def _on_done(job_id, future):
+    # run_job menangkap semua exception sendiri; exception di sini berarti proses anak
+    # mati (BrokenProcessPool) sebelum job selesai
+    if future.cancelled() or future.exception() is None:
+        return
+    try:
+        _fail(job_id, f"Job worker stopped unexpectedly: {future.exception()!r}")
+    except Error as err:
+        print(f"Database error in job callback: {err}")
+
+
+def submit(id_akun, kind, params):
+    """Catat job baru sebagai 'queued' lalu serahkan ke process pool. Mengembalikan id job."""
+    if kind not in JOB_KINDS:
+        raise JobFailed(f"Unknown job kind '{kind}'. Available: {', '.join(sorted(JOB_KINDS))}.")
+    job_id = uuid.uuid4().hex
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO job (id, id_akun, kind, status, progress, params, created_at) "
+            "VALUES (%s, %s, %s, %s, 0, %s, NOW())",
+            (job_id, int(id_akun), kind, QUEUED, json.dumps(params))
+        )
+        conn.commit()
+        cur.close()
+    _dispatch(job_id)
+    return job_id
+
+
+def get_job(job_id, id_akun, with_result=False):
+    """Baris job milik akun ini (dict), atau None jika tidak ada / bukan miliknya."""
+    columns = "id, kind, status, progress, message, error, created_at, started_at, updated_at, finished_at"
+    if with_result:
+        columns += ", result"
+    with get_conn() as conn:
+        cur = conn.cursor(dictionary=True)
+        cur.execute(f"SELECT {columns} FROM job WHERE id = %s AND id_akun = %s", (job_id, int(id_akun)))
+        job = cur.fetchone()
+        cur.close()
+    if job and with_result and job.get("result") is not None:
+        job["result"] = json.loads(job["result"])
+    return job
+
+
+def _update(job_id, sql, args):
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(sql, (*args, job_id))
+        conn.commit()
+        claimed = cur.rowcount
+        cur.close()
+    return claimed
+
+
+class _Progress:
+    """Callback progres yang dibatasi frekuensinya."""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._last = 0.0
+
+    def __call__(self, fraction, message=None):
+        if not CONCURRENT_WRITES:
+            return
+        now = time.monotonic()
+        if now - self._last < JOB_PROGRESS_INTERVAL and fraction < 1:
+            return
+        self._last = now
+        _update(
+            self.job_id,
+            "UPDATE job SET progress = %s, message = COALESCE(%s, message), updated_at = NOW() WHERE id = %s",
+            (round(min(max(float(fraction), 0.0), 1.0), 4), message)
+        )
+
+
+def run_job(job_id):
+    """Titik masuk di proses anak: klaim job, jalankan, simpan hasil atau error."""
+    try:
+        with get_conn() as conn:
+            cur = conn.cursor(dictionary=True)
+            cur.execute("SELECT id_akun, kind, params FROM job WHERE id = %s", (job_id,))
+            job = cur.fetchone()
+            cur.close()
+        if job is None:
+            return
+        claimed = _update(
+            job_id,
+            "UPDATE job SET status = %s, started_at = NOW(), updated_at = NOW() WHERE status = %s AND id = %s",
+            (RUNNING, QUEUED)
+        )
+        if not claimed:
+            return  # sudah diambil proses lain
+
+        module_name, func_name = JOB_KINDS[job["kind"]].split(":")
+        func = getattr(importlib.import_module(module_name), func_name)
+        with get_conn() as conn:
+            result = func(str(job["id_akun"]), json.loads(job["params"]), conn, _Progress(job_id))
+        _update(
+            job_id,
+            "UPDATE job SET status = %s, progress = 1, result = %s, finished_at = NOW(), updated_at = NOW() WHERE id = %s",
+            (DONE, json.dumps(result))
+        )
+    except (JobFailed, Error, ValueError) as e:
+        _fail(job_id, f"Operation failed: {e}")
+    except Exception as e:
+        _fail(job_id, f"An unexpected error occurred: {e}")
+
+
+def _fail(job_id, message):
+    # Hanya job yang belum selesai; hasil yang sudah tersimpan tidak ditimpa
+    _update(
+        job_id,
+        "UPDATE job SET status = %s, error = %s, finished_at = NOW(), updated_at = NOW() "
+        "WHERE status IN (%s, %s) AND id = %s",
+        (FAILED, message, QUEUED, RUNNING)
+    )
+
+
+def _as_datetime(value):
+    return value if isinstance(value, datetime.datetime) else datetime.datetime.fromisoformat(str(value))
+
+
+def fail_stale_jobs():
+    """
+    Tandai failed job queued/running yang tidak diperbarui selama JOB_STALE_AFTER detik
+    (prosesnya sudah mati). Waktu dibandingkan dengan NOW() milik database. Mengembalikan jumlahnya.
+    """
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT NOW()")
+        now = _as_datetime(cur.fetchone()[0])
+        cur.execute("SELECT id, created_at, updated_at FROM job WHERE status IN (%s, %s)", (QUEUED, RUNNING))
+        stale = [
+            job_id for job_id, created_at, updated_at in cur.fetchall()
+            if (now - _as_datetime(updated_at or created_at)).total_seconds() > JOB_STALE_AFTER
+        ]
+        for job_id in stale:
+            cur.execute(
+                "UPDATE job SET status = %s, error = %s, finished_at = NOW(), updated_at = NOW() "
+                "WHERE status IN (%s, %s) AND id = %s",
+                (FAILED, "Job was interrupted (worker restarted); submit it again.", QUEUED, RUNNING, job_id)
+            )
+        conn.commit()
+        cur.close()
+    return len(stale)
@@ -0,0 +1,74 @@
+from flask import Blueprint, request, jsonify, url_for
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from koneksi import Error
+import jobs
+
+# --- Inisialisasi Blueprint ---
+jobs_blueprint = Blueprint('jobs', __name__)
+
+
+def job_accepted(job_id):
+    """Respons 202 standar untuk job yang baru diterima."""
+    status_url = url_for('jobs.job_status', job_id=job_id)
+    return jsonify({
+        "message": "Job accepted. Poll 'status_url' for progress.",
+        "job_id": job_id,
+        "status": jobs.QUEUED,
+        "status_url": status_url,
+        "result_url": url_for('jobs.job_result', job_id=job_id),
+    }), 202, {"Location": status_url}
+
+
+# --- Endpoint POST: submit job ---
+@jobs_blueprint.route("/submit", methods=["POST"])
+@jwt_required()
+def submit_job():
+    """Body: {"kind": "store_beams" | "calculate_links", "params": {...}} (params = body endpoint sinkronnya)."""
+    id_akun_login = get_jwt_identity()
+    data = request.get_json()
+    if not data or "kind" not in data or not isinstance(data.get("params"), dict):
+        return jsonify({"error": "Request body must contain 'kind' and a 'params' object."}), 400
+
+    try:
+        job_id = jobs.submit(id_akun_login, data["kind"], data["params"])
+        return job_accepted(job_id)
+    except jobs.JobFailed as e:
+        return jsonify({"error": str(e)}), e.status
+    except Error as err:
+        return jsonify({"error": f"Database error: {err}"}), 500
+
+
+# --- Endpoint GET: status & progres job ---
+@jobs_blueprint.route("/<job_id>", methods=["GET"])
+@jwt_required()
+def job_status(job_id):
+    id_akun_login = get_jwt_identity()
+    try:
+        job = jobs.get_job(job_id, id_akun_login)
+        if not job:
+            return jsonify({"error": "Job not found."}), 404
+        return jsonify(job)
+    except Error as err:
+        return jsonify({"error": f"Database error: {err}"}), 500
+
+
+# --- Endpoint GET: hasil job ---
+@jobs_blueprint.route("/<job_id>/result", methods=["GET"])
+@jwt_required()
+def job_result(job_id):
+    """200 dengan hasil job bila selesai; 409 jika masih berjalan atau gagal."""
+    id_akun_login = get_jwt_identity()
+    try:
+        job = jobs.get_job(job_id, id_akun_login, with_result=True)
+        if not job:
+            return jsonify({"error": "Job not found."}), 404
+        if job["status"] != jobs.DONE:
+            return jsonify({
+                "error": "Job has not completed successfully.",
+                "status": job["status"],
+                "progress": job["progress"],
+                "job_error": job["error"],
+            }), 409
+        return jsonify(job["result"])
+    except Error as err:
+        return jsonify({"error": f"Database error: {err}"}), 500
@@ -0,0 +1,63 @@
+"""
+JSON provider Flask berbasis orjson (jsonify, request.get_json, app.json).
+
+orjson men-serialize array/skalar NumPy langsung dari buffernya (OPT_SERIALIZE_NUMPY),
+jadi handler boleh mengembalikan ndarray tanpa loop float() atau .tolist(). Array yang
+tidak C-contiguous atau dtype yang tidak didukung jatuh ke `default` (.tolist()).
+
+Format dijaga sama dengan provider bawaan Flask: key diurutkan (sort_keys), datetime
+sebagai HTTP date, Decimal/UUID/dataclass lewat default Flask. Bedanya: NaN/Infinity
+menjadi null (provider bawaan menulis NaN yang bukan JSON valid).
+
+orjson opsional: tanpa paket itu dipakai provider bawaan Flask plus dukungan NumPy
+lewat `default`, sehingga handler tetap bisa mengembalikan ndarray.
+"""
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return DefaultJSONProvider.default(obj)
+
+
+class NumpyJSONProvider(DefaultJSONProvider):
+    """Provider bawaan Flask yang juga mengerti tipe NumPy (dipakai bila orjson tidak ada)."""
+
+    default = staticmethod(_default)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    default = staticmethod(_default)
+
+    def _options(self, indent=False):
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._options(kwargs.get("indent"))).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_app(app):
+    app.json = OrjsonProvider(app) if orjson is not None else NumpyJSONProvider(app)
@@ -1,35 +1,40 @@
 import mysql.connector
-from mysql.connector import pooling, Error
+from mysql.connector import Error
 from contextlib import contextmanager
+import time
+from db_pool import BlockingPool, PoolTimeout, mysql_ping
+import query_log
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-HOST        = os.getenv('DB_HOST')
-PORT        = int(os.getenv('DB_PORT', 3306))
-DATABASE    = os.getenv('DB_DATABASE')
-USER        = os.getenv('DB_USER')
-PASSWORD    = os.getenv('DB_PASSWORD')
+# Backend database: "mysql" (default, server dengan SSL) atau "sqlite" (file lokal,
+# tanpa server -- untuk uji beban, benchmark dan CI; lihat db_sqlite.py)
+DB_BACKEND  = os.getenv('DB_BACKEND', 'mysql').lower()
 POOL_SIZE   = int(os.getenv('DB_POOL_SIZE', 5))
-SSL_FILENAME = os.getenv('SSL_CERT_FILENAME')
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))         # detik menunggu koneksi bebas
+POOL_PING_AFTER = float(os.getenv('DB_POOL_PING_AFTER', 30))   # cek koneksi yang menganggur selama ini
+POOL_RECYCLE = float(os.getenv('DB_POOL_RECYCLE', 3600))       # umur maksimum satu koneksi
 
-if not all([HOST, DATABASE, USER, PASSWORD, SSL_FILENAME]):
-    raise ValueError("Satu atau lebih environment variables database (HOST, DATABASE, USER, PASSWORD, SSL_FILENAME) tidak diatur.")
+current_dir = os.path.dirname(os.path.abspath(__file__))
 
-try:
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    SSL_CERT_PATH = os.path.join(current_dir, SSL_FILENAME)
-except NameError:
-    SSL_CERT_PATH = SSL_FILENAME # Fallback
+if DB_BACKEND == 'mysql':
+    HOST        = os.getenv('DB_HOST')
+    PORT        = int(os.getenv('DB_PORT', 3306))
+    DATABASE    = os.getenv('DB_DATABASE')
+    USER        = os.getenv('DB_USER')
+    PASSWORD    = os.getenv('DB_PASSWORD')
+    SSL_FILENAME = os.getenv('SSL_CERT_FILENAME')
 
-if not os.path.exists(SSL_CERT_PATH):
-    raise FileNotFoundError(f"File sertifikat SSL tidak ditemukan di path: {SSL_CERT_PATH}")
+    if not all([HOST, DATABASE, USER, PASSWORD, SSL_FILENAME]):
+        raise ValueError("Satu atau lebih environment variables database (HOST, DATABASE, USER, PASSWORD, SSL_FILENAME) tidak diatur.")
 
-try:
-    connection_pool = pooling.MySQLConnectionPool(
-        pool_name="mypool",
-        pool_size=POOL_SIZE,
+    SSL_CERT_PATH = os.path.join(current_dir, SSL_FILENAME)
+    if not os.path.exists(SSL_CERT_PATH):
+        raise FileNotFoundError(f"File sertifikat SSL tidak ditemukan di path: {SSL_CERT_PATH}")
+
+    DB_CONFIG = dict(
         host=HOST,
         port=PORT,
         database=DATABASE,
@@ -40,25 +45,150 @@ try:
         ssl_verify_cert=False,
         tls_versions=['TLSv1.2']
     )
-    print("Secure connection pool created successfully from .env configuration.")
+
+    def _connect():
+        return mysql.connector.connect(**DB_CONFIG)
+
+    _ping = mysql_ping
+    CONCURRENT_WRITES = True
+    _description = "Secure connection pool created successfully from .env configuration."
+
+elif DB_BACKEND == 'sqlite':
+    import db_sqlite
+
+    # Path file atau URI SQLite (mis. "file:tabe?mode=memory&cache=shared")
+    SQLITE_PATH = os.getenv('SQLITE_PATH', os.path.join(current_dir, 'tabe.sqlite3'))
+
+    def _connect():
+        return db_sqlite.connect(SQLITE_PATH)
+
+    _ping = db_sqlite.ping
+    # Satu penulis dalam satu waktu: transaksi lain yang menulis menunggu sampai commit
+    CONCURRENT_WRITES = False
+    _description = f"SQLite connection pool created at {SQLITE_PATH}."
+
+else:
+    raise ValueError(f"DB_BACKEND tidak dikenal: {DB_BACKEND!r} (pilihan: mysql, sqlite).")
+
+
+try:
+    connection_pool = BlockingPool(
+        _connect,
+        size=POOL_SIZE,
+        timeout=POOL_TIMEOUT,
+        ping=_ping,
+        ping_after=POOL_PING_AFTER,
+        recycle=POOL_RECYCLE
+    )
+    # Buka satu koneksi di awal supaya konfigurasi yang salah langsung ketahuan
+    connection_pool.release(connection_pool.get())
+    print(_description)
 
 except Error as err:
+    # Dilempar ulang (bukan exit) supaya pemanggil -- gunicorn, skrip, tes -- bisa menanganinya
     print(f"Error creating connection pool: {err}")
-    exit(1)
+    raise
+
+
+# Pendengar query: fn(sql, seconds, rowcount), dipanggil setelah setiap execute/executemany
+_query_listeners = []
+
+
+def add_query_listener(listener):
+    """Daftarkan pendengar query (mis. metrics, slow-query log)."""
+    if listener not in _query_listeners:
+        _query_listeners.append(listener)
+
+
+class TimedCursor:
+    """Pembungkus cursor yang mengukur waktu execute/executemany dan memberi tahu pendengar."""
+
+    def __init__(self, cur):
+        self._cur = cur
+
+    def _timed(self, method, operation, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(operation, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            for listener in _query_listeners:
+                listener(operation, elapsed, self._cur.rowcount)
+
+    def execute(self, operation, *args, **kwargs):
+        return self._timed(self._cur.execute, operation, *args, **kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        return self._timed(self._cur.executemany, operation, *args, **kwargs)
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
+class TimedConnection:
+    """Pembungkus koneksi pool yang membagikan TimedCursor; atribut lain diteruskan apa adanya."""
+
+    def __init__(self, conn):
+        object.__setattr__(self, '_conn', conn)
+
+    def cursor(self, *args, **kwargs):
+        # Buffered secara default: rowcount SELECT langsung tersedia untuk log query, dan
+        # hasil yang tidak dibaca habis tidak mengunci koneksi yang dipakai bersama
+        kwargs.setdefault('buffered', True)
+        return TimedCursor(self._conn.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+
+# Statistik per fingerprint & slow-query log (lihat query_log.py)
+add_query_listener(query_log.record)
 
 
 @contextmanager
 def get_conn():
-    """A context manager to handle MySQL connection from the pool."""
+    """A context manager to handle a database connection from the pool."""
     conn = None
+    broken = False
     try:
-        conn = connection_pool.get_connection()
+        conn = connection_pool.get()
         conn.autocommit = False 
-        yield conn
+        yield TimedConnection(conn)
+    except PoolTimeout as e:
+        print(f"Connection pool exhausted: {e} {connection_pool.stats()}")
+        raise e
     except Error as e:
         if conn:
-            conn.rollback()
+            try:
+                conn.rollback()
+            except Error:
+                broken = True
         raise e
     finally:
         if conn:
-            conn.close()
\ No newline at end of file
+            connection_pool.release(conn, discard=broken)
+
+
+def pool_stats():
+    """Statistik pool: in_use/idle, antrean, waktu tunggu & pinjam, koneksi yang didaur ulang."""
+    return connection_pool.stats()
+
+
+@contextmanager
+def use_conn(conn=None):
+    """
+    Pakai koneksi yang sudah dipegang pemanggil (request-scoped) bila ada; kalau tidak,
+    pinjam satu dari pool. Helper query menerima argumen `conn=None` dan membungkus
+    query-nya dengan ini supaya satu request cukup memakai satu koneksi pool.
+    """
+    if conn is not None:
+        yield conn
+    else:
+        with get_conn() as own_conn:
+            yield own_conn
@@ -1,9 +1,15 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from koneksi import get_conn, Error
+from koneksi import get_conn, use_conn, Error
+import pattern_cache
+import data_version
+import array_transport
+import beam_index
+import bulk_writer
+import jobs
+from jobs_api import job_accepted
 import numpy as np
 import math
-from scipy.interpolate import interp1d
 
 link_budget_bp = Blueprint('link_budget', __name__)
 
@@ -17,84 +23,19 @@ def haversine(lat1, lon1, lat2, lon2):
 
 # --- Fungsi Helper & Kalkulasi ---
 
-def fetch_satellite_by_account(id_akun):
+def fetch_satellite_by_account(id_akun, conn=None):
     try:
-        with get_conn() as conn:
+        with use_conn(conn) as conn:
             cur = conn.cursor(dictionary=True)
-            cur.execute("SELECT lat, lon, alt FROM satelite WHERE id_akun = %s LIMIT 1", (id_akun,))
+            cur.execute("SELECT lat, lon, alt FROM satelite WHERE id_akun = %s ORDER BY id LIMIT 1", (id_akun,))
             return cur.fetchone()
     except Error as e:
         print(f"Database error in fetch_satellite_by_account: {e}")
         return None
 
-def fetch_antenna_pattern(ant_id):
-    # --- REVISI 1: Menambahkan validasi untuk mencegah error interpolasi ---
-    try:
-        with get_conn() as conn:
-            cur = conn.cursor(dictionary=True)
-            cur.execute("SELECT directivity, eff, frekuensi FROM antena WHERE id = %s", (ant_id,))
-            antenna_data = cur.fetchone()
-            if not antenna_data: return None, None, None, None, None
-
-            cur.execute("SELECT deg FROM theta WHERE id_antena = %s ORDER BY id", (ant_id,))
-            theta_axis = [row['deg'] for row in cur.fetchall()]
-            
-            cur.execute("SELECT deg FROM pattern WHERE id_antena = %s ORDER BY id", (ant_id,))
-            gain_axis = [row['deg'] for row in cur.fetchall()]
-
-            # Validasi krusial untuk memastikan panjang array sama
-            if len(theta_axis) != len(gain_axis):
-                raise ValueError(
-                    f"Data mismatch for antenna ID {ant_id}. "
-                    f"Found {len(theta_axis)} theta points but {len(gain_axis)} pattern points. "
-                    "Check database integrity."
-                )
-
-            if not theta_axis:
-                raise ValueError(f"No pattern data found for antenna ID {ant_id}")
-
-            return (
-                antenna_data['directivity'], 
-                antenna_data['eff'], 
-                antenna_data['frekuensi'], 
-                np.array(theta_axis), 
-                np.array(gain_axis)
-            )
-    except Error as e:
-        print(f"Database error in fetch_antenna_pattern: {e}")
-        return None, None, None, None, None
-
-def fetch_beam_by_id(beam_id):
-    try:
-        with get_conn() as conn:
-            cur = conn.cursor(dictionary=True)
-            cur.execute("SELECT id, clat, clon, id_antena FROM beam WHERE id = %s", (beam_id,))
-            return cur.fetchone()
-    except Error as e:
-        print(f"Database error in fetch_beam_by_id: {e}")
-        return None
-
-def fetch_all_beams_by_account(id_akun):
-    # Dibuat lebih spesifik untuk mengambil beam milik akun yang login
-    try:
-        with get_conn() as conn:
-            cur = conn.cursor(dictionary=True)
-            sql = """
-                SELECT b.id, b.clat, b.clon, b.id_antena
-                FROM beam AS b
-                JOIN antena AS a ON b.id_antena = a.id
-                JOIN satelite AS s ON a.id_satelite = s.id
-                WHERE s.id_akun = %s
-            """
-            cur.execute(sql, (id_akun,))
-            return cur.fetchall()
-    except Error as e:
-        print(f"Database error in fetch_all_beams_by_account: {e}")
-        return []
-
-def fetch_link_budget_defaults(profile_id=1):
+def fetch_link_budget_defaults(profile_id=1, conn=None):
     try:
-        with get_conn() as conn:
+        with use_conn(conn) as conn:
             cur = conn.cursor(dictionary=True)
             cur.execute("SELECT * FROM default_link WHERE id = %s", (profile_id,))
             db_row = cur.fetchone()
@@ -110,72 +51,131 @@ def fetch_link_budget_defaults(profile_id=1):
 
 EARTH_R_KM = 6371.0
 def geodetic_to_ecef(lat, lon, alt):
+    # Hasil berbentuk (..., 3) sehingga lat/lon/alt boleh berupa array
     lat, lon = map(np.deg2rad, [lat, lon])
-    r = EARTH_R_KM + alt
-    return np.array([r * np.cos(lat) * np.cos(lon), r * np.cos(lat) * np.sin(lon), r * np.sin(lat)])
+    r = EARTH_R_KM + np.asarray(alt, dtype=float)
+    return np.stack(np.broadcast_arrays(r * np.cos(lat) * np.cos(lon), r * np.cos(lat) * np.sin(lon), r * np.sin(lat)), axis=-1)
 
 def off_axis(sat_lat, sat_lon, sat_alt, tgt_lat, tgt_lon, obs_lat, obs_lon):
+    # Semua argumen boleh berupa skalar atau array yang bisa di-broadcast.
+    # Input skalar menghasilkan (float, float) seperti sebelumnya.
     sat_xyz = geodetic_to_ecef(sat_lat, sat_lon, sat_alt)
     tgt_xyz = geodetic_to_ecef(tgt_lat, tgt_lon, 0)
     obs_xyz = geodetic_to_ecef(obs_lat, obs_lon, 0)
     v_bt = tgt_xyz - sat_xyz
     v_obs = obs_xyz - sat_xyz
-    distance_km = np.linalg.norm(v_obs)
-    cos_th = np.dot(v_obs, v_bt) / (np.linalg.norm(v_bt) * distance_km)
+    distance_km = np.linalg.norm(v_obs, axis=-1)
+    cos_th = np.sum(v_obs * v_bt, axis=-1) / (np.linalg.norm(v_bt, axis=-1) * distance_km)
     cos_th = np.clip(cos_th, -1.0, 1.0)
-    angle_deg = math.degrees(math.acos(cos_th))
+    angle_deg = np.degrees(np.arccos(cos_th))
+    if np.ndim(angle_deg) == 0:
+        return float(angle_deg), float(distance_km)
     return angle_deg, distance_km
 
 def gain_from_pattern(theta_deg, axis_theta, axis_gain):
-    # Pastikan data diurutkan berdasarkan sumbu X (axis_theta)
-    sorted_indices = np.argsort(axis_theta)
-    axis_theta_sorted = axis_theta[sorted_indices]
-    axis_gain_sorted = axis_gain[sorted_indices]
-    
-    # Hapus duplikat untuk stabilitas interpolasi
-    unique_thetas, unique_indices = np.unique(axis_theta_sorted, return_index=True)
-    unique_gains = axis_gain_sorted[unique_indices]
+    # Data diurutkan menurut theta & duplikat dibuang di dalam build_forward_interpolator
+    f = pattern_cache.build_forward_interpolator(axis_theta, axis_gain)
 
-    if len(unique_thetas) < 2:
+    if f is None:
         # Jika tidak cukup titik unik, kembalikan nilai gain pertama atau nilai default
-        return unique_gains[0] if len(unique_gains) > 0 else -99.0
+        return axis_gain[0] if len(axis_gain) > 0 else -99.0
 
-    f = interp1d(unique_thetas, unique_gains, kind='linear', bounds_error=False, fill_value="extrapolate")
     return float(f(theta_deg))
 
+LINK_BUDGET_INPUTS = (
+    'directivity_satelit_tx_dBi', 'dir_ground', 'frekuensi_GHz', 'jarak_km',
+    'efisiensi_antena', 'tx_sat', 'suhu', 'bw', 'loss', 'ci_down'
+)
+KONSTANTA_BOLTZMANN_K_DB = -228.6
+
+EVALUASI_LABELS = np.array([
+    "Sangat Buruk (Derau/Interferensi > Sinyal)",
+    "Buruk (Membutuhkan modulasi sangat robust)",
+    "Batas Minimum (Cukup untuk modulasi standar)",
+    "Baik",
+])
+
+def evaluasi_cinr(cinr_dB):
+    """Kelas evaluasi untuk setiap nilai CINR (ambang batas: < 0, < 6, < 10, sisanya "Baik")."""
+    return EVALUASI_LABELS[np.searchsorted([0, 6, 10], cinr_dB, side='right')]
+
+def calculate_link_budget_array(params):
+    """
+    Link budget downlink dalam bentuk array. Setiap nilai di `params` (lihat
+    LINK_BUDGET_INPUTS) boleh berupa skalar atau array NumPy; semuanya di-broadcast
+    sehingga sweep atau grid cukup satu ekspresi. Tidak ada pembulatan.
+
+    Mengembalikan dict berisi array dengan bentuk hasil broadcast: cinr_dB, evaluasi,
+    c_per_i_downlink_db, eirp_downlink_dBW, free_space_loss_dB,
+    g_per_t_stasiun_bumi_dBK dan c_per_n_downlink_dB.
+    """
+    p = {key: np.asarray(params[key], dtype=float) for key in LINK_BUDGET_INPUTS}
+    eff_dB = 10 * np.log10(p['efisiensi_antena'])
+    gain_satelit_tx_dBi = p['directivity_satelit_tx_dBi'] + eff_dB
+    gain_stasiun_bumi_rx_dBi = p['dir_ground'] + eff_dB
+    frekuensi_MHz = p['frekuensi_GHz'] * 1000
+    fsl_dB = 32.44 + 20 * np.log10(p['jarak_km']) + 20 * np.log10(frekuensi_MHz)
+    eirp_downlink_dBW = p['tx_sat'] + gain_satelit_tx_dBi
+    g_per_t_stasiun_bumi_dBK = gain_stasiun_bumi_rx_dBi - 10 * np.log10(p['suhu'])
+    c_to_n_downlink_dB = eirp_downlink_dBW - fsl_dB - p['loss'] + g_per_t_stasiun_bumi_dBK - KONSTANTA_BOLTZMANN_K_DB - 10 * np.log10(p['bw'])
+    c_to_n_downlink_linear = 10**(c_to_n_downlink_dB / 10)
+    c_to_i_linear = 10**(p['ci_down'] / 10)
+    cinr_linear = 1 / (1 / c_to_n_downlink_linear + 1 / c_to_i_linear)
+    cinr_dB = 10 * np.log10(cinr_linear)
+
+    result = {
+        "cinr_dB": cinr_dB,
+        "c_per_i_downlink_db": p['ci_down'],
+        "eirp_downlink_dBW": eirp_downlink_dBW,
+        "free_space_loss_dB": fsl_dB,
+        "g_per_t_stasiun_bumi_dBK": g_per_t_stasiun_bumi_dBK,
+        "c_per_n_downlink_dB": c_to_n_downlink_dB,
+    }
+    shape = np.broadcast_shapes(*(value.shape for value in result.values()))
+    result = {key: np.broadcast_to(value, shape) for key, value in result.items()}
+    result["evaluasi"] = evaluasi_cinr(result["cinr_dB"])
+    return result
+
 def calculate_link_budget(params):
-    # Tidak ada perubahan di fungsi ini
+    # Pembungkus skalar di atas calculate_link_budget_array; format hasil tidak berubah
     try:
-        directivity_satelit_tx_dBi = params['directivity_satelit_tx_dBi']
-        dir_ground = params['dir_ground']
-        frekuensi_GHz = params['frekuensi_GHz']
-        jarak_km = params['jarak_km']
-        efisiensi_antena_lin = params['efisiensi_antena']
-        pt_satelit_dBW = params['tx_sat']
-        tsys_stasiun_bumi_K = params['suhu']
-        bw = params['bw']
-        loss = params['loss']
-        c_to_i_dB = params['ci_down']
-        konstanta_boltzmann_k_dB = -228.6
-        gain_satelit_tx_dBi = directivity_satelit_tx_dBi + 10 * math.log10(efisiensi_antena_lin)
-        gain_stasiun_bumi_rx_dBi = dir_ground + 10 * math.log10(efisiensi_antena_lin)
-        frekuensi_MHz = frekuensi_GHz * 1000
-        fsl_dB = 32.44 + 20 * math.log10(jarak_km) + 20 * math.log10(frekuensi_MHz)
-        eirp_downlink_dBW = pt_satelit_dBW + gain_satelit_tx_dBi
-        g_per_t_stasiun_bumi_dBK = gain_stasiun_bumi_rx_dBi - 10 * math.log10(tsys_stasiun_bumi_K)
-        c_to_n_downlink_dB = eirp_downlink_dBW - fsl_dB - loss + g_per_t_stasiun_bumi_dBK - konstanta_boltzmann_k_dB - 10 * math.log10(bw)
-        c_to_n_downlink_linear = 10**(c_to_n_downlink_dB / 10)
-        c_to_i_linear = 10**(c_to_i_dB / 10)
-        cinr_linear = 1 / (1 / c_to_n_downlink_linear + 1 / c_to_i_linear)
-        cinr_dB = 10 * math.log10(cinr_linear)
-        if cinr_dB < 0: evaluasi = "Sangat Buruk (Derau/Interferensi > Sinyal)"
-        elif cinr_dB < 6: evaluasi = "Buruk (Membutuhkan modulasi sangat robust)"
-        elif cinr_dB < 10: evaluasi = "Batas Minimum (Cukup untuk modulasi standar)"
-        else: evaluasi = "Baik"
-        return {"status": "success", "cinr_dB": round(cinr_dB, 2), "evaluasi": evaluasi, "perhitungan": {"c_per_i_downlink_db": round(c_to_i_dB, 2), "eirp_downlink_dBW": round(eirp_downlink_dBW, 2), "free_space_loss_dB": round(fsl_dB, 2), "g_per_t_stasiun_bumi_dBK": round(g_per_t_stasiun_bumi_dBK, 2), "c_per_n_downlink_dB": round(c_to_n_downlink_dB, 2)}}
+        # Seperti math.log10, domain error & pembagian nol dianggap kesalahan perhitungan
+        with np.errstate(divide='raise', invalid='raise', over='raise', under='ignore'):
+            r = calculate_link_budget_array(params)
+        return {"status": "success", "cinr_dB": round(float(r["cinr_dB"]), 2), "evaluasi": str(r["evaluasi"]), "perhitungan": {"c_per_i_downlink_db": round(params['ci_down'], 2), "eirp_downlink_dBW": round(float(r["eirp_downlink_dBW"]), 2), "free_space_loss_dB": round(float(r["free_space_loss_dB"]), 2), "g_per_t_stasiun_bumi_dBK": round(float(r["g_per_t_stasiun_bumi_dBK"]), 2), "c_per_n_downlink_dB": round(float(r["c_per_n_downlink_dB"]), 2)}}
     except Exception as e:
         return {"status": "error", "message": f"Kesalahan matematis dalam kalkulasi: {e}"}
 
+def find_or_create_link_profile(conn, params):
+    """Cari profil default_link yang identik dengan params; buat baru jika belum ada. Mengembalikan id profil."""
+    cur_check = conn.cursor(dictionary=True)
+    
+    sql_check = """
+        SELECT id FROM default_link 
+        WHERE dir_ground = %s AND tx_sat = %s AND suhu = %s 
+          AND bw = %s AND loss = %s AND ci_down = %s
+        LIMIT 1
+    """
+    check_values = (
+        params['dir_ground'], params['tx_sat'], params['suhu'], 
+        params['bw'], params['loss'], params['ci_down']
+    )
+    cur_check.execute(sql_check, check_values)
+    existing_profile = cur_check.fetchone()
+    cur_check.close()
+
+    if existing_profile:
+        # JIKA ADA: Gunakan ID yang sudah ada
+        return existing_profile['id']
+
+    # JIKA TIDAK ADA: Baru lakukan INSERT untuk membuat yang baru
+    cur_insert = conn.cursor()
+    sql_insert = "INSERT INTO default_link (dir_ground, tx_sat, suhu, bw, loss, ci_down) VALUES (%s, %s, %s, %s, %s, %s)"
+    cur_insert.execute(sql_insert, check_values)
+    profile_id = cur_insert.lastrowid
+    cur_insert.close()
+    return profile_id
+
 # --- Endpoint POST (VERSI FINAL DENGAN PERHITUNGAN DIRECTIVITY YANG BENAR) ---
 @link_budget_bp.route("/calculate", methods=["POST"])
 @jwt_required()
@@ -196,7 +196,7 @@ def calculate_link():
             profile_id_to_use = 1
             
             # Selalu mulai dengan mengambil parameter dasar
-            params_from_db = fetch_link_budget_defaults(1)
+            params_from_db = fetch_link_budget_defaults(1, conn)
             if not params_from_db:
                 return jsonify({"error": "Base default profile (ID=1) not found in database."}), 500
             
@@ -208,58 +208,34 @@ def calculate_link():
                 params.update(link_params_custom)
                 
                 # --- LOGIKA "CARI ATAU BUAT" PROFIL ---
-                cur_check = conn.cursor(dictionary=True)
-                
-                sql_check = """
-                    SELECT id FROM default_link 
-                    WHERE dir_ground = %s AND tx_sat = %s AND suhu = %s 
-                      AND bw = %s AND loss = %s AND ci_down = %s
-                """
-                check_values = (
-                    params['dir_ground'], params['tx_sat'], params['suhu'], 
-                    params['bw'], params['loss'], params['ci_down']
-                )
-                cur_check.execute(sql_check, check_values)
-                existing_profile = cur_check.fetchone()
-                cur_check.close()
-
-                if existing_profile:
-                    # JIKA ADA: Gunakan ID yang sudah ada
-                    profile_id_to_use = existing_profile['id']
-                else:
-                    # JIKA TIDAK ADA: Baru lakukan INSERT untuk membuat yang baru
-                    cur_insert = conn.cursor()
-                    sql_insert = "INSERT INTO default_link (dir_ground, tx_sat, suhu, bw, loss, ci_down) VALUES (%s, %s, %s, %s, %s, %s)"
-                    cur_insert.execute(sql_insert, check_values)
-                    profile_id_to_use = cur_insert.lastrowid
-                    cur_insert.close()
+                profile_id_to_use = find_or_create_link_profile(conn, params)
             
             # --- Lanjutan Proses Kalkulasi ---
             
-            sat = fetch_satellite_by_account(id_akun_login)
+            sat = fetch_satellite_by_account(id_akun_login, conn)
             if not sat: return jsonify({"error": f"Satellite for account id {id_akun_login} not found"}), 404
             
-            all_beams = fetch_all_beams_by_account(id_akun_login)
-            if not all_beams: return jsonify({"error": "No beam data available for your account"}), 404
+            beams = beam_index.get_beam_index(id_akun_login, conn)
+            if not len(beams): return jsonify({"error": "No beam data available for your account"}), 404
             
-            # Pilih beam terdekat berdasarkan jarak permukaan
-            for b in all_beams:
-                b["_surface_distance"] = haversine(obs_lat, obs_lon, b["clat"], b["clon"])
-            best_beam_initial = min(all_beams, key=lambda x: x["_surface_distance"])
+            # Pilih beam terdekat berdasarkan jarak permukaan (lewat indeks spasial)
+            nearest_pos, _ = beams.nearest(obs_lat, obs_lon)
+            best_beam_initial = beams.beam(nearest_pos)
             
             id_antena_terbaik = best_beam_initial['id_antena']
             
             # --- PERHITUNGAN DIRECTIVITY YANG SUDAH DIPERBAIKI ---
 
-            # 1. Ambil directivity puncak dari fetch_antenna_pattern
-            peak_directivity_dBi, ant_eff, ant_freq_ghz, theta_axis, gain_axis = fetch_antenna_pattern(id_antena_terbaik)
-            if theta_axis is None: return jsonify({"error": f"Pattern data for antenna id {id_antena_terbaik} not found"}), 404
+            # 1. Ambil directivity puncak & pola radiasi (dengan interpolator siap pakai) dari cache
+            antenna = pattern_cache.get(id_antena_terbaik, conn)
+            if antenna is None: return jsonify({"error": f"Pattern data for antenna id {id_antena_terbaik} not found"}), 404
+            peak_directivity_dBi, ant_eff, ant_freq_ghz = antenna.directivity, antenna.eff, antenna.frekuensi
 
             # 2. Hitung jarak 3D dan sudut off-axis
             theta_off_final, distance_final = off_axis(sat["lat"], sat["lon"], sat["alt"], best_beam_initial["clat"], best_beam_initial["clon"], obs_lat, obs_lon)
             
             # 3. Hitung penurunan gain dari pola radiasi (hasilnya negatif)
-            gain_drop_off_dB = gain_from_pattern(theta_off_final, theta_axis, gain_axis)
+            gain_drop_off_dB = antenna.gain_at(theta_off_final)
 
             # 4. Hitung directivity absolut di lokasi observer
             directivity_final_abs = peak_directivity_dBi + gain_drop_off_dB
@@ -309,6 +285,7 @@ def calculate_link():
             )
             cur_insert_link.execute(sql, values)
             link_id_new = cur_insert_link.lastrowid
+            data_version.bump(cur_insert_link, id_akun_login)
             conn.commit()
             
             final_response = {
@@ -325,6 +302,339 @@ def calculate_link():
     except Exception as e:
         return jsonify({"error": f"An unexpected server error occurred: {e}"}), 500
     
+# --- Kalkulasi Batch (banyak titik observasi sekaligus) ---
+
+# Jumlah baris per statement INSERT multi-row ke tabel link
+LINK_INSERT_CHUNK = 1000
+
+LINK_INSERT_SQL = "INSERT INTO link (id_beam, id_default, distance, lat, lon, directivity, cinr, evaluasi, ci, cn, gt, eirp, fsl) VALUES (%s,%s,%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+
+def evaluate_candidates(sat, beams, idx, obs_lat, obs_lon, params, conn=None):
+    """
+    Hitung sudut off-axis, directivity dan link budget untuk pasangan (observer, beam).
+    `idx` adalah posisi beam di dalam `beams` (beam_index.BeamIndex) dan harus bisa
+    di-broadcast dengan obs_lat/obs_lon, mis. idx (M, K) dengan observer (M, 1).
+    Semua hasil berupa array dengan bentuk hasil broadcast tersebut.
+    """
+    obs_lat = np.asarray(obs_lat, dtype=float)
+    obs_lon = np.asarray(obs_lon, dtype=float)
+    idx = np.asarray(idx)
+    theta_off, distance = off_axis(
+        float(sat["lat"]), float(sat["lon"]), float(sat["alt"]),
+        beams.clat[idx], beams.clon[idx], obs_lat, obs_lon
+    )
+    # Jarak miring hanya bergantung pada observer; samakan bentuknya dengan theta_off
+    distance = np.broadcast_to(distance, theta_off.shape)
+
+    # Directivity absolut = directivity puncak + penurunan gain dari pola (per antena)
+    ant_ids = np.broadcast_to(beams.id_antena[idx], theta_off.shape)
+    gain = np.empty(theta_off.shape)
+    directivity = np.empty(theta_off.shape)
+    eff = np.empty(theta_off.shape)
+    freq = np.empty(theta_off.shape)
+    for ant_id in np.unique(ant_ids):
+        mask = ant_ids == ant_id
+        antenna = pattern_cache.get(int(ant_id), conn)
+        if antenna is None:
+            raise ValueError(f"Pattern data for antenna id {ant_id} not found")
+        gain[mask] = antenna.gain_at(theta_off[mask])
+        directivity[mask] = float(antenna.directivity) + gain[mask]
+        eff[mask] = float(antenna.eff)
+        freq[mask] = float(antenna.frekuensi)
+
+    budget = calculate_link_budget_array({
+        **params,
+        'directivity_satelit_tx_dBi': directivity,
+        'jarak_km': distance,
+        'efisiensi_antena': eff,
+        'frekuensi_GHz': freq,
+    })
+    idx = np.broadcast_to(idx, theta_off.shape)
+    return {
+        "beam_index": idx,
+        "beam_id": beams.ids[idx],
+        "id_antena": ant_ids,
+        "beam_lat": beams.clat[idx],
+        "beam_lon": beams.clon[idx],
+        "theta_off_deg": theta_off,
+        "distance_km": distance,
+        "gain_dB": gain,
+        "directivity_dBi": directivity,
+        **budget,
+    }
+
+def evaluate_observers(sat, beams, obs_lat, obs_lon, params, conn=None):
+    """
+    Hitung beam terdekat, sudut off-axis, directivity dan link budget untuk banyak
+    observer sekaligus. `beams` adalah beam_index.BeamIndex milik akun.
+    Semua hasil berupa array sepanjang jumlah observer.
+    """
+    idx, _ = beams.nearest(obs_lat, obs_lon)
+    return evaluate_candidates(sat, beams, idx, obs_lat, obs_lon, params, conn)
+
+def rank_beams(sat, beams, obs_lat, obs_lon, params, k=3, conn=None):
+    """
+    Pemilihan beam dua tahap seperti dirpointwithrankdistance.py: ambil k beam terdekat
+    (jarak permukaan), lalu urutkan ulang menurut directivity di lokasi observer.
+    Hasil berbentuk (M, k); kolom 0 adalah beam terbaik tiap observer.
+    """
+    obs_lat = np.asarray(obs_lat, dtype=float)
+    obs_lon = np.asarray(obs_lon, dtype=float)
+    idx, surface_km = beams.k_nearest(obs_lat, obs_lon, k)
+    r = evaluate_candidates(sat, beams, idx, obs_lat[:, None], obs_lon[:, None], params, conn)
+    r["surface_distance_km"] = surface_km
+    r["distance_rank"] = np.broadcast_to(np.arange(1, idx.shape[1] + 1), idx.shape)
+
+    # Urutkan ulang per observer: directivity tertinggi di depan
+    order = np.argsort(-r["directivity_dBi"], axis=1, kind='stable')
+    return {key: np.take_along_axis(np.asarray(value), order, axis=1) for key, value in r.items()}
+
+def insert_links_bulk(conn, rows, progress=None):
+    """
+    Simpan banyak baris link dengan INSERT multi-row per potongan (lihat bulk_writer).
+    Mengembalikan list id baru. `progress(fraction, message)` dipanggil per potongan.
+    """
+    cur = conn.cursor()
+    link_ids = []
+    for start in range(0, len(rows), LINK_INSERT_CHUNK):
+        chunk = rows[start:start + LINK_INSERT_CHUNK]
+        link_ids.extend(bulk_writer.insert_rows(cur, LINK_INSERT_SQL, chunk, LINK_INSERT_CHUNK))
+        if progress:
+            progress(len(link_ids) / len(rows), f"Stored {len(link_ids)} of {len(rows)} links")
+    cur.close()
+    return link_ids
+
+def calculate_links_for_account(id_akun, points, link_params_custom, store, conn, progress=None, columnar=False):
+    """
+    Inti /calculate-batch (dipakai endpoint sinkron maupun job 'calculate_links').
+    points: array (N, 2) [lat, lon]. Mengembalikan dict respons; JobFailed bila data akun tidak lengkap.
+    columnar=True: hasil per titik sebagai dict "columns" berisi array (untuk array_transport).
+    """
+    params_from_db = fetch_link_budget_defaults(1, conn)
+    if not params_from_db:
+        raise jobs.JobFailed("Base default profile (ID=1) not found in database.", 500)
+    params = {**params_from_db, **link_params_custom}
+    profile_id_to_use = find_or_create_link_profile(conn, params) if link_params_custom else 1
+
+    sat = fetch_satellite_by_account(id_akun, conn)
+    if not sat:
+        raise jobs.JobFailed(f"Satellite for account id {id_akun} not found", 404)
+
+    beams = beam_index.get_beam_index(id_akun, conn)
+    if not len(beams):
+        raise jobs.JobFailed("No beam data available for your account", 404)
+
+    r = evaluate_observers(sat, beams, points[:, 0], points[:, 1], params, conn)
+    if progress:
+        progress(0.5 if store else 0.9, f"Calculated {len(points)} links")
+
+    # Nilai dibulatkan 2 desimal seperti pada /calculate
+    rounded_arrays = {key: np.round(r[key], 2) for key in (
+        "distance_km", "directivity_dBi", "cinr_dB", "c_per_i_downlink_db",
+        "eirp_downlink_dBW", "free_space_loss_dB", "g_per_t_stasiun_bumi_dBK", "c_per_n_downlink_dB"
+    )}
+    rounded = {key: value.tolist() for key, value in rounded_arrays.items()}
+    beam_ids = r["beam_id"].tolist()
+    evaluasi = r["evaluasi"].tolist()
+    lats, lons = points[:, 0].tolist(), points[:, 1].tolist()
+
+    link_ids = [None] * len(points)
+    if store:
+        rows = list(zip(
+            beam_ids, [int(profile_id_to_use)] * len(points), rounded["distance_km"], lats, lons,
+            rounded["directivity_dBi"], rounded["cinr_dB"], evaluasi, rounded["c_per_i_downlink_db"],
+            rounded["c_per_n_downlink_dB"], rounded["g_per_t_stasiun_bumi_dBK"],
+            rounded["eirp_downlink_dBW"], rounded["free_space_loss_dB"]
+        ))
+        store_progress = (lambda f, msg=None: progress(0.5 + 0.5 * f, msg)) if progress else None
+        link_ids = insert_links_bulk(conn, rows, store_progress)
+        cur = conn.cursor()
+        data_version.bump(cur, id_akun)
+        cur.close()
+        conn.commit()
+
+    message = f"Calculated {len(points)} links" + (" and stored them." if store else ".")
+    if columnar:
+        # Untuk array_transport: satu array per field, baris ke-i = titik ke-i
+        columns = {
+            "obs_lat": points[:, 0], "obs_lon": points[:, 1],
+            "beam_id": r["beam_id"], "id_antena": r["id_antena"],
+            "evaluasi": np.asarray(evaluasi, dtype=str),
+            **rounded_arrays,
+        }
+        if store:
+            columns["link_id"] = np.asarray(link_ids, dtype=np.int64)
+        return {"message": message, "profile_id_used": profile_id_to_use, "columns": columns}
+
+    results = [
+        {
+            "link_id": link_ids[i],
+            "obs_lat": lats[i],
+            "obs_lon": lons[i],
+            "best_beam_found": {
+                "id": beam_ids[i],
+                "id_antena": r["id_antena"][i].item(),
+                "distance_to_obs_km": rounded["distance_km"][i],
+                "directivity_at_obs_dBi": rounded["directivity_dBi"][i],
+            },
+            "cinr_dB": rounded["cinr_dB"][i],
+            "evaluasi": evaluasi[i],
+            "perhitungan": {
+                "c_per_i_downlink_db": rounded["c_per_i_downlink_db"][i],
+                "eirp_downlink_dBW": rounded["eirp_downlink_dBW"][i],
+                "free_space_loss_dB": rounded["free_space_loss_dB"][i],
+                "g_per_t_stasiun_bumi_dBK": rounded["g_per_t_stasiun_bumi_dBK"][i],
+                "c_per_n_downlink_dB": rounded["c_per_n_downlink_dB"][i],
+            },
+        }
+        for i in range(len(points))
+    ]
+    return {
+        "message": message,
+        "profile_id_used": profile_id_to_use,
+        "results": results,
+    }
+
+def parse_link_batch(data):
+    """Validasi body /calculate-batch: (points (N, 2), link_params, store). ValueError/TypeError jika salah."""
+    points = np.asarray(data["points"], dtype=float)
+    if points.ndim != 2 or points.shape[1] != 2 or len(points) == 0:
+        raise ValueError("'points' must be a non-empty array of [latitude, longitude] pairs.")
+    link_params_custom = data.get("link_params", {}) or {}
+    if not isinstance(link_params_custom, dict):
+        raise ValueError("'link_params' must be an object.")
+    return points, link_params_custom, jobs.parse_bool(data.get("store", True), "store")
+
+def calculate_links_job(id_akun, params, conn, progress):
+    """Job 'calculate_links' (lihat jobs.JOB_KINDS). params = body /calculate-batch."""
+    try:
+        points, link_params_custom, store = parse_link_batch(params)
+    except (KeyError, ValueError, TypeError) as e:
+        raise jobs.JobFailed(f"Invalid request body: {e}")
+    return calculate_links_for_account(id_akun, points, link_params_custom, store, conn, progress)
+
+@link_budget_bp.route("/calculate-batch", methods=["POST"])
+@jwt_required()
+def calculate_links_batch():
+    """
+    Versi batch dari /calculate. Body: {"points": [[lat, lon], ...], "link_params": {...}, "store": true}
+    Satelit, beam, pola antena dan profil link dimuat sekali, lalu semua titik dihitung
+    sebagai array NumPy dan disimpan dengan INSERT massal. Batch besar (atau "async": true)
+    dijalankan sebagai job latar belakang dan dijawab 202 dengan id job.
+    Accept: application/x-npz (atau x-msgpack) -> hasil sinkron sebagai kolom array
+    (obs_lat, obs_lon, beam_id, cinr_dB, ...); message & profile_id_used ada di "meta".
+    """
+    id_akun_login = get_jwt_identity()
+    data = request.get_json()
+    if not data or "points" not in data:
+        return jsonify({"error": "Request body must contain an array of 'points'."}), 400
+
+    try:
+        points, link_params_custom, store = parse_link_batch(data)
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": f"Invalid request body: {e}"}), 400
+
+    try:
+        if jobs.wants_async(data, len(points)):
+            return job_accepted(jobs.submit(id_akun_login, "calculate_links", {
+                "points": points.tolist(), "link_params": link_params_custom, "store": store
+            }))
+
+        fmt = array_transport.negotiate()
+        with get_conn() as conn:
+            if fmt != array_transport.JSON:
+                result = calculate_links_for_account(id_akun_login, points, link_params_custom, store, conn, columnar=True)
+                columns = result.pop("columns")
+                return array_transport.response(columns, fmt, meta=result)
+            return jsonify(calculate_links_for_account(id_akun_login, points, link_params_custom, store, conn))
+
+    except jobs.JobFailed as e:
+        return jsonify({"error": str(e)}), e.status
+    except (Error, ValueError) as e:
+        return jsonify({"error": f"Operation failed: {e}"}), 500
+    except Exception as e:
+        return jsonify({"error": f"An unexpected server error occurred: {e}"}), 500
+
+# --- Endpoint POST: ranking beam kandidat (top-K jarak, lalu directivity) ---
+RANK_MAX_K = 50
+
+@link_budget_bp.route("/rank-beams", methods=["POST"])
+@jwt_required()
+def rank_beams_endpoint():
+    """
+    Body: {"points": [[lat, lon], ...]} atau {"obs_lat": .., "obs_lon": ..}, opsional "k" (default 3)
+    dan "link_params". Untuk setiap observer dikembalikan k beam terdekat yang sudah diurutkan
+    menurut directivity di lokasi observer, lengkap dengan sudut off-axis dan CINR. Tidak ada
+    yang disimpan ke database.
+    """
+    id_akun_login = get_jwt_identity()
+    data = request.get_json()
+    if not data: return jsonify({"error": "Invalid JSON payload"}), 400
+
+    try:
+        if "points" in data:
+            points = np.asarray(data["points"], dtype=float)
+        else:
+            points = np.array([[float(data["obs_lat"]), float(data["obs_lon"])]])
+        if points.ndim != 2 or points.shape[1] != 2 or len(points) == 0:
+            raise ValueError("'points' must be a non-empty array of [latitude, longitude] pairs.")
+        k = int(data.get("k", 3))
+        if not 1 <= k <= RANK_MAX_K:
+            raise ValueError(f"'k' must be between 1 and {RANK_MAX_K}.")
+        link_params_custom = data.get("link_params", {}) or {}
+    except (KeyError, ValueError, TypeError) as e:
+        return jsonify({"error": f"Missing or invalid observer data: {e}"}), 400
+
+    try:
+        with get_conn() as conn:
+            params_from_db = fetch_link_budget_defaults(1, conn)
+            if not params_from_db:
+                return jsonify({"error": "Base default profile (ID=1) not found in database."}), 500
+            params = {**params_from_db, **link_params_custom}
+
+            sat = fetch_satellite_by_account(id_akun_login, conn)
+            if not sat: return jsonify({"error": f"Satellite for account id {id_akun_login} not found"}), 404
+
+            beams = beam_index.get_beam_index(id_akun_login, conn)
+            if not len(beams): return jsonify({"error": "No beam data available for your account"}), 404
+
+            r = rank_beams(sat, beams, points[:, 0], points[:, 1], params, k, conn)
+
+        columns = {
+            "beam_id": r["beam_id"].tolist(),
+            "id_antena": r["id_antena"].tolist(),
+            "distance_rank": r["distance_rank"].tolist(),
+            "evaluasi": r["evaluasi"].tolist(),
+        }
+        for key in ("surface_distance_km", "distance_km", "theta_off_deg", "directivity_dBi", "cinr_dB"):
+            columns[key] = np.round(r[key], 4 if key == "theta_off_deg" else 2).tolist()
+
+        results = []
+        for i, (lat, lon) in enumerate(points.tolist()):
+            candidates = [
+                {
+                    "rank": j + 1,
+                    "beam_id": columns["beam_id"][i][j],
+                    "id_antena": columns["id_antena"][i][j],
+                    "distance_rank": columns["distance_rank"][i][j],
+                    "surface_distance_km": columns["surface_distance_km"][i][j],
+                    "distance_to_obs_km": columns["distance_km"][i][j],
+                    "off_axis_deg": columns["theta_off_deg"][i][j],
+                    "directivity_at_obs_dBi": columns["directivity_dBi"][i][j],
+                    "cinr_dB": columns["cinr_dB"][i][j],
+                    "evaluasi": columns["evaluasi"][i][j],
+                }
+                for j in range(r["beam_id"].shape[1])
+            ]
+            results.append({"obs_lat": lat, "obs_lon": lon, "best_beam_id": candidates[0]["beam_id"], "candidates": candidates})
+
+        return jsonify({"k": r["beam_id"].shape[1], "results": results})
+
+    except (Error, ValueError) as e:
+        return jsonify({"error": f"Operation failed: {e}"}), 500
+    except Exception as e:
+        return jsonify({"error": f"An unexpected server error occurred: {e}"}), 500
+
 # --- Endpoint PUT untuk Update/Re-calculate (VERSI FINAL DENGAN PEMILIHAN BEAM ID) ---
 @link_budget_bp.route("/link/<int:link_id>", methods=["PUT"])
 @jwt_required()
@@ -363,8 +673,8 @@ def update_link(link_id):
                 lat_for_recalc, lon_for_recalc = link_info['lat'], link_info['lon']
 
             # 3. Ambil semua beam yang tersedia (tidak ada perubahan)
-            all_beams = fetch_all_beams_by_account(id_akun_login)
-            if not all_beams:
+            beams = beam_index.get_beam_index(id_akun_login, conn)
+            if not len(beams):
                 return jsonify({"error": "No beam data available for your account to perform recalculation."}), 404
 
             # --- PERUBAHAN 2: Logika Pemilihan Beam (Manual by ID atau Otomatis) ---
@@ -379,20 +689,18 @@ def update_link(link_id):
                     return jsonify({"error": "Invalid format for 'ref_beam_id'. It must be an integer."}), 400
 
                 # Cari beam yang cocok berdasarkan ID dari daftar beam milik user
-                found_beam = next((beam for beam in all_beams if beam['id'] == ref_id), None)
+                found_pos = beams.position_of(ref_id)
                 
-                if not found_beam:
+                if found_pos is None:
                     return jsonify({"error": f"The specified reference beam with ID {ref_id} was not found for your account."}), 404
                 
-                best_beam_for_update = found_beam
+                best_beam_for_update = beams.beam(found_pos)
                 selection_method_info = f"Recalculated using manually specified beam ID {best_beam_for_update['id']}."
 
             # Jika tidak ada input manual, gunakan logika otomatis (paling dekat)
             else:
-                for b in all_beams:
-                    b["_surface_distance"] = haversine(lat_for_recalc, lon_for_recalc, b["clat"], b["clon"])
-                
-                best_beam_for_update = min(all_beams, key=lambda x: x["_surface_distance"])
+                nearest_pos, _ = beams.nearest(lat_for_recalc, lon_for_recalc)
+                best_beam_for_update = beams.beam(nearest_pos)
                 selection_method_info = f"Recalculated using automatically selected nearest beam ID {best_beam_for_update['id']}."
             # --------------------------------------------------------------------
 
@@ -400,7 +708,7 @@ def update_link(link_id):
 
             # 5. Logika untuk mengelola profil link (tidak ada perubahan)
             current_default_id = link_info['id_default']
-            base_params = fetch_link_budget_defaults(1)
+            base_params = fetch_link_budget_defaults(1, conn)
             if not base_params: return jsonify({"error": "Base default profile (ID=1) not found."}), 500
             final_params = {**base_params, **link_params_custom}
             
@@ -424,17 +732,18 @@ def update_link(link_id):
             params = final_params.copy()
 
             # 6. Lanjutkan proses re-kalkulasi (tidak ada perubahan)
-            sat = fetch_satellite_by_account(id_akun_login)
+            sat = fetch_satellite_by_account(id_akun_login, conn)
             
-            # 1. Ambil directivity puncak dari fetch_antenna_pattern
-            peak_directivity_dBi, ant_eff, ant_freq_ghz, theta_axis, gain_axis = fetch_antenna_pattern(id_antena_terbaik)
-            if theta_axis is None:
+            # 1. Ambil directivity puncak & pola radiasi dari cache
+            antenna = pattern_cache.get(id_antena_terbaik, conn)
+            if antenna is None:
                 return jsonify({"error": f"Pattern data not found for antenna ID: {id_antena_terbaik}"}), 404
+            peak_directivity_dBi, ant_eff, ant_freq_ghz = antenna.directivity, antenna.eff, antenna.frekuensi
 
             theta_off, distance = off_axis(sat["lat"], sat["lon"], sat["alt"], best_beam_for_update["clat"], best_beam_for_update["clon"], lat_for_recalc, lon_for_recalc)
             
             # 2. Hitung penurunan gain
-            gain_drop_off_dB = gain_from_pattern(theta_off, theta_axis, gain_axis)
+            gain_drop_off_dB = antenna.gain_at(theta_off)
             
             # 3. Hitung directivity absolut
             directivity_abs = peak_directivity_dBi + gain_drop_off_dB
@@ -471,6 +780,10 @@ def update_link(link_id):
                 link_id
             )
             cur_update.execute(sql_update_link, values)
+            if current_default_id != 1:
+                # Profil kustom bisa dipakai bersama link akun lain (find_or_create_link_profile)
+                data_version.bump_profile_accounts(cur, current_default_id)
+            data_version.bump(cur_update, id_akun_login)
             conn.commit()
 
             final_message = f"{message} {selection_method_info}"
@@ -479,11 +792,20 @@ def update_link(link_id):
     except (Error, ValueError) as e:
         return jsonify({"error": f"Operation failed: {e}"}), 500
 
+# Kolom /links, urutannya sama dengan SELECT di get_all_links
+LINK_COLUMNS = (
+    'id', 'lat', 'lon', 'id_beam', 'clat', 'clon', 'distance', 'directivity', 'cinr', 'evaluasi',
+    'ci', 'cn', 'gt', 'eirp', 'fsl', 'id_default', 'dir_ground', 'tx_sat', 'suhu', 'bw', 'loss', 'ci_down'
+)
+
 # --- Endpoint GET All ---
 @link_budget_bp.route("/links", methods=["GET"])
 @jwt_required()
+@data_version.conditional_get
 def get_all_links():
+    """Accept: application/x-npz (atau x-msgpack) -> satu array per kolom (lihat array_transport.py)."""
     id_akun_login = get_jwt_identity() 
+    fmt = array_transport.negotiate()
     try:
         with get_conn() as conn: 
             cur = conn.cursor(dictionary=True) 
@@ -505,6 +827,8 @@ def get_all_links():
             cur.execute(sql, (id_akun_login,)) 
             all_link_data = cur.fetchall()
             cur.close()
+            if fmt != array_transport.JSON:
+                return array_transport.response(array_transport.columns_from_rows(all_link_data, LINK_COLUMNS), fmt)
             return jsonify(all_link_data)
     except Error as e:
         return jsonify({"error": f"Database error: {e}"}), 500
\ No newline at end of file
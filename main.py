@@ -8,6 +8,12 @@ from satellite_api import satellite_blueprint
 from antenna_api import antenna_blueprint
 from beam_api import beam_blueprint
 from link_budget_api import link_budget_bp  # <-- 1. IMPOR BLUEPRINT BARU
+from coverage_api import coverage_blueprint
+from jobs_api import jobs_blueprint
+from debug_api import debug_blueprint
+import metrics
+import json_provider
+import compression
 
 # Initialize the Flask application and JWT manager
 app = Flask(__name__)
@@ -20,17 +26,27 @@ jwt = JWTManager(app)
 
 CORS(app, origins="*")
 
+# Metrik Prometheus di GET /metrics (latensi per route, query DB, pool koneksi)
+metrics.init_app(app)
+
+# jsonify lewat orjson (array NumPy langsung), lalu kompresi gzip/br sesuai Accept-Encoding
+json_provider.init_app(app)
+compression.init_app(app)
+
 # Register Blueprints
 app.register_blueprint(satellite_blueprint, url_prefix='/satellite')
 app.register_blueprint(antenna_blueprint, url_prefix='/antenna')
 app.register_blueprint(beam_blueprint, url_prefix='/beam')
 app.register_blueprint(user_blueprint, url_prefix='/user')
 app.register_blueprint(link_budget_bp, url_prefix='/link_budget') 
+app.register_blueprint(coverage_blueprint, url_prefix='/coverage')
+app.register_blueprint(jobs_blueprint, url_prefix='/jobs')
+app.register_blueprint(debug_blueprint, url_prefix='/debug')
 
 # Root endpoint (optional)
 @app.route('/')
 def index():
-    return jsonify({"message": "Welcome! Available prefixes: /satellite, /antenna, /beam, /user, /link_budget"})
+    return jsonify({"message": "Welcome! Available prefixes: /satellite, /antenna, /beam, /user, /link_budget, /coverage, /jobs"})
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=8000)
\ No newline at end of file
@@ -0,0 +1,293 @@
+"""
+Metrik aplikasi dalam format teks Prometheus (exposition format 0.0.4), tanpa dependensi.
+
+Yang dicatat untuk setiap request (label route = pola URL Flask, mis. /beam/delete-beam/<int:beam_id>):
+  - http_requests_total, http_request_errors_total (status >= 500)
+  - http_request_duration_seconds (histogram, untuk p50/p95/p99 per endpoint)
+  - http_requests_in_flight (gauge)
+  - http_request_db_queries & http_request_db_seconds (histogram jumlah/waktu query per request)
+Ditambah db_queries_total / db_query_duration_seconds dan gauge pool koneksi (koneksi.pool_stats).
+
+Mode multiproses (gunicorn): set env METRICS_DIR ke direktori yang bisa ditulis semua worker
+dan kosongkan saat deploy. Setiap proses menulis snapshot totalnya ke <METRICS_DIR>/<pid>.json
+(paling sering tiap METRICS_FLUSH_INTERVAL detik); /metrics menjumlahkan semua snapshot.
+Counter & histogram dari proses yang sudah mati tetap dijumlahkan (nilainya tidak mundur),
+gauge hanya dari proses yang masih hidup. Tanpa METRICS_DIR, metrik hanya milik proses ini.
+"""
+import glob
+import json
+import os
+import threading
+import time
+
+from flask import Response, g, request
+
+import koneksi
+
+METRICS_DIR = os.getenv('METRICS_DIR')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 1.0))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+# nama -> (tipe, help)
+METRICS = {
+    "http_requests_total": ("counter", "HTTP requests by method, route and status."),
+    "http_request_errors_total": ("counter", "HTTP requests answered with a 5xx status."),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency in seconds."),
+    "http_requests_in_flight": ("gauge", "HTTP requests currently being served."),
+    "http_request_db_queries": ("histogram", "Database queries issued per HTTP request."),
+    "http_request_db_seconds": ("histogram", "Time spent in database queries per HTTP request."),
+    "db_queries_total": ("counter", "Database statements executed."),
+    "db_query_duration_seconds": ("histogram", "Database statement latency in seconds."),
+    "db_pool_connections": ("gauge", "Pool connections by state (in_use, idle, size)."),
+    "db_pool_waiting": ("gauge", "Callers currently waiting for a pool connection."),
+    "db_pool_checkouts_total": ("counter", "Connections handed out by the pool."),
+    "db_pool_exhausted_total": ("counter", "Checkouts that had to wait because the pool was full."),
+    "db_pool_timeouts_total": ("counter", "Checkouts that gave up after the pool wait timeout."),
+    "db_pool_wait_seconds_total": ("counter", "Total time spent waiting for pool connections."),
+    "db_pool_hold_seconds_total": ("counter", "Total time connections were held by callers."),
+}
+
+
+class Registry:
+    """Nilai metrik milik satu proses. Key = (nama, tuple label terurut)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}   # key -> [bucket_counts (list), sum, count, buckets]
+
+    def inc(self, name, labels=(), value=1.0):
+        key = (name, tuple(sorted(labels)))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def add_gauge(self, name, labels=(), value=1.0):
+        key = (name, tuple(sorted(labels)))
+        with self._lock:
+            self.gauges[key] = self.gauges.get(key, 0.0) + value
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS):
+        key = (name, tuple(sorted(labels)))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = [[0] * len(buckets), 0.0, 0, list(buckets)]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    hist[0][i] += 1
+                    break
+            hist[1] += value
+            hist[2] += 1
+
+    def snapshot(self):
+        """Salinan yang bisa di-JSON-kan (dipakai untuk file multiproses)."""
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "counters": [[n, list(l), v] for (n, l), v in self.counters.items()],
+                "gauges": [[n, list(l), v] for (n, l), v in self.gauges.items()] + _pool_gauges(),
+                "histograms": [[n, list(l), list(h[0]), h[1], h[2], h[3]] for (n, l), h in self.histograms.items()],
+                "pool_counters": _pool_counters(),
+            }
+
+
+registry = Registry()
+_local = threading.local()
+_last_flush = 0.0
+
+
+def _pool_stats():
+    try:
+        return koneksi.pool_stats()
+    except Exception:
+        return None
+
+
+def _pool_gauges():
+    stats = _pool_stats()
+    if not stats:
+        return []
+    return [
+        ["db_pool_connections", [["state", "in_use"]], stats["in_use"]],
+        ["db_pool_connections", [["state", "idle"]], stats["idle"]],
+        ["db_pool_connections", [["state", "size"]], stats["size"]],
+        ["db_pool_waiting", [], stats["waiting"]],
+    ]
+
+
+def _pool_counters():
+    stats = _pool_stats()
+    if not stats:
+        return []
+    return [
+        ["db_pool_checkouts_total", [], stats["checkouts"]],
+        ["db_pool_exhausted_total", [], stats["exhausted"]],
+        ["db_pool_timeouts_total", [], stats["timeouts"]],
+        ["db_pool_wait_seconds_total", [], stats["wait_seconds_total"]],
+        ["db_pool_hold_seconds_total", [], stats["hold_seconds_total"]],
+    ]
+
+
+# --- Pencatatan ---
+def _on_query(sql, seconds, rowcount):
+    registry.inc("db_queries_total")
+    registry.observe("db_query_duration_seconds", (), seconds)
+    current = getattr(_local, "db", None)
+    if current is not None:
+        current[0] += 1
+        current[1] += seconds
+
+
+def _route_labels():
+    rule = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+    return (("method", request.method), ("route", rule))
+
+
+def _before_request():
+    if request.path == "/metrics":
+        return
+    g._metrics_started = time.perf_counter()
+    g._metrics_labels = _route_labels()
+    _local.db = [0, 0.0]
+    registry.add_gauge("http_requests_in_flight", g._metrics_labels[1:], 1)
+
+
+def _teardown_request(exc):
+    started = g.pop("_metrics_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    labels = g.pop("_metrics_labels")
+    status = g.pop("_metrics_status", 500 if exc is not None else 200)
+    queries, db_seconds = getattr(_local, "db", None) or (0, 0.0)
+    _local.db = None
+
+    route = labels[1:]
+    registry.add_gauge("http_requests_in_flight", route, -1)
+    registry.inc("http_requests_total", labels + (("status", str(status)),))
+    if status >= 500:
+        registry.inc("http_request_errors_total", labels + (("status", str(status)),))
+    registry.observe("http_request_duration_seconds", labels, elapsed)
+    registry.observe("http_request_db_queries", route, queries, QUERY_COUNT_BUCKETS)
+    registry.observe("http_request_db_seconds", route, db_seconds)
+    maybe_flush()
+
+
+def _after_request(response):
+    if "_metrics_started" in g:
+        g._metrics_status = response.status_code
+    return response
+
+
+# --- Multiproses ---
+def maybe_flush(force=False):
+    """Tulis snapshot proses ini ke METRICS_DIR (atomik), paling sering tiap METRICS_FLUSH_INTERVAL."""
+    global _last_flush
+    if not METRICS_DIR:
+        return
+    now = time.monotonic()
+    if not force and now - _last_flush < METRICS_FLUSH_INTERVAL:
+        return
+    _last_flush = now
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = os.path.join(METRICS_DIR, f"{os.getpid()}.json")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(tmp, path)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def _collect():
+    """Gabungkan snapshot semua proses (atau proses ini saja tanpa METRICS_DIR)."""
+    if METRICS_DIR:
+        maybe_flush(force=True)
+        snapshots = []
+        for path in glob.glob(os.path.join(METRICS_DIR, "*.json")):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+    else:
+        snapshots = [registry.snapshot()]
+
+    counters, gauges, histograms = {}, {}, {}
+    for snap in snapshots:
+        for name, labels, value in snap["counters"] + snap.get("pool_counters", []):
+            key = (name, tuple(tuple(l) for l in labels))
+            counters[key] = counters.get(key, 0.0) + value
+        if _pid_alive(snap["pid"]):
+            for name, labels, value in snap["gauges"]:
+                key = (name, tuple(tuple(l) for l in labels))
+                gauges[key] = gauges.get(key, 0.0) + value
+        for name, labels, bucket_counts, total, count, buckets in snap["histograms"]:
+            key = (name, tuple(tuple(l) for l in labels))
+            hist = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0, buckets])
+            hist[0] = [a + b for a, b in zip(hist[0], bucket_counts)]
+            hist[1] += total
+            hist[2] += count
+    return counters, gauges, histograms
+
+
+def _fmt_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in items)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _fmt_value(value):
+    return repr(float(value)) if isinstance(value, float) and not float(value).is_integer() else str(int(value))
+
+
+def render():
+    """Semua metrik dalam format teks Prometheus."""
+    counters, gauges, histograms = _collect()
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        source = {"counter": counters, "gauge": gauges, "histogram": histograms}[kind]
+        series = sorted((key, value) for key, value in source.items() if key[0] == name)
+        if not series:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (_, labels), value in series:
+            if kind != "histogram":
+                lines.append(f"{name}{_fmt_labels(labels)} {_fmt_value(value)}")
+                continue
+            bucket_counts, total, count, buckets = value
+            cumulative = 0
+            for bound, n in zip(buckets, bucket_counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{_fmt_labels(labels, [('le', _fmt_value(float(bound)))])} {cumulative}")
+            lines.append(f"{name}_bucket{_fmt_labels(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {_fmt_value(total)}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view():
+    return Response(render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
+def init_app(app):
+    """Pasang hook pencatatan request dan endpoint GET /metrics."""
+    koneksi.add_query_listener(_on_query)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view, methods=["GET"])
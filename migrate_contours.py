@@ -0,0 +1,82 @@
+"""
+Migrasi kontur beam dari format lama (tabel `countour`, satu baris per titik) ke
+parameter elips (`beam_ellipse`, satu baris per level).
+
+Parameter elips dipulihkan dari titik yang tersimpan dengan least squares: titik lama
+dibuat oleh ellipse_points() dengan t = linspace(0, 2*pi, n), sehingga offset titik
+terhadap pusat beam linear terhadap (a*cos(rot), b*sin(rot), a*sin(rot), b*cos(rot)).
+
+Pemakaian:
+    python migrate_contours.py                # buat tabel baru & migrasikan semua beam
+    python migrate_contours.py --drop-legacy  # sekaligus hapus baris countour yang sudah dimigrasi
+    python migrate_contours.py --dry-run      # hanya tampilkan berapa beam yang akan dimigrasi
+
+Aman dijalankan berulang kali: beam yang sudah punya baris beam_ellipse akan dilewati.
+"""
+import argparse
+import os
+
+import numpy as np
+
+from koneksi import get_conn
+from migrate_patterns import apply_schema
+import contour_store
+
+MIGRATION_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations', '002_beam_ellipse.sql')
+
+
+def fit_ellipse(clat, clon, points):
+    """(major, minor, rot) dari titik [[lat, lon], ...] yang dibuat ellipse_points()."""
+    points = np.asarray(points, dtype=float)
+    t = np.linspace(0, 2 * np.pi, len(points))
+    basis = np.column_stack([np.cos(t), -np.sin(t)])
+    (a_cos, b_sin), *_ = np.linalg.lstsq(basis, points[:, 1] - clon, rcond=None)
+    (a_sin, b_cos), *_ = np.linalg.lstsq(basis * [1, -1], points[:, 0] - clat, rcond=None)
+    rot = np.degrees(np.arctan2(a_sin, a_cos)) % 360
+    return 2 * np.hypot(a_cos, a_sin), 2 * np.hypot(b_sin, b_cos), rot
+
+
+def migrate(drop_legacy=False, dry_run=False):
+    with get_conn() as conn:
+        cur = conn.cursor(dictionary=True)
+        if not dry_run:
+            apply_schema(cur, MIGRATION_SQL)
+            conn.commit()
+
+        cur.execute("""
+            SELECT b.id, b.clat AS center_lat, b.clon AS center_lon FROM beam AS b
+            WHERE NOT EXISTS (SELECT 1 FROM beam_ellipse AS e WHERE e.id_beam = b.id)
+            ORDER BY b.id
+        """)
+        pending = cur.fetchall()
+        print(f"{len(pending)} beam(s) without ellipse parameters.")
+        if dry_run:
+            return
+
+        migrated, skipped = 0, 0
+        for beam in pending:
+            levels = contour_store.load_legacy_contours(cur, [beam['id']]).get(beam['id'])
+            if not levels:
+                print(f"  beam {beam['id']}: no legacy contour rows, skipped")
+                skipped += 1
+                continue
+            rows = [
+                (beam['id'], level, *fit_ellipse(beam['center_lat'], beam['center_lon'], points))
+                for level, points in levels.items() if len(points) >= 3
+            ]
+            contour_store.store_ellipses(cur, rows)
+            if drop_legacy:
+                cur.execute("DELETE FROM countour WHERE id_beam = %s", (beam['id'],))
+            # Commit per beam supaya migrasi bisa dilanjutkan bila terputus
+            conn.commit()
+            migrated += 1
+
+        print(f"Migrated {migrated} beam(s), skipped {skipped}.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--drop-legacy', action='store_true', help="hapus baris countour lama setelah dimigrasi")
+    parser.add_argument('--dry-run', action='store_true', help="hanya hitung beam yang belum dimigrasi")
+    args = parser.parse_args()
+    migrate(drop_legacy=args.drop_legacy, dry_run=args.dry_run)
@@ -0,0 +1,80 @@
+"""
+Migrasi pola radiasi antena dari format lama (tabel `theta` & `pattern`, satu baris
+per sampel) ke format blob (`antena_pattern` + `theta_grid`).
+
+Pemakaian:
+    python migrate_patterns.py                # buat tabel baru & migrasikan semua antena
+    python migrate_patterns.py --drop-legacy  # sekaligus hapus baris lama yang sudah dimigrasi
+    python migrate_patterns.py --dry-run      # hanya tampilkan berapa antena yang akan dimigrasi
+
+Aman dijalankan berulang kali: antena yang sudah punya blob akan dilewati.
+"""
+import argparse
+import os
+
+from koneksi import get_conn
+import pattern_store
+
+MIGRATION_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations', '001_antenna_pattern_blob.sql')
+
+
+def apply_schema(cur, path=MIGRATION_SQL):
+    with open(path) as f:
+        script = f.read()
+    # Buang komentar lalu eksekusi statement satu per satu
+    lines = [line for line in script.splitlines() if not line.strip().startswith('--')]
+    for statement in "\n".join(lines).split(';'):
+        if statement.strip():
+            cur.execute(statement)
+
+
+def migrate(drop_legacy=False, dry_run=False):
+    with get_conn() as conn:
+        cur = conn.cursor(dictionary=True)
+        if not dry_run:
+            apply_schema(cur)
+            conn.commit()
+
+        cur.execute("""
+            SELECT a.id FROM antena AS a
+            LEFT JOIN antena_pattern AS ap ON ap.id_antena = a.id
+            WHERE ap.id_antena IS NULL
+            ORDER BY a.id
+        """)
+        pending = [row['id'] for row in cur.fetchall()]
+        print(f"{len(pending)} antenna(s) without a packed pattern.")
+        if dry_run:
+            return
+
+        migrated, skipped, failed = 0, 0, []
+        for ant_id in pending:
+            try:
+                theta, pattern = pattern_store.load_legacy_pattern(cur, ant_id)
+            except ValueError as e:
+                # Jumlah theta != pattern: dilaporkan dan dilewati, antena lain tetap dimigrasi
+                print(f"  antenna {ant_id}: {e} (skipped)")
+                failed.append(ant_id)
+                continue
+            if theta is None:
+                print(f"  antenna {ant_id}: no legacy pattern rows, skipped")
+                skipped += 1
+                continue
+            pattern_store.store_pattern(cur, ant_id, theta, pattern)
+            if drop_legacy:
+                cur.execute("DELETE FROM theta WHERE id_antena = %s", (ant_id,))
+                cur.execute("DELETE FROM pattern WHERE id_antena = %s", (ant_id,))
+            # Commit per antena supaya migrasi bisa dilanjutkan bila terputus
+            conn.commit()
+            migrated += 1
+
+        print(f"Migrated {migrated} antenna(s), skipped {skipped}.")
+        if failed:
+            print(f"{len(failed)} antenna(s) with inconsistent legacy data left unmigrated: {', '.join(map(str, failed))}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--drop-legacy', action='store_true', help="hapus baris theta/pattern lama setelah dimigrasi")
+    parser.add_argument('--dry-run', action='store_true', help="hanya hitung antena yang belum dimigrasi")
+    args = parser.parse_args()
+    migrate(drop_legacy=args.drop_legacy, dry_run=args.dry_run)
@@ -0,0 +1,95 @@
+-- Skema dasar (tabel yang sudah ada sebelum migrasi 001-003), sesuai kolom yang
+-- dipakai kode. Di MySQL produksi tabel-tabel ini sudah ada, jadi file ini hanya
+-- dipakai untuk membuat database baru (mis. backend SQLite, lihat db_sqlite.py).
+-- Tanpa foreign key: relasi dijaga kode aplikasi (mis. delete-beam menghapus
+-- baris anaknya sendiri), cukup indeks pada kolom relasinya.
+
+CREATE TABLE IF NOT EXISTS akun (
+    id        INT AUTO_INCREMENT PRIMARY KEY,
+    username  VARCHAR(255) NOT NULL,
+    password  VARCHAR(255) NOT NULL,
+    UNIQUE KEY ux_akun_username (username)
+);
+
+CREATE TABLE IF NOT EXISTS satelite (
+    id       INT AUTO_INCREMENT PRIMARY KEY,
+    lat      DOUBLE NOT NULL,
+    lon      DOUBLE NOT NULL,
+    alt      DOUBLE NOT NULL,
+    id_akun  INT NOT NULL,
+    KEY ix_satelite_akun (id_akun)
+);
+
+CREATE TABLE IF NOT EXISTS antena (
+    id           INT AUTO_INCREMENT PRIMARY KEY,
+    name         VARCHAR(255) NULL,
+    frekuensi    DOUBLE NOT NULL,
+    bw3db_deg    DOUBLE NOT NULL,
+    eff          DOUBLE NOT NULL,
+    f_d          DOUBLE NOT NULL,
+    directivity  DOUBLE NOT NULL,
+    id_satelite  INT NOT NULL,
+    KEY ix_antena_satelite (id_satelite)
+);
+
+-- Format lama pola radiasi: satu baris per sampel (lihat migrate_patterns.py)
+CREATE TABLE IF NOT EXISTS theta (
+    id         INT AUTO_INCREMENT PRIMARY KEY,
+    id_antena  INT NOT NULL,
+    deg        DOUBLE NOT NULL,
+    KEY ix_theta_antena (id_antena)
+);
+
+CREATE TABLE IF NOT EXISTS pattern (
+    id         INT AUTO_INCREMENT PRIMARY KEY,
+    id_antena  INT NOT NULL,
+    deg        DOUBLE NOT NULL,
+    KEY ix_pattern_antena (id_antena)
+);
+
+CREATE TABLE IF NOT EXISTS beam (
+    id         INT AUTO_INCREMENT PRIMARY KEY,
+    clat       DOUBLE NOT NULL,
+    clon       DOUBLE NOT NULL,
+    id_antena  INT NOT NULL,
+    KEY ix_beam_antena (id_antena)
+);
+
+-- Format lama kontur: satu baris per titik (lihat migrate_contours.py)
+CREATE TABLE IF NOT EXISTS countour (
+    id       INT AUTO_INCREMENT PRIMARY KEY,
+    id_beam  INT NOT NULL,
+    level    INT NOT NULL,
+    lat      DOUBLE NOT NULL,
+    lon      DOUBLE NOT NULL,
+    KEY ix_countour_beam (id_beam)
+);
+
+CREATE TABLE IF NOT EXISTS default_link (
+    id          INT AUTO_INCREMENT PRIMARY KEY,
+    dir_ground  DOUBLE NOT NULL,
+    tx_sat      DOUBLE NOT NULL,
+    suhu        DOUBLE NOT NULL,
+    bw          DOUBLE NOT NULL,
+    loss        DOUBLE NOT NULL,
+    ci_down     DOUBLE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS link (
+    id           INT AUTO_INCREMENT PRIMARY KEY,
+    id_beam      INT NOT NULL,
+    id_default   INT NOT NULL,
+    distance     DOUBLE NULL,
+    lat          DOUBLE NOT NULL,
+    lon          DOUBLE NOT NULL,
+    directivity  DOUBLE NULL,
+    cinr         DOUBLE NULL,
+    evaluasi     VARCHAR(64) NULL,
+    ci           DOUBLE NULL,
+    cn           DOUBLE NULL,
+    gt           DOUBLE NULL,
+    eirp         DOUBLE NULL,
+    fsl          DOUBLE NULL,
+    KEY ix_link_beam (id_beam),
+    KEY ix_link_default (id_default)
+);
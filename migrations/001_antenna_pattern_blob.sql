@@ -0,0 +1,21 @@
+-- Pola radiasi antena sebagai blob biner: satu baris per antena,
+-- dengan sumbu theta yang dipakai bersama lewat tabel theta_grid.
+
+CREATE TABLE IF NOT EXISTS theta_grid (
+    id      INT AUTO_INCREMENT PRIMARY KEY,
+    n       INT NOT NULL,
+    dtype   VARCHAR(8) NOT NULL,
+    digest  CHAR(40) NOT NULL,
+    data    MEDIUMBLOB NOT NULL,
+    UNIQUE KEY uq_theta_grid_digest (digest)
+);
+
+CREATE TABLE IF NOT EXISTS antena_pattern (
+    id_antena      INT PRIMARY KEY,
+    id_theta_grid  INT NOT NULL,
+    n              INT NOT NULL,
+    dtype          VARCHAR(8) NOT NULL,
+    data           MEDIUMBLOB NOT NULL,
+    CONSTRAINT fk_antena_pattern_antena FOREIGN KEY (id_antena) REFERENCES antena (id) ON DELETE CASCADE,
+    CONSTRAINT fk_antena_pattern_grid   FOREIGN KEY (id_theta_grid) REFERENCES theta_grid (id)
+);
@@ -0,0 +1,12 @@
+-- Kontur beam sebagai parameter elips: satu baris per (beam, level).
+-- Pusat elips = beam.clat/beam.clon; titik kontur dibangkitkan saat dibaca.
+
+CREATE TABLE IF NOT EXISTS beam_ellipse (
+    id_beam  INT NOT NULL,
+    level    INT NOT NULL,
+    major    DOUBLE NOT NULL,
+    minor    DOUBLE NOT NULL,
+    rot      DOUBLE NOT NULL,
+    PRIMARY KEY (id_beam, level),
+    CONSTRAINT fk_beam_ellipse_beam FOREIGN KEY (id_beam) REFERENCES beam (id) ON DELETE CASCADE
+);
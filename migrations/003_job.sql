@@ -0,0 +1,19 @@
+-- Antrean & status job latar belakang (jobs.py). Tidak butuh broker eksternal:
+-- web worker mencatat job di sini, process pool lokal yang mengerjakannya.
+
+CREATE TABLE IF NOT EXISTS job (
+    id           CHAR(32) PRIMARY KEY,
+    id_akun      INT NOT NULL,
+    kind         VARCHAR(64) NOT NULL,
+    status       VARCHAR(16) NOT NULL,
+    progress     DOUBLE NOT NULL DEFAULT 0,
+    message      VARCHAR(255) NULL,
+    params       LONGTEXT NULL,
+    result       LONGTEXT NULL,
+    error        TEXT NULL,
+    created_at   DATETIME NOT NULL,
+    started_at   DATETIME NULL,
+    updated_at   DATETIME NULL,
+    finished_at  DATETIME NULL,
+    KEY ix_job_akun (id_akun, created_at)
+);
@@ -0,0 +1,12 @@
+-- Versi data per akun untuk ETag / conditional GET (data_version.py). Dinaikkan di
+-- dalam transaksi setiap endpoint yang menulis satelit, antena, beam atau link.
+
+CREATE TABLE IF NOT EXISTS data_version (
+    id_akun  INT PRIMARY KEY,
+    version  BIGINT NOT NULL DEFAULT 0
+);
+
+-- Baris untuk akun yang sudah ada (idempoten)
+INSERT INTO data_version (id_akun, version)
+SELECT a.id, 0 FROM akun AS a
+WHERE NOT EXISTS (SELECT 1 FROM data_version AS d WHERE d.id_akun = a.id);
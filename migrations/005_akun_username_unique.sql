@@ -0,0 +1,10 @@
+-- Username unik di level database: /user/register tidak lagi bergantung pada SELECT
+-- sebelum INSERT (dua registrasi bersamaan bisa lolos pengecekan itu), INSERT kedua
+-- gagal dengan IntegrityError dan dijawab 400.
+--
+-- MySQL tidak mendukung IF NOT EXISTS untuk indeks, jadi di MySQL file ini dijalankan
+-- sekali. Username ganda yang sudah ada harus dibereskan dulu:
+--   SELECT username, COUNT(*) FROM akun GROUP BY username HAVING COUNT(*) > 1;
+-- Di SQLite (db_sqlite.py) statement ini diberi IF NOT EXISTS sehingga idempoten.
+
+CREATE UNIQUE INDEX ux_akun_username ON akun (username);
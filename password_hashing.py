@@ -0,0 +1,100 @@
+"""
+Hash password bcrypt di thread pool terbatas.
+
+bcrypt melepas GIL selama hashing, jadi menjalankannya di thread pool membuat thread
+request lain (gunicorn --threads) tetap jalan. Jumlah operasi yang berjalan sekaligus
+dibatasi HASH_WORKERS thread, dan yang boleh antre (termasuk yang berjalan) dibatasi
+HASH_MAX_PENDING per proses: burst login di atas itu langsung ditolak dengan HashBusy
+(HTTP 503) daripada menghabiskan CPU milik endpoint komputasi.
+
+Cost factor diatur lewat BCRYPT_ROUNDS. Hash lama dengan cost berbeda tetap valid dan
+di-hash ulang saat login berhasil (lihat needs_rehash).
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+HASH_WORKERS = int(os.getenv('HASH_WORKERS', 2))
+HASH_MAX_PENDING = int(os.getenv('HASH_MAX_PENDING', 16))
+HASH_WAIT_TIMEOUT = float(os.getenv('HASH_WAIT_TIMEOUT', 10))   # detik menunggu giliran di antrean
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(HASH_MAX_PENDING)
+
+# Hash pembanding untuk username yang tidak ada, supaya waktu jawab login sama
+# dengan password salah (tidak membocorkan username mana yang terdaftar)
+_DUMMY_HASH = None
+
+
+class HashBusy(Exception):
+    """Antrean hashing penuh atau waktu tunggu habis; coba lagi nanti."""
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+        return _executor
+
+
+def _run(fn, *args):
+    if not _pending.acquire(blocking=False):
+        raise HashBusy("Too many concurrent password operations.")
+    try:
+        future = _get_executor().submit(fn, *args)
+    except BaseException:
+        _pending.release()
+        raise
+    # Slot baru dikembalikan saat hash benar-benar selesai (atau dibatalkan sebelum
+    # mulai): hash yang sudah berjalan tidak berhenti walaupun pemanggilnya timeout
+    future.add_done_callback(lambda f: _pending.release())
+    try:
+        return future.result(timeout=HASH_WAIT_TIMEOUT)
+    except FutureTimeout:
+        future.cancel()
+        raise HashBusy("Timed out waiting for a password hashing slot.")
+
+
+def _to_bytes(value):
+    return value.encode('utf-8') if isinstance(value, str) else bytes(value)
+
+
+def hash_password(password):
+    """Hash bcrypt (str) dengan cost BCRYPT_ROUNDS."""
+    hashed = _run(lambda pw: bcrypt.hashpw(pw, bcrypt.gensalt(rounds=BCRYPT_ROUNDS)), _to_bytes(password))
+    return hashed.decode('ascii')
+
+
+def _checkpw(password, hashed):
+    try:
+        return bcrypt.checkpw(password, hashed)
+    except ValueError:
+        return False    # bukan hash bcrypt yang valid
+
+
+def verify_password(password, hashed):
+    """True jika password cocok. hashed=None (akun tidak ada) tetap memakan satu hash."""
+    global _DUMMY_HASH
+    if hashed is None:
+        if _DUMMY_HASH is None:
+            _DUMMY_HASH = hash_password("dummy-password")
+        _run(_checkpw, _to_bytes(password), _to_bytes(_DUMMY_HASH))
+        return False
+    return _run(_checkpw, _to_bytes(password), _to_bytes(hashed))
+
+
+def hash_rounds(hashed):
+    """Cost factor yang tersimpan di hash bcrypt ($2b$<rounds>$...), atau None."""
+    try:
+        return int(_to_bytes(hashed).split(b'$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def needs_rehash(hashed):
+    return hash_rounds(hashed) != BCRYPT_ROUNDS
@@ -0,0 +1,168 @@
+"""
+Cache LRU per proses untuk pola radiasi antena beserta fungsi interpolasinya.
+
+Setiap entri menyimpan array theta/gain, atribut antena yang dipakai link budget
+(directivity, eff, frekuensi), serta dua interpolator yang sudah jadi:
+  - forward  : theta (deg) -> gain relatif (dB)
+  - inverse  : gain relatif (dB) -> theta (deg)
+Dengan begitu argsort/np.unique/interp1d cukup dijalankan sekali per antena.
+
+Ukuran cache diatur lewat env PATTERN_CACHE_SIZE (jumlah antena, default 256).
+Panggil `invalidate(ant_id)` setiap kali data antena berubah.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from scipy.interpolate import interp1d
+
+from koneksi import get_conn
+import pattern_store
+
+PATTERN_CACHE_SIZE = int(os.getenv('PATTERN_CACHE_SIZE', 256))
+
+
+def build_forward_interpolator(theta_deg, gain_dB):
+    """Interpolator theta -> gain. Data diurutkan menurut theta dan diduplikasi-bersihkan."""
+    theta_deg = np.asarray(theta_deg, dtype=float)
+    gain_dB = np.asarray(gain_dB, dtype=float)
+    unique_thetas, unique_indices = np.unique(theta_deg, return_index=True)
+    unique_gains = gain_dB[unique_indices]
+    if len(unique_thetas) < 2:
+        return None
+    return interp1d(unique_thetas, unique_gains, kind='linear', bounds_error=False, fill_value="extrapolate")
+
+
+def build_inverse_interpolator(gain_dB, theta_deg):
+    """
+    Interpolator gain -> theta. Untuk gain yang sama dipakai theta terkecil,
+    sama seperti beam_api.create_inverse_interpolator.
+    """
+    gain_dB = np.asarray(gain_dB, dtype=float)
+    theta_deg = np.asarray(theta_deg, dtype=float)
+    order = np.lexsort((theta_deg, gain_dB))
+    unique_gains, unique_indices = np.unique(gain_dB[order], return_index=True)
+    unique_thetas = theta_deg[order][unique_indices]
+    if len(unique_gains) < 2:
+        raise ValueError("Not enough unique data points to create interpolation function.")
+    return interp1d(unique_gains, unique_thetas, kind='linear', fill_value="extrapolate", bounds_error=False)
+
+
+class AntennaPattern:
+    """Pola radiasi satu antena yang siap dipakai untuk interpolasi."""
+
+    __slots__ = ('id', 'directivity', 'eff', 'frekuensi', 'theta_deg', 'gain_dB', '_forward', '_inverse')
+
+    def __init__(self, ant_id, directivity, eff, frekuensi, theta_deg, gain_dB):
+        self.id = ant_id
+        self.directivity = directivity
+        self.eff = eff
+        self.frekuensi = frekuensi
+        self.theta_deg = theta_deg
+        self.gain_dB = gain_dB
+        self._forward = build_forward_interpolator(theta_deg, gain_dB)
+        self._inverse = None  # dibuat saat pertama kali dibutuhkan (hanya dipakai beam_api)
+
+    def gain_at(self, theta_deg):
+        """Gain relatif (dB) pada sudut off-axis theta. Menerima skalar maupun array."""
+        if self._forward is None:
+            fallback = self.gain_dB[0] if len(self.gain_dB) > 0 else -99.0
+            return np.full(np.shape(theta_deg), fallback) if np.ndim(theta_deg) else fallback
+        result = self._forward(theta_deg)
+        return float(result) if np.ndim(theta_deg) == 0 else result
+
+    def theta_at(self, gain_dB):
+        """Sudut theta (deg) di mana pola turun ke level gain tertentu. Skalar atau array."""
+        if self._inverse is None:
+            self._inverse = build_inverse_interpolator(self.gain_dB, self.theta_deg)
+        result = self._inverse(gain_dB)
+        return float(result) if np.ndim(gain_dB) == 0 else result
+
+
+class PatternCache:
+    def __init__(self, maxsize=PATTERN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.load_seconds = 0.0
+
+    def get(self, ant_id, conn=None):
+        """
+        Kembalikan AntennaPattern untuk ant_id, memuat dari database jika belum ada.
+        None jika antena tidak ditemukan; ValueError jika antena tidak punya data pola.
+        """
+        ant_id = int(ant_id)
+        with self._lock:
+            entry = self._entries.get(ant_id)
+            if entry is not None:
+                self._entries.move_to_end(ant_id)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        started = time.perf_counter()
+        entry = self._load(ant_id, conn)
+        elapsed = time.perf_counter() - started
+        if entry is None:
+            return None
+
+        with self._lock:
+            self.load_seconds += elapsed
+            self._entries[ant_id] = entry
+            self._entries.move_to_end(ant_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def _load(self, ant_id, conn):
+        if conn is None:
+            with get_conn() as own_conn:
+                return self._load(ant_id, own_conn)
+        cur = conn.cursor(dictionary=True)
+        row = pattern_store.load_antenna(cur, ant_id)
+        cur.close()
+        if row is None:
+            return None
+        if row['theta_deg'] is None:
+            raise ValueError(f"No pattern data found for antenna ID {ant_id}")
+        return AntennaPattern(
+            ant_id, row['directivity'], row['eff'], row['frekuensi'],
+            row['theta_deg'], row['pattern_dB']
+        )
+
+    def invalidate(self, ant_id=None):
+        """Buang satu antena dari cache, atau seluruh cache jika ant_id None."""
+        with self._lock:
+            if ant_id is None:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+            elif self._entries.pop(int(ant_id), None) is not None:
+                self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "load_seconds": round(self.load_seconds, 6),
+            }
+
+
+# Instance tunggal per proses (per worker gunicorn)
+pattern_cache = PatternCache()
+get = pattern_cache.get
+invalidate = pattern_cache.invalidate
+stats = pattern_cache.stats
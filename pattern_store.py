@@ -0,0 +1,227 @@
+"""
+Penyimpanan pola radiasi antena dalam bentuk array biner (BLOB).
+
+Satu antena = satu baris di tabel `antena_pattern` yang berisi nilai gain (dB)
+sebagai array float yang dipadatkan, ditambah referensi ke tabel `theta_grid`.
+Grid theta dipakai bersama oleh semua antena yang memakai sumbu sudut yang sama
+(default: linspace(0, 12, 1000)), sehingga cukup disimpan sekali.
+
+Antena lama yang masih memakai tabel `theta`/`pattern` (satu baris per sampel)
+tetap terbaca lewat jalur legacy sampai dimigrasi dengan `migrate_patterns.py`.
+"""
+import hashlib
+import os
+import threading
+
+import numpy as np
+from mysql.connector import IntegrityError
+
+# dtype disimpan eksplisit per baris supaya float32 dan float64 bisa hidup berdampingan
+PATTERN_DTYPE = np.dtype(os.getenv('PATTERN_DTYPE', 'float64')).newbyteorder('<')
+THETA_DTYPE = np.dtype('<f8')
+
+# Fragmen SQL untuk mengambil blob pola bersamaan dengan baris antena (satu round-trip)
+PATTERN_COLUMNS = "ap.dtype AS pattern_dtype, ap.data AS pattern_data, tg.dtype AS theta_dtype, tg.data AS theta_data"
+PATTERN_JOIN = """
+    LEFT JOIN antena_pattern AS ap ON ap.id_antena = {alias}.id
+    LEFT JOIN theta_grid AS tg ON tg.id = ap.id_theta_grid
+"""
+
+# Cache id grid theta per proses: digest -> id (hanya id yang dibaca lewat SELECT)
+_theta_grid_ids = {}
+_theta_grid_lock = threading.Lock()
+
+
+def pack_array(values, dtype):
+    """Ubah array menjadi bytes little-endian dengan dtype tertentu."""
+    return np.ascontiguousarray(values, dtype=dtype).tobytes()
+
+
+def unpack_array(data, dtype):
+    """Kebalikan dari pack_array. Mengembalikan array float64 (salinan, writable)."""
+    return np.frombuffer(bytes(data), dtype=np.dtype(dtype)).astype(np.float64)
+
+
+def get_theta_grid_id(cur, theta):
+    """
+    Cari (atau buat) baris `theta_grid` untuk sumbu theta ini dan kembalikan id-nya.
+    Grid diidentifikasi dengan SHA-1 dari isi biner-nya.
+    """
+    data = pack_array(theta, THETA_DTYPE)
+    digest = hashlib.sha1(data).hexdigest()
+
+    with _theta_grid_lock:
+        grid_id = _theta_grid_ids.get(digest)
+    if grid_id is not None:
+        return grid_id
+
+    cur.execute("SELECT id FROM theta_grid WHERE digest = %s", (digest,))
+    row = cur.fetchone()
+    if not row:
+        try:
+            cur.execute(
+                "INSERT INTO theta_grid (n, dtype, digest, data) VALUES (%s, %s, %s, %s)",
+                (len(theta), THETA_DTYPE.str, digest, data)
+            )
+        except IntegrityError:
+            # Worker lain menyimpan grid yang sama lebih dulu (uq_theta_grid_digest). Locking
+            # read supaya baris yang baru di-commit terlihat dari snapshot REPEATABLE READ
+            cur.execute("SELECT id FROM theta_grid WHERE digest = %s LOCK IN SHARE MODE", (digest,))
+            row = cur.fetchone()
+        else:
+            # Baris baru belum di-commit (transaksi pemanggil bisa rollback), jadi id-nya
+            # tidak di-cache; pemanggilan berikutnya membacanya lewat SELECT
+            return cur.lastrowid
+
+    grid_id = row['id'] if isinstance(row, dict) else row[0]
+    with _theta_grid_lock:
+        _theta_grid_ids[digest] = grid_id
+    return grid_id
+
+
+def store_pattern(cur, ant_id, theta, pattern):
+    """Simpan pola radiasi satu antena sebagai satu baris blob."""
+    if len(theta) != len(pattern):
+        raise ValueError(
+            f"Data mismatch for antenna ID {ant_id}. "
+            f"Got {len(theta)} theta points but {len(pattern)} pattern points."
+        )
+    grid_id = get_theta_grid_id(cur, theta)
+    cur.execute(
+        "INSERT INTO antena_pattern (id_antena, id_theta_grid, n, dtype, data) VALUES (%s, %s, %s, %s, %s)",
+        (ant_id, grid_id, len(pattern), PATTERN_DTYPE.str, pack_array(pattern, PATTERN_DTYPE))
+    )
+
+
+def decode_pattern_row(row):
+    """
+    Ubah kolom PATTERN_COLUMNS dari satu baris (dictionary cursor) menjadi
+    (theta_deg, pattern_dB) sebagai array numpy. (None, None) jika antena belum
+    punya blob (masih format legacy).
+    """
+    if row.get('pattern_data') is None or row.get('theta_data') is None:
+        return None, None
+    theta = unpack_array(row['theta_data'], row['theta_dtype'])
+    pattern = unpack_array(row['pattern_data'], row['pattern_dtype'])
+    if len(theta) != len(pattern):
+        raise ValueError(
+            f"Data mismatch for antenna ID {row.get('id')}. "
+            f"Found {len(theta)} theta points but {len(pattern)} pattern points. "
+            "Please check database integrity."
+        )
+    return theta, pattern
+
+
+def load_legacy_pattern(cur, ant_id):
+    """Baca pola dari tabel lama `theta`/`pattern` (satu baris per sampel)."""
+    cur.execute("SELECT deg FROM theta WHERE id_antena = %s ORDER BY id", (ant_id,))
+    theta = [row['deg'] for row in cur.fetchall()]
+    cur.execute("SELECT deg FROM pattern WHERE id_antena = %s ORDER BY id", (ant_id,))
+    pattern = [row['deg'] for row in cur.fetchall()]
+
+    if len(theta) != len(pattern):
+        raise ValueError(
+            f"Data mismatch for antenna ID {ant_id}. "
+            f"Found {len(theta)} theta points but {len(pattern)} pattern points. "
+            "Please check database integrity."
+        )
+    if not theta:
+        return None, None
+    return np.array(theta, dtype=float), np.array(pattern, dtype=float)
+
+
+def load_legacy_patterns(cur, ant_ids, errors=None):
+    """
+    Versi set-based dari load_legacy_pattern untuk banyak antena sekaligus: dua query
+    (theta & pattern) untuk semua id, lalu dikelompokkan di memori.
+    Mengembalikan dict id_antena -> (theta_deg, pattern_dB); antena tanpa data dilewati.
+    Jumlah theta dan pattern yang berbeda -> ValueError, atau bila dict `errors`
+    diberikan, pesannya dicatat di sana (id_antena -> pesan) dan antena itu dilewati.
+    """
+    ant_ids = [int(i) for i in ant_ids]
+    if not ant_ids:
+        return {}
+    placeholders = ", ".join(["%s"] * len(ant_ids))
+    grouped = []
+    for table in ("theta", "pattern"):
+        cur.execute(
+            f"SELECT id_antena, deg FROM {table} WHERE id_antena IN ({placeholders}) ORDER BY id_antena, id",
+            ant_ids
+        )
+        rows = cur.fetchall()
+        owner = np.array([row['id_antena'] for row in rows], dtype=np.int64)
+        values = np.array([row['deg'] for row in rows], dtype=float)
+        ids, starts = np.unique(owner, return_index=True)
+        grouped.append(dict(zip(ids.tolist(), np.split(values, starts[1:]))))
+
+    theta_by_id, pattern_by_id = grouped
+    result = {}
+    for ant_id in set(theta_by_id) | set(pattern_by_id):
+        theta = theta_by_id.get(ant_id, np.empty(0))
+        pattern = pattern_by_id.get(ant_id, np.empty(0))
+        if len(theta) != len(pattern):
+            err = ValueError(
+                f"Data mismatch for antenna ID {ant_id}. "
+                f"Found {len(theta)} theta points but {len(pattern)} pattern points. "
+                "Please check database integrity."
+            )
+            if errors is None:
+                raise err
+            errors[ant_id] = str(err)
+            continue
+        result[ant_id] = (theta, pattern)
+    return result
+
+
+def load_pattern(cur, ant_id):
+    """
+    Ambil (theta_deg, pattern_dB) untuk satu antena. Cursor harus dictionary cursor.
+    Format blob hanya butuh satu query; antena yang belum dimigrasi jatuh ke jalur legacy.
+    """
+    cur.execute(
+        f"""
+        SELECT a.id, {PATTERN_COLUMNS}
+        FROM antena AS a
+        {PATTERN_JOIN.format(alias='a')}
+        WHERE a.id = %s
+        """,
+        (ant_id,)
+    )
+    row = cur.fetchone()
+    if not row:
+        return None, None
+    theta, pattern = decode_pattern_row(row)
+    if theta is None:
+        return load_legacy_pattern(cur, ant_id)
+    return theta, pattern
+
+
+def load_antenna(cur, ant_id):
+    """
+    Ambil atribut antena (directivity, eff, frekuensi) beserta pola radiasinya
+    dalam satu query. Mengembalikan dict dengan key tambahan `theta_deg` dan
+    `pattern_dB` (array numpy), atau None jika antena tidak ada.
+    """
+    cur.execute(
+        f"""
+        SELECT a.id, a.directivity, a.eff, a.frekuensi, {PATTERN_COLUMNS}
+        FROM antena AS a
+        {PATTERN_JOIN.format(alias='a')}
+        WHERE a.id = %s
+        """,
+        (ant_id,)
+    )
+    row = cur.fetchone()
+    if not row:
+        return None
+    theta, pattern = decode_pattern_row(row)
+    if theta is None:
+        theta, pattern = load_legacy_pattern(cur, ant_id)
+    return {
+        'id': row['id'],
+        'directivity': row['directivity'],
+        'eff': row['eff'],
+        'frekuensi': row['frekuensi'],
+        'theta_deg': theta,
+        'pattern_dB': pattern,
+    }
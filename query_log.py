@@ -0,0 +1,91 @@
+"""
+Slow-query log dan statistik per fingerprint SQL.
+
+Setiap statement yang lewat koneksi.TimedCursor dinormalisasi menjadi fingerprint
+(literal, placeholder dan daftar IN (...) / VALUES (...) diganti `?`), lalu dicatat:
+jumlah eksekusi, total/max waktu, dan total baris. Statement yang lebih lambat dari
+SLOW_QUERY_MS dicatat ke logger `slow_query` beserta jumlah barisnya.
+
+Statistik disimpan per proses (per worker gunicorn). Jumlah fingerprint dibatasi
+QUERY_STATS_MAX; sisanya digabung ke fingerprint "<other>".
+"""
+import logging
+import os
+import re
+import threading
+
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+QUERY_STATS_MAX = int(os.getenv('QUERY_STATS_MAX', 500))
+
+logger = logging.getLogger('slow_query')
+
+_COMMENT = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b", re.I)
+_PLACEHOLDER = re.compile(r"%s|%\(\w+\)s")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_VALUES = re.compile(r"(values\s*\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+")
+_SPACE = re.compile(r"\s+")
+
+_fingerprints = {}
+_lock = threading.Lock()
+
+
+def fingerprint(sql):
+    """Bentuk normal statement: huruf kecil, tanpa literal/komentar, spasi dirapikan."""
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode('utf-8', 'replace')
+    sql = _COMMENT.sub(" ", sql)
+    sql = _STRING.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _SPACE.sub(" ", sql).strip().lower()
+    sql = _LIST.sub("(...)", sql)
+    return _VALUES.sub(r"\1", sql)
+
+
+def record(sql, seconds, rowcount):
+    """Pendengar query untuk koneksi.add_query_listener."""
+    fp = fingerprint(sql)
+    rows = rowcount if rowcount is not None and rowcount >= 0 else 0
+    with _lock:
+        stats = _fingerprints.get(fp)
+        if stats is None:
+            if len(_fingerprints) >= QUERY_STATS_MAX:
+                fp = "<other>"
+                stats = _fingerprints.get(fp)
+            if stats is None:
+                stats = _fingerprints[fp] = {"count": 0, "total_s": 0.0, "max_s": 0.0, "rows": 0, "slow": 0}
+        stats["count"] += 1
+        stats["total_s"] += seconds
+        stats["max_s"] = max(stats["max_s"], seconds)
+        stats["rows"] += rows
+        slow = seconds * 1000 >= SLOW_QUERY_MS
+        if slow:
+            stats["slow"] += 1
+
+    if slow:
+        text = sql.decode('utf-8', 'replace') if isinstance(sql, (bytes, bytearray)) else sql
+        logger.warning("slow query %.1f ms, rows=%s: %s", seconds * 1000, rowcount, _SPACE.sub(" ", text).strip()[:1000])
+
+
+SORT_KEYS = ("total_s", "max_s", "mean_s", "count", "rows", "slow")
+
+
+def top(n=20, sort="total_s"):
+    """n fingerprint teratas menurut `sort` (salah satu SORT_KEYS)."""
+    with _lock:
+        items = [
+            {"fingerprint": fp, **stats, "mean_s": stats["total_s"] / stats["count"]}
+            for fp, stats in _fingerprints.items()
+        ]
+    items.sort(key=lambda item: item[sort], reverse=True)
+    for item in items:
+        for key in ("total_s", "max_s", "mean_s"):
+            item[key] = round(item[key], 6)
+    return items[:n]
+
+
+def reset():
+    with _lock:
+        _fingerprints.clear()
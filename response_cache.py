@@ -0,0 +1,224 @@
+"""
+Cache byte respons jadi (sudah di-encode) untuk GET berat milik akun, mis.
+get-beams-with-contours: query kontur, dict per titik dan jsonify cukup sekali per
+versi data akun.
+
+Key = (id_akun, digest representasi + encoding), nilai = versi data + mimetype +
+Content-Encoding + byte body yang siap dikirim, jadi kompresi (compression.py) juga
+cukup sekali per versi (lihat data_version.conditional_get). Versi dari data_version dibagi semua worker,
+jadi penulisan di worker mana pun langsung membuat entri lama tidak terpakai; bump()
+juga membuang entri akun itu supaya memorinya segera kembali.
+
+Dua penyimpanan, dibatasi total byte RESPONSE_CACHE_BYTES (0 = nonaktif):
+  - memori proses (default): LRU per worker gunicorn
+  - RESPONSE_CACHE_DIR: satu file per entri di direktori lokal yang dipakai bersama
+    semua worker (tulis atomik lewat os.replace; yang paling lama tidak dibaca dibuang)
+Respons lebih besar dari RESPONSE_CACHE_MAX_ENTRY tidak disimpan.
+"""
+import glob
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+RESPONSE_CACHE_BYTES = int(os.getenv('RESPONSE_CACHE_BYTES', 128 * 1024 * 1024))
+RESPONSE_CACHE_MAX_ENTRY = int(os.getenv('RESPONSE_CACHE_MAX_ENTRY', RESPONSE_CACHE_BYTES // 4))
+RESPONSE_CACHE_DIR = os.getenv('RESPONSE_CACHE_DIR')
+
+
+class CachedResponse:
+    __slots__ = ('version', 'mimetype', 'encoding', 'body')
+
+    def __init__(self, version, mimetype, encoding, body):
+        self.version = version
+        self.mimetype = mimetype
+        self.encoding = encoding    # Content-Encoding body, atau None
+        self.body = body
+
+
+class MemoryStore:
+    """LRU per proses, dibatasi total ukuran body."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            self._entries[key] = entry
+            self._bytes += len(entry.body)
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+
+    def invalidate(self, id_akun=None):
+        with self._lock:
+            keys = list(self._entries) if id_akun is None else [k for k in self._entries if k[0] == id_akun]
+            for key in keys:
+                self._bytes -= len(self._entries.pop(key).body)
+
+    def usage(self):
+        with self._lock:
+            return len(self._entries), self._bytes
+
+
+class DiskStore:
+    """
+    Satu file per entri: baris header "<versi> <encoding atau -> <mimetype>\\n" lalu body. Dibagi antar
+    proses; batas byte ditegakkan saat menulis dengan membuang file yang paling lama
+    tidak dibaca (waktu baca dicatat di mtime lewat os.utime, karena atime sering
+    dimatikan dengan noatime).
+    """
+
+    SUFFIX = '.resp'
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key[0]}-{key[1]}{self.SUFFIX}")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                header = f.readline().decode('ascii').rstrip('\n').split(' ', 2)
+                body = f.read()
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        if len(header) != 3:
+            return None
+        version, encoding, mimetype = header
+        return CachedResponse(int(version), mimetype, None if encoding == '-' else encoding, body)
+
+    def put(self, key, entry):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(f"{entry.version} {entry.encoding or '-'} {entry.mimetype}\n".encode('ascii'))
+                f.write(entry.body)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            return
+        self._prune()
+
+    def _files(self):
+        files = []
+        for path in glob.glob(os.path.join(self.directory, '*' + self.SUFFIX)):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue    # sudah dihapus proses lain
+            files.append((st.st_mtime, st.st_size, path))
+        return files
+
+    def _prune(self):
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            total -= size
+
+    def invalidate(self, id_akun=None):
+        pattern = '*' if id_akun is None else f"{id_akun}-*"
+        for path in glob.glob(os.path.join(self.directory, pattern + self.SUFFIX)):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def usage(self):
+        files = self._files()
+        return len(files), sum(size for _, size, _ in files)
+
+
+class ResponseCache:
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.skipped = 0
+
+    def get(self, id_akun, digest, version):
+        """CachedResponse untuk versi ini, atau None."""
+        if self.store is None:
+            return None
+        entry = self.store.get((str(id_akun), digest))
+        hit = entry is not None and entry.version == version
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry if hit else None
+
+    def put(self, id_akun, digest, version, mimetype, body, encoding=None):
+        if self.store is None:
+            return
+        if len(body) > RESPONSE_CACHE_MAX_ENTRY:
+            with self._lock:
+                self.skipped += 1
+            return
+        self.store.put((str(id_akun), digest), CachedResponse(version, mimetype, encoding, bytes(body)))
+        with self._lock:
+            self.stored += 1
+
+    def invalidate(self, id_akun=None):
+        if self.store is not None:
+            self.store.invalidate(None if id_akun is None else str(id_akun))
+
+    def stats(self):
+        entries, size = self.store.usage() if self.store is not None else (0, 0)
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self.store).__name__ if self.store is not None else None,
+                "entries": entries,
+                "bytes": size,
+                "max_bytes": RESPONSE_CACHE_BYTES,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "stored": self.stored,
+                "skipped_too_large": self.skipped,
+            }
+
+
+def _make_store():
+    if RESPONSE_CACHE_BYTES <= 0:
+        return None
+    if RESPONSE_CACHE_DIR:
+        return DiskStore(RESPONSE_CACHE_DIR, RESPONSE_CACHE_BYTES)
+    return MemoryStore(RESPONSE_CACHE_BYTES)
+
+
+# Instance tunggal per proses (isi dibagi antar worker hanya dengan RESPONSE_CACHE_DIR)
+response_cache = ResponseCache(_make_store())
+get = response_cache.get
+put = response_cache.put
+invalidate = response_cache.invalidate
+stats = response_cache.stats
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity  # Pastikan sudah di-import
 from koneksi import get_conn, Error
+import data_version
 
 satellite_blueprint = Blueprint('satellite', __name__)
 
@@ -31,6 +32,7 @@ def store_satellite():
             # Insert satellite data along with the id_akun from JWT
             query = "INSERT INTO satelite (lat, lon, alt, id_akun) VALUES (%s, %s, %s, %s)"
             cur.execute(query, (lat, lon, alt, id_akun_login))
+            data_version.bump(cur, id_akun_login)
             conn.commit()
             return jsonify({"message": "Satellite stored successfully!"}), 201
     except Error as err:
@@ -105,6 +107,7 @@ def update_satellite():
                 return jsonify({"error": "No satellite found for this user to update. Please create one first."}), 404
             
             # Jika berhasil, commit perubahan
+            data_version.bump(cur, id_akun_login)
             conn.commit()
             return jsonify({"message": "Satellite updated successfully."}), 200
             
@@ -0,0 +1,196 @@
+"""
+Tes backend SQLite (db_sqlite.py): terjemahan SQL/DDL dialek MySQL dan bagian API
+mysql-connector yang ditiru (cursor dictionary/buffered, lastrowid, pembungkusan error).
+
+    python -m pytest -q tests
+"""
+import datetime
+import os
+import re
+import sys
+
+import pytest
+from mysql.connector import errors
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_sqlite  # noqa: E402
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = db_sqlite.connect(str(tmp_path / "test.sqlite3"))
+    yield conn
+    conn.close()
+
+
+def _insert_account(cur, username):
+    cur.execute("INSERT INTO akun (username, password) VALUES (%s, %s)", (username, "hash"))
+    return cur.lastrowid
+
+
+# --- Terjemahan SQL ---
+@pytest.mark.parametrize("mysql_sql, sqlite_sql", [
+    ("SELECT id FROM akun WHERE username = %s", "SELECT id FROM akun WHERE username = ?"),
+    ("SELECT * FROM beam WHERE id = %(id)s", "SELECT * FROM beam WHERE id = :id"),
+    ("UPDATE job SET updated_at = NOW() WHERE id = %s", "UPDATE job SET updated_at = datetime('now', 'localtime') WHERE id = ?"),
+    ("SELECT @@SESSION.auto_increment_increment", "SELECT 1"),
+    ("SELECT @@auto_increment_increment", "SELECT 1"),
+    ("SELECT id FROM theta_grid WHERE digest = %s LOCK IN SHARE MODE", "SELECT id FROM theta_grid WHERE digest = ?"),
+    ("SELECT id FROM job WHERE id = %s FOR UPDATE", "SELECT id FROM job WHERE id = ?"),
+    ("SELECT name FROM antena WHERE name LIKE 'ant%%'", "SELECT name FROM antena WHERE name LIKE 'ant%'"),
+])
+def test_translate(mysql_sql, sqlite_sql):
+    assert db_sqlite.translate(mysql_sql) == sqlite_sql
+
+
+def test_translate_ddl_create_table():
+    statements = db_sqlite.translate_ddl("""
+        CREATE TABLE IF NOT EXISTS beam (
+            id         INT AUTO_INCREMENT PRIMARY KEY,
+            id_antena  INT NOT NULL,
+            clat       DOUBLE NOT NULL,
+            label      VARCHAR(64) NOT NULL,
+            FOREIGN KEY (id_antena) REFERENCES antena(id),
+            KEY ix_beam_clat (clat),
+            UNIQUE KEY ux_beam_label (label)
+        )
+    """)
+    create, indexes = statements[0], statements[1:]
+    assert create.startswith("CREATE TABLE IF NOT EXISTS beam (")
+    assert re.search(r"\bid\s+INTEGER PRIMARY KEY AUTOINCREMENT,", create)
+    assert "KEY ix_beam_clat" not in create
+    assert sorted(indexes) == sorted([
+        "CREATE INDEX IF NOT EXISTS ix_beam_id_antena ON beam (id_antena)",
+        "CREATE INDEX IF NOT EXISTS ix_beam_clat ON beam (clat)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_beam_label ON beam (label)",
+    ])
+
+
+@pytest.mark.parametrize("mysql_ddl, sqlite_ddl", [
+    ("CREATE UNIQUE INDEX ux_akun_username ON akun (username)",
+     "CREATE UNIQUE INDEX IF NOT EXISTS ux_akun_username ON akun (username)"),
+    ("CREATE INDEX ix_link_beam ON link (id_beam, id)",
+     "CREATE INDEX IF NOT EXISTS ix_link_beam ON link (id_beam, id)"),
+    ("INSERT INTO data_version (id_akun, version) SELECT id, 0 FROM akun",
+     "INSERT INTO data_version (id_akun, version) SELECT id, 0 FROM akun"),
+])
+def test_translate_ddl_statements(mysql_ddl, sqlite_ddl):
+    assert db_sqlite.translate_ddl(mysql_ddl) == [sqlite_ddl]
+
+
+def test_split_script_drops_comments():
+    script = "-- komentar; dengan titik koma\nCREATE TABLE a (id INT);\n\n-- lagi\nCREATE INDEX ix ON a (id);\n"
+    assert [s.strip() for s in db_sqlite.split_script(script)] == ["CREATE TABLE a (id INT)", "CREATE INDEX ix ON a (id)"]
+
+
+# --- Skema ---
+def test_schema_is_idempotent(tmp_path):
+    path = str(tmp_path / "twice.sqlite3")
+    db_sqlite.connect(path).close()
+    # Seperti proses baru: semua migrasi dijalankan lagi pada file yang sama
+    db_sqlite._schema_ready.discard(path)
+    conn = db_sqlite.connect(path)
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM default_link WHERE id = 1")
+    assert cur.fetchone() == (1,)
+    cur.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'akun'")
+    assert [row[0] for row in cur.fetchall()] == ["ux_akun_username"]
+    conn.close()
+
+
+# --- Cursor ---
+def test_insert_lastrowid(conn):
+    cur = conn.cursor()
+    first = _insert_account(cur, "a")
+    second = _insert_account(cur, "b")
+    assert second == first + 1
+
+
+def test_executemany_lastrowid_is_first_id(conn):
+    cur = conn.cursor()
+    before = _insert_account(cur, "before")
+    cur.executemany("INSERT INTO akun (username, password) VALUES (%s, %s)", [(f"u{i}", "hash") for i in range(5)])
+    assert cur.rowcount == 5
+    assert cur.lastrowid == before + 1
+    cur.execute("SELECT id FROM akun WHERE username = %s", ("u0",))
+    assert cur.fetchone() == (before + 1,)
+
+
+def test_dictionary_cursor(conn):
+    cur = conn.cursor(dictionary=True)
+    account_id = _insert_account(cur, "dict")
+    cur.execute("SELECT id, username FROM akun WHERE id = %s", (account_id,))
+    assert cur.column_names == ("id", "username")
+    assert cur.fetchone() == {"id": account_id, "username": "dict"}
+    assert cur.fetchone() is None
+
+
+def test_buffered_and_unbuffered_cursor(conn):
+    cur = conn.cursor()
+    cur.executemany("INSERT INTO akun (username, password) VALUES (%s, %s)", [(f"u{i}", "hash") for i in range(4)])
+
+    buffered = conn.cursor()
+    buffered.execute("SELECT username FROM akun ORDER BY id")
+    assert buffered.rowcount == 4
+    assert buffered.fetchmany(3) == [("u0",), ("u1",), ("u2",)]
+    assert list(buffered) == [("u3",)]
+
+    unbuffered = conn.cursor(dictionary=True, buffered=False)
+    unbuffered.execute("SELECT username FROM akun ORDER BY id")
+    assert unbuffered.rowcount == -1
+    assert unbuffered.fetchone() == {"username": "u0"}
+    assert unbuffered.fetchall() == [{"username": "u1"}, {"username": "u2"}, {"username": "u3"}]
+
+
+def test_update_rowcount(conn):
+    cur = conn.cursor()
+    _insert_account(cur, "a")
+    _insert_account(cur, "b")
+    cur.execute("UPDATE akun SET password = %s WHERE username IN (%s, %s)", ("x", "a", "missing"))
+    assert cur.rowcount == 1
+
+
+def test_datetime_and_varchar_columns(conn):
+    cur = conn.cursor(dictionary=True)
+    cur.execute(
+        "INSERT INTO job (id, id_akun, kind, status, progress, created_at) VALUES (%s, 1, %s, %s, 0, NOW())",
+        ("a" * 32, "store_beams", "queued")
+    )
+    cur.execute("SELECT id, kind, created_at FROM job")
+    row = cur.fetchone()
+    assert row["id"] == "a" * 32 and row["kind"] == "store_beams"
+    assert isinstance(row["created_at"], datetime.datetime)
+
+
+def test_rollback(conn):
+    cur = conn.cursor()
+    _insert_account(cur, "gone")
+    conn.rollback()
+    cur.execute("SELECT COUNT(*) FROM akun")
+    assert cur.fetchone() == (0,)
+
+
+# --- Error ---
+def test_integrity_error_is_wrapped(conn):
+    cur = conn.cursor()
+    _insert_account(cur, "same")
+    with pytest.raises(errors.IntegrityError) as excinfo:
+        _insert_account(cur, "same")
+    assert isinstance(excinfo.value, errors.Error)
+    assert "sqlite" in str(excinfo.value)
+
+
+def test_syntax_error_is_wrapped(conn):
+    cur = conn.cursor()
+    with pytest.raises(errors.Error):
+        cur.execute("SELEC 1")
+    with pytest.raises(errors.OperationalError):
+        cur.execute("SELECT * FROM missing_table")
+
+
+def test_closed_connection_is_not_connected(tmp_path):
+    conn = db_sqlite.connect(str(tmp_path / "closed.sqlite3"))
+    assert conn.is_connected()
+    conn.close()
+    assert not conn.is_connected()
@@ -1,11 +1,20 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token
 from koneksi import get_conn, Error  # pool koneksi dari db.py
-import bcrypt
+from mysql.connector import IntegrityError
+import password_hashing
+import data_version
+from password_hashing import HashBusy
 
 # Create the akun blueprint
 user_blueprint = Blueprint('user', __name__)
 
+
+def busy_response(err):
+    """503 saat antrean hashing penuh, dengan Retry-After supaya klien mundur sebentar."""
+    return jsonify({"error": f"Server busy, please retry shortly. ({err})"}), 503, {"Retry-After": "1"}
+
+
 # --- 1. User Registration Endpoint ---
 @user_blueprint.route('/register', methods=['POST'])
 def register():
@@ -22,29 +31,35 @@ def register():
     try:
         with get_conn() as conn:
             cur = conn.cursor(dictionary=True)
-            cur.execute("SELECT * FROM akun WHERE username = %s", (username,))
+            cur.execute("SELECT id FROM akun WHERE username = %s", (username,))
             existing_user = cur.fetchone()
 
-            if existing_user:
-                return jsonify({"error": "Username already exists."}), 400
+        if existing_user:
+            return jsonify({"error": "Username already exists."}), 400
 
-            # Hash the password before saving it (ensure it is bytes)
-            hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        # Hash the password outside the DB connection (bcrypt runs on the hashing pool)
+        hashed_password = password_hashing.hash_password(password)
 
+        with get_conn() as conn:
+            cur = conn.cursor(dictionary=True)
             # Create a new akun and add to the database
             cur.execute("INSERT INTO akun (username, password) VALUES (%s, %s)",
                         (username, hashed_password))
+            new_user_id = cur.lastrowid
+            # Baris versi data akun (untuk ETag) dibuat bersama akunnya
+            data_version.bump(cur, new_user_id)
             conn.commit()
 
-            # Get the new akun's ID
-            cur.execute("SELECT id FROM akun WHERE username = %s", (username,))
-            new_user = cur.fetchone()
-
-            # Generate JWT token for the newly registered akun
-            access_token = create_access_token(identity=str(new_user['id']),expires_delta=False)
+        # Generate JWT token for the newly registered akun
+        access_token = create_access_token(identity=str(new_user_id),expires_delta=False)
 
-            return jsonify({"message": "User registered successfully!", "access_token": access_token}), 201
+        return jsonify({"message": "User registered successfully!", "access_token": access_token}), 201
 
+    except HashBusy as e:
+        return busy_response(e)
+    except IntegrityError:
+        # Username yang sama didaftarkan bersamaan dan lolos pengecekan di atas (indeks unik)
+        return jsonify({"error": "Username already exists."}), 400
     except Error as err:
         return jsonify({"error": f"Database error: {err}"}), 500
 
@@ -62,19 +77,31 @@ def login():
     password = data['password']
 
     try:
-        # Fetch the akun from the database
+        # Fetch the akun from the database; the connection is released before hashing
         with get_conn() as conn:
             cur = conn.cursor(dictionary=True)
-            cur.execute("SELECT * FROM akun WHERE username = %s", (username,))
+            cur.execute("SELECT id, password FROM akun WHERE username = %s", (username,))
             akun = cur.fetchone()
 
-            if akun and bcrypt.checkpw(password.encode('utf-8'), akun['password'].encode('utf-8')):
-
-                # Create an access token using JWT (using string user_id)
-                access_token = create_access_token(identity=str(akun['id']),expires_delta=False)
-                return jsonify({"access_token": access_token}), 200
-            else:
-                return jsonify({"error": "Invalid credentials"}), 401
-
+        if not password_hashing.verify_password(password, akun['password'] if akun else None):
+            return jsonify({"error": "Invalid credentials"}), 401
+
+        # Cost factor changed since this hash was made: store a fresh hash (best effort)
+        if password_hashing.needs_rehash(akun['password']):
+            try:
+                new_hash = password_hashing.hash_password(password)
+                with get_conn() as conn:
+                    cur = conn.cursor()
+                    cur.execute("UPDATE akun SET password = %s WHERE id = %s", (new_hash, akun['id']))
+                    conn.commit()
+            except (HashBusy, Error) as err:
+                print(f"Password rehash skipped for akun {akun['id']}: {err}")
+
+        # Create an access token using JWT (using string user_id)
+        access_token = create_access_token(identity=str(akun['id']),expires_delta=False)
+        return jsonify({"access_token": access_token}), 200
+
+    except HashBusy as e:
+        return busy_response(e)
     except Error as err:
-        return jsonify({"error": f"Database error: {err}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"Database error: {err}"}), 500